@@ -0,0 +1,312 @@
+"""
+Shared HTTP client for the wallet backend API.
+
+Both fetch scripts go through this module instead of calling requests.get directly:
+- one pooled, keep-alive connection set per client (sync and async variants)
+- per-endpoint timeouts (behavior-analysis is much slower than summary)
+- jittered exponential backoff on 429/5xx and transport errors, honouring Retry-After; a
+  non-idempotent request (a POST submitting a job) is only retried when the backend cannot
+  have acted on it: 429, or a failure before the request was sent
+- counters for requests, retries and connection reuse
+- an optional on-disk response cache (see response_cache.py) consulted before any GET
+- latency, response size and retry metrics per endpoint (see metrics.py)
+
+httpx (and asyncio, for the async client) is imported when a client is used, not at import
+time, so scripts that only need backoff_delay() or --help do not pay for it.
+"""
+
+import os
+import random
+import time
+from dataclasses import dataclass, asdict
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from dotenv import load_dotenv
+
+from metrics import BYTE_BUCKETS, endpoint_label, registry
+from response_cache import MISS, ResponseCache
+
+if TYPE_CHECKING:
+    import httpx
+
+# Load environment variables from .env file
+load_dotenv()
+
+# --- Configuration ---
+MAX_RETRIES = int(os.getenv("API_MAX_RETRIES", "4"))
+BACKOFF_BASE_SECONDS = float(os.getenv("API_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX_SECONDS = float(os.getenv("API_BACKOFF_MAX", "30"))
+POOL_SIZE = int(os.getenv("API_POOL_SIZE", "20"))
+CONNECT_TIMEOUT = 5.0
+
+# Read timeouts (seconds) by endpoint suffix; anything unlisted uses DEFAULT_TIMEOUT
+ENDPOINT_TIMEOUTS = {
+    "/summary": 15.0,
+    "/pnl-overview": 30.0,
+    "/behavior-analysis": 120.0,
+    "/token-performance": 60.0,
+    "/analyses/wallets/status": 30.0,
+    "/progress": 10.0,
+}
+DEFAULT_TIMEOUT = 30.0
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+@dataclass
+class ClientStats:
+    requests: int = 0          # HTTP attempts sent, including retries
+    retries: int = 0
+    failures: int = 0          # calls that gave up after the last attempt
+    connections_opened: int = 0
+
+    @property
+    def connections_reused(self) -> int:
+        return max(self.requests - self.connections_opened, 0)
+
+    def as_dict(self) -> Dict[str, int]:
+        data = asdict(self)
+        data["connections_reused"] = self.connections_reused
+        return data
+
+    def report(self) -> str:
+        return (f"HTTP: {self.requests} requests, {self.connections_opened} connections opened, "
+                f"{self.connections_reused} reused, {self.retries} retries, {self.failures} failures")
+
+
+def timeout_for(endpoint: str) -> "httpx.Timeout":
+    import httpx
+
+    path = endpoint.split("?", 1)[0]
+    read = DEFAULT_TIMEOUT
+    for suffix, seconds in ENDPOINT_TIMEOUTS.items():
+        if path.endswith(suffix):
+            read = seconds
+            break
+    return httpx.Timeout(read, connect=CONNECT_TIMEOUT)
+
+
+def retry_after_seconds(response: "httpx.Response") -> Optional[float]:
+    """Parse a Retry-After header given either as delta-seconds or as an HTTP date."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff; a server-provided Retry-After takes precedence."""
+    if retry_after is not None:
+        return min(retry_after, BACKOFF_MAX_SECONDS)
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt)))
+
+
+def _is_retryable(error: Exception, idempotent: bool = True) -> bool:
+    """Whether a failed attempt may be sent again.
+
+    A non-idempotent request that reached the backend may have been acted on (a 5xx or a
+    read timeout after a job was queued), so it is retried only on 429 or when it never
+    left the client: connect errors and waits for a pooled connection.
+    """
+    import httpx
+
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status in RETRY_STATUS_CODES if idempotent else status == 429
+    if not idempotent:
+        return isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+    return isinstance(error, httpx.TransportError)
+
+
+class _BaseClient:
+    def __init__(self, base_url: str, api_key: Optional[str] = None, max_retries: int = MAX_RETRIES,
+                 cache: Optional[ResponseCache] = None):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.max_retries = max_retries
+        self.cache = cache
+        self.stats = ClientStats()
+
+    def _cached(self, endpoint: str, params: Optional[Dict]) -> Any:
+        if self.cache is None:
+            return MISS
+        return self.cache.get(self.base_url, endpoint, params)
+
+    def _store(self, endpoint: str, params: Optional[Dict], value: Any) -> None:
+        if self.cache is not None:
+            self.cache.put(self.base_url, endpoint, params, value)
+
+    def _headers(self) -> Dict[str, str]:
+        return {"x-api-key": self.api_key} if self.api_key else {}
+
+    def _limits(self) -> "httpx.Limits":
+        import httpx
+
+        return httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE)
+
+    def _observe(self, method: str, endpoint: str, started: float, response: Optional["httpx.Response"]) -> None:
+        label = endpoint_label(endpoint)
+        status = response.status_code if response is not None else "error"
+        registry.observe("http_request_seconds", time.perf_counter() - started, method=method, endpoint=label, status=status)
+        if response is not None:
+            registry.observe("http_response_bytes", len(response.content), BYTE_BUCKETS, endpoint=label)
+
+    def _retry_delay(self, error: Exception, attempt: int, endpoint: str = "",
+                     idempotent: bool = True) -> Optional[float]:
+        """Seconds to wait before the next attempt, or None if the error is final."""
+        import httpx
+
+        if attempt >= self.max_retries or not _is_retryable(error, idempotent):
+            self.stats.failures += 1
+            registry.inc("http_failures_total", endpoint=endpoint_label(endpoint))
+            return None
+        self.stats.retries += 1
+        registry.inc("http_retries_total", endpoint=endpoint_label(endpoint))
+        retry_after = retry_after_seconds(error.response) if isinstance(error, httpx.HTTPStatusError) else None
+        return backoff_delay(attempt, retry_after)
+
+
+class WalletApiClient(_BaseClient):
+    """Blocking client with a keep-alive connection pool."""
+
+    def __init__(self, base_url: str, api_key: Optional[str] = None, max_retries: int = MAX_RETRIES,
+                 cache: Optional[ResponseCache] = None):
+        import httpx
+
+        super().__init__(base_url, api_key, max_retries, cache)
+        self._client = httpx.Client(headers=self._headers(), limits=self._limits())
+
+    def _trace(self, event_name: str, info: Dict) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            self.stats.connections_opened += 1
+
+    def request(self, method: str, endpoint: str, params: Optional[Dict] = None, json: Any = None,
+                idempotent: Optional[bool] = None) -> Any:
+        """Send a request with retries and return the decoded JSON body; raises after the last attempt.
+
+        idempotent defaults to the method's (see IDEMPOTENT_METHODS) and limits the retries of one that is not.
+        """
+        import httpx
+
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            self.stats.requests += 1
+            started = time.perf_counter()
+            resp = None
+            try:
+                resp = self._client.request(method, f"{self.base_url}{endpoint}", params=params, json=json,
+                                            timeout=timeout_for(endpoint), extensions={"trace": self._trace})
+                self._observe(method, endpoint, started, resp)
+                resp.raise_for_status()
+                return resp.json()
+            except httpx.HTTPError as e:
+                if resp is None:
+                    self._observe(method, endpoint, started, None)
+                delay = self._retry_delay(e, attempt, endpoint, idempotent)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+
+    def get(self, endpoint: str, params: Optional[Dict] = None, fresh: bool = False) -> Any:
+        """GET through the cache; fresh=True skips the cached copy (the new response is still stored)."""
+        cached = MISS if fresh else self._cached(endpoint, params)
+        if cached is not MISS:
+            return cached
+        result = self.request("GET", endpoint, params=params)
+        self._store(endpoint, params, result)
+        return result
+
+    def post(self, endpoint: str, payload: Any, idempotent: bool = False) -> Any:
+        """POST payload; pass idempotent=True for a read-only POST (e.g. a status lookup) to retry it like a GET."""
+        return self.request("POST", endpoint, json=payload, idempotent=idempotent)
+
+    def close(self) -> None:
+        self._client.close()
+
+    def __enter__(self) -> "WalletApiClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class AsyncWalletApiClient(_BaseClient):
+    """asyncio client sharing one connection pool across all concurrent requests."""
+
+    def __init__(self, base_url: str, api_key: Optional[str] = None, max_retries: int = MAX_RETRIES,
+                 pool_size: int = POOL_SIZE, cache: Optional[ResponseCache] = None):
+        import httpx
+
+        super().__init__(base_url, api_key, max_retries, cache)
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self._client = httpx.AsyncClient(headers=self._headers(), limits=limits)
+
+    async def _trace(self, event_name: str, info: Dict) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            self.stats.connections_opened += 1
+
+    async def request(self, method: str, endpoint: str, params: Optional[Dict] = None, json: Any = None,
+                      idempotent: Optional[bool] = None) -> Any:
+        """Send a request with retries and return the decoded JSON body; raises after the last attempt.
+
+        idempotent defaults to the method's (see IDEMPOTENT_METHODS) and limits the retries of one that is not.
+        """
+        import asyncio
+        import httpx
+
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            self.stats.requests += 1
+            started = time.perf_counter()
+            resp = None
+            try:
+                resp = await self._client.request(method, f"{self.base_url}{endpoint}", params=params, json=json,
+                                                  timeout=timeout_for(endpoint), extensions={"trace": self._trace})
+                self._observe(method, endpoint, started, resp)
+                resp.raise_for_status()
+                return resp.json()
+            except httpx.HTTPError as e:
+                if resp is None:
+                    self._observe(method, endpoint, started, None)
+                delay = self._retry_delay(e, attempt, endpoint, idempotent)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def get(self, endpoint: str, params: Optional[Dict] = None, fresh: bool = False) -> Any:
+        """GET through the cache; fresh=True skips the cached copy (the new response is still stored)."""
+        cached = MISS if fresh else self._cached(endpoint, params)
+        if cached is not MISS:
+            return cached
+        result = await self.request("GET", endpoint, params=params)
+        self._store(endpoint, params, result)
+        return result
+
+    async def post(self, endpoint: str, payload: Any, idempotent: bool = False) -> Any:
+        """POST payload; pass idempotent=True for a read-only POST (e.g. a status lookup) to retry it like a GET."""
+        return await self.request("POST", endpoint, json=payload, idempotent=idempotent)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def __aenter__(self) -> "AsyncWalletApiClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark: prompt x model evaluation (prompt_eval.py) against the mock chat endpoint.
+
+Runs the two prompt templates x two models over a synthetic wallet sample three ways:
+one cell at a time (the old notebook loop, without its sleeps), all cells concurrently
+through the harness, and the concurrent run again with a warm completion cache. Both
+models are served by the OpenAI-compatible mock, so the run needs no API keys.
+
+    python benchmarks/bench_eval.py --wallets 100 --llm-latency-ms 800 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(BENCH_DIR))
+
+import prompt_eval
+from llm_cache import LLMCache
+from mock_backend import MockConfig, serve
+from prompt_eval import EvalHarness, format_matrix, load_prompts, parse_models, results_matrix
+
+PROMPTS = [str(REPO_ROOT / "wallet_analysis_prompt_v2_gemini.md"), str(REPO_ROOT / "wallet_analysis_prompt_v2_sonnet_4.md")]
+MODELS = "gpt4o=openai:gpt-4o,mini=openai:gpt-4o-mini"
+
+
+def make_wallets(count: int) -> List[Dict]:
+    base = json.loads((REPO_ROOT / "agent_input_gake.json").read_text(encoding="utf-8"))
+    wallets = []
+    for i in range(count):
+        wallet = copy.deepcopy(base)
+        wallet["wallet_address"] = f"EvalWallet{i:05d}"
+        wallets.append(wallet)
+    return wallets
+
+
+async def run_serial(prompts: Dict[str, str], models, wallets: List[Dict]) -> float:
+    harness = EvalHarness(models)
+    started = time.perf_counter()
+    for name, text in prompts.items():
+        for spec in models:
+            for wallet in wallets:
+                await harness.evaluate(name, text, spec, wallet)
+    return time.perf_counter() - started
+
+
+async def run_concurrent(prompts: Dict[str, str], models, wallets: List[Dict], cache: Optional[LLMCache] = None):
+    started = time.perf_counter()
+    cells = await EvalHarness(models, cache).run(prompts, wallets)
+    return cells, time.perf_counter() - started
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Serial vs concurrent prompt x model evaluation on the mock endpoint")
+    parser.add_argument("--wallets", type=int, default=25, help="Wallets in the sample")
+    parser.add_argument("--llm-latency-ms", type=float, default=500.0, help="Mock completion latency")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent calls per provider")
+    parser.add_argument("--port", type=int, default=8792)
+    parser.add_argument("--skip-serial", action="store_true", help="Only time the concurrent runs")
+    args = parser.parse_args(argv)
+
+    server = serve(args.port, MockConfig(llm_latency_ms=args.llm_latency_ms, jitter_ms=args.llm_latency_ms / 5))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "mock")
+    prompt_eval.PROVIDER_LIMITS["openai"] = (100_000, 100_000_000, args.concurrency)
+
+    prompts = load_prompts(PROMPTS)
+    models = parse_models(MODELS)
+    wallets = make_wallets(args.wallets)
+    total = len(prompts) * len(models) * len(wallets)
+    print(f"{len(prompts)} prompts x {len(models)} models x {len(wallets)} wallets = {total} cells, "
+          f"{args.llm_latency_ms:.0f} ms per completion\n")
+
+    if not args.skip_serial:
+        serial = asyncio.run(run_serial(prompts, models, wallets))
+        print(f"serial (notebook loop)   {serial:7.2f}s")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMCache(os.path.join(tmp, "eval_cache.sqlite"))
+        cells, elapsed = asyncio.run(run_concurrent(prompts, models, wallets, cache))
+        print(f"concurrent, cold cache   {elapsed:7.2f}s  (x{args.concurrency} per provider)")
+        _, warm = asyncio.run(run_concurrent(prompts, models, wallets, cache))
+        print(f"concurrent, warm cache   {warm:7.2f}s  ({cache.stats.hits} hits)")
+        cache.close()
+    print(f"\n{format_matrix(results_matrix(cells))}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark: template-driven fetch plans (fetch_plan.py) against the mock backend.
+
+Fetches and sanitizes the same wallets once per plan: the complete fetch, each prompt
+template on its own, the pipeline's smart+prescreen plan, and the smart plan ranked by
+totalAmountIn (not a backend sort field, so every token page is walked). Reports backend
+requests and response bytes per wallet, the size of the agent_input record, the wall
+time, and how many wallets' planned records differ from the complete fetch on the
+plan's fields (fetch_plan.compare_records(); only the totalAmountIn plan should).
+
+    python benchmarks/bench_fetch_plan.py --wallets 200 --tokens 500 --latency-ms 20
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(BENCH_DIR))
+
+import fetch_wallet_data_complete as complete
+from api_client import AsyncWalletApiClient
+from fetch_plan import FetchPlan, compare_records, get_template, plan_fetch
+from fetch_wallet_data_complete import ALL_SECTIONS, build_agent_input, fetch_wallet_sections, missing_section
+from mock_backend import API_PREFIX, MockConfig, serve
+
+PLANS = [
+    ("complete fetch", None),
+    ("full", plan_fetch(get_template("full"))),
+    ("smart", plan_fetch(get_template("smart"))),
+    ("notebook", plan_fetch(get_template("notebook"))),
+    ("prescreen", plan_fetch(get_template("prescreen"))),
+    ("smart+prescreen", plan_fetch(get_template("smart"), get_template("prescreen"))),
+    ("smart, every page", plan_fetch(get_template("smart"), sort_by="totalAmountIn")),
+]
+
+
+async def run_plan(base_url: str, wallets: List[str], plan: Optional[FetchPlan], concurrency: int) -> Dict[str, Any]:
+    records: Dict[str, Dict] = {}
+    record_bytes = 0
+    failed = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    async with AsyncWalletApiClient(base_url, pool_size=concurrency * 4) as client:
+
+        async def one(address: str):
+            nonlocal record_bytes, failed
+            async with semaphore:
+                sections = await fetch_wallet_sections(address, client=client, plan=plan)
+            if missing_section(*sections, plan.sections if plan else ALL_SECTIONS):
+                failed += 1
+                return
+            records[address] = build_agent_input(address, *sections, plan=plan)
+            record_bytes += len(json.dumps(records[address]))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(address) for address in wallets))
+        return {"seconds": time.perf_counter() - started, "record_bytes": record_bytes, "failed": failed, "records": records}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Requests and bytes per wallet for each prompt template's fetch plan")
+    parser.add_argument("--wallets", type=int, default=100, help="Wallets fetched per plan")
+    parser.add_argument("--tokens", type=int, default=500, help="Token-performance rows per wallet")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Mock backend latency per request")
+    parser.add_argument("--concurrency", type=int, default=16, help="Wallets in flight")
+    parser.add_argument("--port", type=int, default=8795)
+    args = parser.parse_args(argv)
+
+    config = MockConfig(latency_ms=args.latency_ms, jitter_ms=args.latency_ms / 5, tokens=args.tokens)
+    server = serve(args.port, config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{args.port}{API_PREFIX}"
+    complete.response_cache = None  # every plan hits the backend
+    wallets = [f"PlanWallet{i:05d}" for i in range(args.wallets)]
+
+    print(f"{args.wallets} wallets, {args.tokens} token rows each, {args.latency_ms:.0f} ms per request\n")
+    print(f"{'plan':<20} {'req/wallet':>10} {'KB recv/wallet':>15} {'KB record':>10} {'seconds':>8} {'differ':>7}")
+    complete_records: Dict[str, Dict] = {}
+    for label, plan in PLANS:
+        requests, sent = config.requests, config.bytes_sent
+        result = asyncio.run(run_plan(base_url, wallets, plan, args.concurrency))
+        fetched = args.wallets - result["failed"]
+        if plan is None:
+            complete_records = result["records"]
+            differ = 0
+        else:
+            differ = sum(1 for address, record in result["records"].items()
+                         if address in complete_records and compare_records(plan, complete_records[address], record))
+        print(f"{label:<20} {(config.requests - requests) / args.wallets:>10.1f} "
+              f"{(config.bytes_sent - sent) / args.wallets / 1024:>15.1f} "
+              f"{result['record_bytes'] / max(fetched, 1) / 1024:>10.2f} {result['seconds']:>8.2f} {differ:>7}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
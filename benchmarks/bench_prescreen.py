@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark: deterministic pre-screening (prescreen.py) on synthetic agent_inputs.
+
+Builds a cohort with a chosen share of bots, near-empty and dormant wallets among
+ordinary traders, times prescreen() over all of it and reports how many LLM calls the
+templated reports replace, and the LLM time that saves at a given seconds-per-call.
+
+    python benchmarks/bench_prescreen.py --wallets 100000 --bots 0.3 --dormant 0.1 --llm-seconds 12
+"""
+
+import argparse
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from prescreen import ROUTE_TEMPLATE, prescreen
+
+NOW = 1_760_000_000
+
+
+def make_agent_input(rng: random.Random, kind: str, index: int) -> Dict:
+    trades = {"bot": rng.randint(300, 5000), "new": rng.randint(0, 4)}.get(kind, rng.randint(10, 400))
+    return {
+        "wallet_address": f"Wallet{index:07d}",
+        "summary": {
+            "current_sol_balance": 0.0 if kind == "dormant" else round(rng.uniform(0.5, 200), 4),
+            "last_active_timestamp": NOW - rng.randint(40, 400) * 86400 if kind == "dormant"
+            else NOW - rng.randint(0, 20) * 86400,
+        },
+        "pnl_overview": {
+            "realized_pnl": round(rng.gauss(0, 150), 2),
+            "token_win_rate": round(rng.uniform(0, 100), 1),
+            "data_from": "2025-01-01 to 2025-10-01",
+        },
+        "behavior": {
+            "trading_style": "Sniper / Flipper" if kind == "bot" else "Swing Trader",
+            "flipper_score": rng.uniform(0.96, 1.0) if kind == "bot" else rng.uniform(0, 0.9),
+            "percent_trades_under_1hour": rng.uniform(0.92, 1.0) if kind == "bot" else rng.uniform(0, 0.6),
+            "total_trade_count": trades,
+            "unique_tokens_traded": max(trades // 4, 0),
+            "percent_of_value_in_current_holdings": 0.0 if kind == "dormant" else rng.uniform(5, 90),
+        },
+    }
+
+
+def make_cohort(wallets: int, bots: float, new: float, dormant: float, seed: int = 5) -> List[Dict]:
+    rng = random.Random(seed)
+    kinds = rng.choices(("bot", "new", "dormant", "trader"),
+                        weights=(bots, new, dormant, max(1 - bots - new - dormant, 0)), k=wallets)
+    return [make_agent_input(rng, kind, i) for i, kind in enumerate(kinds)]
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Pre-screen routing on a synthetic cohort")
+    parser.add_argument("--wallets", type=int, default=100000, help="Wallets in the cohort")
+    parser.add_argument("--bots", type=float, default=0.3, help="Share of high-frequency bots")
+    parser.add_argument("--new", type=float, default=0.1, help="Share of wallets with a handful of trades")
+    parser.add_argument("--dormant", type=float, default=0.1, help="Share of dormant, emptied wallets")
+    parser.add_argument("--llm-seconds", type=float, default=12.0, help="Mean seconds per GPT-4o analysis call")
+    args = parser.parse_args(argv)
+
+    cohort = make_cohort(args.wallets, args.bots, args.new, args.dormant)
+    started = time.perf_counter()
+    verdicts = [prescreen(agent_input, now=NOW) for agent_input in cohort]
+    elapsed = time.perf_counter() - started
+
+    templated = Counter(v.label for v in verdicts if v.route == ROUTE_TEMPLATE)
+    skipped = sum(templated.values())
+    print(f"{args.wallets} wallets pre-screened in {elapsed:.2f}s ({elapsed / args.wallets * 1e6:.0f} µs per wallet)")
+    print(f"templated: {skipped} ({skipped / args.wallets:.0%}) - "
+          + ", ".join(f"{label} {count}" for label, count in templated.most_common()))
+    print(f"LLM calls avoided: {skipped}; ~{skipped * args.llm_seconds / 3600:.1f}h of LLM time "
+          f"at {args.llm_seconds:g}s per call")
+
+
+if __name__ == "__main__":
+    main()
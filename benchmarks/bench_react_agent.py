@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ReAct agent tool calls (react_agent.py) against the mock backend.
+
+A scripted model stands in for the LLM, so only the tool side is measured. It
+answers three questions in one session. The first asks for summary and PnL in
+parallel. The second asks for behavior and the first token-performance page, and
+repeats the summary. The third needs only data already fetched. The run is compared
+with the current path, which fetches every section and walks all token-performance
+pages for each question, and with the same agent calling its tools one at a time.
+
+    python benchmarks/bench_react_agent.py --latency-ms 80 --tokens 2000
+"""
+
+import argparse
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(BENCH_DIR))
+
+from api_client import AsyncWalletApiClient
+from fetch_wallet_data_complete import fetch_wallet_sections
+from mock_backend import API_PREFIX, MockConfig, serve
+from react_agent import ReActAgent, ToolSession
+
+WALLET = "BenchWallet111111111111111111111111111111111"
+# Replies per question, in order; each Action line is one tool call
+SCRIPT = [
+    ["Thought: headline numbers first\nAction: get_summary[{}]\nAction: get_pnl_overview[{}]",
+     "Final Answer: profitable"],
+    ["Thought: style and top tokens\nAction: get_behavior_analysis[{}]\n"
+     "Action: get_token_performance[{\"pageSize\": 20}]\nAction: get_summary[{}]",
+     "Final Answer: flipper"],
+    ["Thought: already fetched\nAction: get_pnl_overview[{}]\nAction: get_token_performance[{}]",
+     "Final Answer: see above"],
+]
+
+
+class ScriptedLLM:
+    def __init__(self, replies: List[str]):
+        self.replies = list(replies)
+
+    async def __call__(self, messages: List[Dict[str, str]]) -> str:
+        return self.replies.pop(0)
+
+
+async def run_agent(base_url: str, serial: bool = False) -> Dict[str, float]:
+    started = time.perf_counter()
+    async with AsyncWalletApiClient(base_url) as client:
+        session = ToolSession(client, WALLET)
+        for replies in SCRIPT:
+            if serial:
+                # Same calls, one Action per reply
+                steps = []
+                for reply in replies[:-1]:
+                    head, *actions = reply.split("\n")
+                    steps += [f"{head}\n{action}" for action in actions]
+                replies = steps + replies[-1:]
+            await ReActAgent(llm=ScriptedLLM(replies), max_steps=10).run("q", session)
+        return {"seconds": time.perf_counter() - started, "requests": client.stats.requests,
+                "tool_calls": len(session.calls), "memoized": sum(call.memoized for call in session.calls)}
+
+
+async def run_prefetch(base_url: str) -> Dict[str, float]:
+    started = time.perf_counter()
+    async with AsyncWalletApiClient(base_url) as client:
+        for _ in SCRIPT:
+            await fetch_wallet_sections(WALLET, client=client)
+        return {"seconds": time.perf_counter() - started, "requests": client.stats.requests}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="ReAct tool calls vs fetching every section up front")
+    parser.add_argument("--latency-ms", type=float, default=80.0, help="Mock backend latency per request")
+    parser.add_argument("--tokens", type=int, default=2000, help="Token-performance rows for the wallet")
+    parser.add_argument("--port", type=int, default=8793)
+    args = parser.parse_args(argv)
+
+    server = serve(args.port, MockConfig(latency_ms=args.latency_ms, jitter_ms=args.latency_ms / 10, tokens=args.tokens))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{args.port}{API_PREFIX}"
+
+    print(f"{len(SCRIPT)} questions, {args.latency_ms:.0f} ms per request, {args.tokens} token rows\n")
+    prefetch = asyncio.run(run_prefetch(base_url))
+    print(f"prefetch every section     {prefetch['seconds']:6.2f}s  {prefetch['requests']:>4} requests")
+    for label, serial in (("agent, one tool per step", True), ("agent, parallel + memo", False)):
+        result = asyncio.run(run_agent(base_url, serial))
+        print(f"{label:<26} {result['seconds']:6.2f}s  {result['requests']:>4} requests  "
+              f"({result['tool_calls']} tool calls, {result['memoized']} memoized)")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark: field_mapping sections vs the hand-written sanitize_* functions.
+
+Raw backend records are rebuilt from the fixtures by mock_backend.load_profiles(). Every
+record is first sanitized both ways and compared, then timed two ways:
+
+    mapping     each section on its own, undecorated: legacy function, SECTION.one per
+                record, and SECTION.many over the whole batch
+    per wallet  build_agent_input() as the fetch scripts run it, including the metrics
+                decorator and top-N selection, legacy (benchmarks/legacy_sanitize.py) vs now
+
+    python benchmarks/bench_sanitize.py --records 5000 --tokens 50
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+sys.path.insert(0, str(BENCH_DIR))
+
+# Importing the fetch script must not open the on-disk caches
+os.environ.setdefault("RESPONSE_CACHE_DISABLED", "1")
+os.environ.setdefault("RESULTS_STORE_DISABLED", "1")
+
+import fetch_wallet_data_complete as complete
+import legacy_sanitize as legacy
+from field_mapping import BEHAVIOR, PNL, SUMMARY, TOKEN
+from mock_backend import load_profiles, token_rows
+
+
+def make_records(count: int, tokens: int) -> List[Dict]:
+    profiles = load_profiles()
+    records = []
+    for i in range(count):
+        profile = profiles[i % len(profiles)]
+        wallet = f"Wallet{i:06d}"
+        records.append({
+            "address": wallet,
+            "summary": dict(profile["summary"], lastActiveTimestamp=1_700_000_000 + i),
+            "pnl": {"allTimeData": dict(profile["pnl"]["allTimeData"], realizedPnl=float(i))},
+            "behavior": dict(profile["behavior"], totalTradeCount=i),
+            "tokens": token_rows(profile["tokens"], tokens, wallet),
+        })
+    return records
+
+
+def best_of(repeat: int, func: Callable[[], object]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def check_equivalence(records: List[Dict]) -> None:
+    for i, record in enumerate(records):
+        expected = legacy.build_agent_input(record["address"], record["summary"], record["pnl"], record["behavior"],
+                                            record["tokens"])
+        actual = complete.build_agent_input(record["address"], record["summary"], record["pnl"], record["behavior"],
+                                            record["tokens"], validate=False)
+        for section in expected:
+            if expected[section] != actual[section] or list(expected[section]) != list(actual[section]):
+                raise SystemExit(f"Mismatch in {section} for record {i}:\n  legacy   {expected[section]}\n"
+                                 f"  mapping  {actual[section]}")
+
+
+def report(name: str, count: int, legacy_time: float, mapped_time: float, batch_time: Optional[float]) -> None:
+    """µs per item and the speedup of each variant over legacy, one() and many() reported separately."""
+    per_item = 1e6 / count
+    batch = f"{batch_time * per_item:>11.2f}" if batch_time is not None else f"{'-':>11}"
+    batch_speedup = f"{legacy_time / batch_time:>9.1f}x" if batch_time is not None else f"{'-':>10}"
+    print(f"{name:<14}{legacy_time * per_item:>12.2f}{mapped_time * per_item:>13.2f}{batch}"
+          f"{legacy_time / mapped_time:>9.1f}x{batch_speedup}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="field_mapping sections vs hand-written sanitize_* functions")
+    parser.add_argument("--records", type=int, default=5000, help="Wallet records to sanitize")
+    parser.add_argument("--tokens", type=int, default=50, help="Token-performance rows per wallet")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing runs per case; the best is reported")
+    args = parser.parse_args(argv)
+
+    legacy.TOP_TOKENS, legacy.TOP_TOKENS_BY = complete.TOP_TOKENS, complete.TOP_TOKENS_BY
+    records = make_records(args.records, args.tokens)
+    check_equivalence(records)
+    print(f"Outputs identical for {len(records)} records ({args.tokens} token rows each). "
+          f"Best of {args.repeat} runs, µs per wallet:\n")
+
+    summaries = [r["summary"] for r in records]
+    pnls = [r["pnl"] for r in records]
+    behaviors = [r["behavior"] for r in records]
+    top_rows = [complete.heapq.nlargest(complete.TOP_TOKENS, r["tokens"], key=complete.row_key(complete.TOP_TOKENS_BY))
+                for r in records]
+    cases = (
+        ("summary", summaries, legacy.sanitize_summary, SUMMARY),
+        ("pnl_overview", pnls, legacy.sanitize_pnl, PNL),
+        ("behavior", behaviors, legacy.sanitize_behavior_complete, BEHAVIOR),
+        ("top tokens", top_rows, legacy.sanitize_token_performance_complete, TOKEN),
+    )
+    print(f"{'mapping':<14}{'legacy':>12}{'one':>13}{'many':>11}{'one x':>10}{'many x':>10}")
+    for name, items, legacy_func, section in cases:
+        undecorated = legacy_func.__wrapped__
+        if section is TOKEN:
+            # One wallet's rows per call; batch maps every wallet's rows in a single many() call
+            flat = [row for rows in items for row in rows]
+            report(name, len(items), best_of(args.repeat, lambda: [undecorated(rows) for rows in items]),
+                   best_of(args.repeat, lambda: [TOKEN.many(rows) for rows in items]),
+                   best_of(args.repeat, lambda: TOKEN.many(flat)))
+            continue
+        report(name, len(items), best_of(args.repeat, lambda: [undecorated(item) for item in items]),
+               best_of(args.repeat, lambda: [section.one(item) for item in items]),
+               best_of(args.repeat, lambda: section.many(items)))
+
+    def run(build: Callable, **kwargs) -> Callable[[], object]:
+        return lambda: [build(r["address"], r["summary"], r["pnl"], r["behavior"], r["tokens"], **kwargs) for r in records]
+
+    legacy_time = best_of(args.repeat, run(legacy.build_agent_input))
+    mapped_time = best_of(args.repeat, run(complete.build_agent_input, validate=False))
+    validated_time = best_of(1, run(complete.build_agent_input, validate=True))
+    print(f"\n{'per wallet':<14}{'legacy':>12}{'now':>13}{'':>11}{'now x':>10}")
+    report("agent_input", len(records), legacy_time, mapped_time, None)
+    print(f"\n{len(records)} wallets: {legacy_time * 1000:.1f} ms legacy -> {mapped_time * 1000:.1f} ms now "
+          f"({mapped_time / legacy_time:.0%} of the time); with VALIDATE_AGENT_INPUT {validated_time * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark: local cohort similarity (similarity.py) on synthetic token-performance rows.
+
+Wallets draw their tokens from a Zipf-like popularity curve, so a few tokens are shared
+by much of the cohort and most are rare, as in real data. Before timing, the top-k
+output for a small cohort is checked against a pure-Python port of the backend's
+per-pair cosine and Jaccard loops.
+
+    python benchmarks/bench_similarity.py --wallets 10000 --tokens 60 --universe 50000
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from similarity import build_matrix, top_k_neighbours
+
+
+def make_rows(wallets: int, tokens: int, universe: int, seed: int = 7) -> List[Tuple[str, List[Dict]]]:
+    rng = random.Random(seed)
+    weights = [1.0 / (rank + 1) ** 0.8 for rank in range(universe)]
+    mints = [f"Mint{i:07d}" for i in range(universe)]
+    result = []
+    for w in range(wallets):
+        picked = set(rng.choices(range(universe), weights=weights, k=rng.randint(max(tokens // 4, 1), tokens)))
+        rows = [{"tokenAddress": mints[t], "totalSolSpent": round(rng.lognormvariate(0, 1.5), 4)} for t in picked]
+        result.append((f"Wallet{w:06d}", rows))
+    return result
+
+
+def reference_scores(rows_a: List[Dict], rows_b: List[Dict]) -> Tuple[float, float, float]:
+    """Backend-style binary cosine, capital cosine and Jaccard for one pair, one token at a time."""
+    spent_a = {r["tokenAddress"]: r["totalSolSpent"] for r in rows_a}
+    spent_b = {r["tokenAddress"]: r["totalSolSpent"] for r in rows_b}
+    total_a, total_b = sum(spent_a.values()), sum(spent_b.values())
+    tokens = sorted(spent_a.keys() | spent_b.keys())
+
+    def cosine(a: List[float], b: List[float]) -> float:
+        norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+        return sum(x * y for x, y in zip(a, b)) / norm if norm else 0.0
+
+    binary = cosine([1.0 if t in spent_a else 0.0 for t in tokens], [1.0 if t in spent_b else 0.0 for t in tokens])
+    capital = cosine([spent_a.get(t, 0) / total_a for t in tokens], [spent_b.get(t, 0) / total_b for t in tokens])
+    shared = len(spent_a.keys() & spent_b.keys())
+    return binary, capital, shared / len(tokens) if tokens else 1.0
+
+
+def check_against_reference(wallets: int, tokens: int, universe: int, k: int) -> None:
+    cohort = make_rows(wallets, tokens, universe, seed=11)
+    matrix = build_matrix(cohort)
+    for by, position in (("binary", 0), ("capital", 1), ("jaccard", 2)):
+        neighbours = top_k_neighbours(matrix, k, by)
+        for i, (_, rows_a) in enumerate(cohort):
+            expected = sorted((reference_scores(rows_a, rows_b)[position] for j, (_, rows_b) in enumerate(cohort) if j != i),
+                              reverse=True)[:k]
+            expected = [score for score in expected if score > 0]
+            got = [pair[f"{by}_score"] for pair in neighbours.pairs(i, 0)]
+            if len(got) != len(expected) or any(abs(g - e) > 1e-4 for g, e in zip(got, expected)):
+                raise SystemExit(f"{by} mismatch for wallet {i}:\n  reference {expected}\n  engine    {got}")
+            for pair in neighbours.pairs(i, 0):
+                j = matrix.wallets.index(pair["wallet_b"])
+                reference = reference_scores(rows_a, cohort[j][1])
+                for name, value in zip(("binary", "capital", "jaccard"), reference):
+                    if abs(pair[f"{name}_score"] - value) > 1e-4:
+                        raise SystemExit(f"{name} score mismatch for {pair['wallet_a']} / {pair['wallet_b']}: "
+                                         f"{pair[f'{name}_score']} vs {value}")
+    print(f"Top-{k} scores match the per-pair reference for {wallets} wallets.\n")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Local top-k wallet similarity on a synthetic cohort")
+    parser.add_argument("--wallets", type=int, default=10000, help="Wallets in the cohort")
+    parser.add_argument("--tokens", type=int, default=60, help="Most tokens traded per wallet")
+    parser.add_argument("--universe", type=int, default=50000, help="Distinct tokens to draw from")
+    parser.add_argument("--top-k", type=int, default=10, help="Neighbours per wallet")
+    args = parser.parse_args(argv)
+
+    check_against_reference(120, 20, 300, 5)
+
+    rows = make_rows(args.wallets, args.tokens, args.universe)
+    started = time.perf_counter()
+    matrix = build_matrix(rows)
+    built = time.perf_counter()
+    print(f"{len(matrix.wallets)} wallets x {len(matrix.mints)} tokens, {matrix.binary.nnz} entries: "
+          f"matrix built in {built - started:.2f}s")
+    for by in ("binary", "capital", "jaccard"):
+        started = time.perf_counter()
+        neighbours = top_k_neighbours(matrix, args.top_k, by)
+        elapsed = time.perf_counter() - started
+        pairs = len(matrix.wallets) * (len(matrix.wallets) - 1) // 2
+        print(f"top-{args.top_k} by {by:<8} {elapsed:6.2f}s  ({pairs / elapsed / 1e6:.0f}M pairs/s scored)")
+    started = time.perf_counter()
+    records = [neighbours.pairs(i) for i in range(len(matrix.wallets))]
+    print(f"SimilarityPair records with shared tokens for {sum(map(len, records))} pairs in "
+          f"{time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
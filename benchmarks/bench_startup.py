@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Cold-start budget for the wallet-agent CLI.
+
+Runs `wallet_agent.py --help` and `wallet_agent.py <command> --help` for every command in
+fresh interpreters and reports the best and median wall time, minus a bare `python -c pass`
+so the numbers are comparable across machines. `-X importtime` shows which of the heavy
+dependencies each command loaded; none of them should be needed just to print help.
+
+Exits with status 1 if any command is over --budget-ms or imports a heavy module.
+
+    python benchmarks/bench_startup.py --runs 7 --budget-ms 150
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional, Set
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from wallet_agent import COMMANDS
+
+HEAVY_MODULES = ("openai", "anthropic", "httpx", "pydantic", "numpy", "scipy")
+DEFAULT_BUDGET_MS = 150.0  # on top of bare interpreter start-up
+
+
+def wall_times(args: List[str], runs: int) -> List[float]:
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(args, cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def heavy_imports(args: List[str]) -> Set[str]:
+    """Top-level packages from HEAVY_MODULES that `args` imports, per -X importtime."""
+    result = subprocess.run([args[0], "-X", "importtime"] + args[1:], cwd=REPO_ROOT,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    loaded = set()
+    for line in result.stderr.splitlines():
+        name = line.rsplit("|", 1)[-1].strip().split(".")[0]
+        if name in HEAVY_MODULES:
+            loaded.add(name)
+    return loaded
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Measure wallet-agent CLI cold-start time against a budget")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per command")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="Allowed start-up time per command on top of a bare interpreter")
+    args = parser.parse_args(argv)
+
+    bare = min(wall_times([sys.executable, "-c", "pass"], args.runs))
+    cli = str(REPO_ROOT / "wallet_agent.py")
+    cases = [("--help", [sys.executable, cli, "--help"])]
+    cases += [(f"{name} --help", [sys.executable, cli, name, "--help"]) for name in COMMANDS]
+
+    print(f"Bare interpreter: {bare * 1000:.0f} ms. Budget: {args.budget_ms:.0f} ms on top of that.\n")
+    print(f"{'command':<22}{'best ms':>9}{'median ms':>11}{'over bare':>11}  heavy imports")
+    failed = False
+    for label, command in cases:
+        times = wall_times(command, args.runs)
+        overhead = (min(times) - bare) * 1000
+        loaded = heavy_imports(command)
+        over = overhead > args.budget_ms or bool(loaded)
+        failed = failed or over
+        print(f"{label:<22}{min(times) * 1000:>9.0f}{statistics.median(times) * 1000:>11.0f}{overhead:>11.0f}  "
+              f"{', '.join(sorted(loaded)) or '-'}{'  OVER BUDGET' if over else ''}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
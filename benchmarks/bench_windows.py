@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark: window_metrics.py over synthetic token-performance rows.
+
+Every wallet and window is first checked against a plain-Python filter-and-aggregate
+per window (what a separate START_DATE/END_DATE fetch returns), then the single pass
+is timed for the whole cohort with 1, W and 3W windows, to show how little each
+extra window adds once the rows are loaded.
+
+    python benchmarks/bench_windows.py --wallets 10000 --tokens 40 --windows 7d,30d,90d,all
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from window_metrics import Window, parse_windows, window_metrics
+
+AS_OF = 1_760_000_000
+
+
+def make_rows(wallets: int, tokens: int, seed: int = 3) -> List[Tuple[str, List[Dict]]]:
+    rng = random.Random(seed)
+    result = []
+    for w in range(wallets):
+        rows = []
+        for t in range(rng.randint(0, tokens)):
+            last = AS_OF - rng.randint(0, 180 * 86400)
+            rows.append({
+                "tokenAddress": f"Tok{t:05d}",
+                "netSolProfitLoss": rng.choice((0.0, round(rng.gauss(0, 5), 4))),
+                "totalSolSpent": round(rng.random() * 10, 4),
+                "totalSolReceived": round(rng.random() * 10, 4),
+                "transferCountIn": rng.randint(0, 6),
+                "transferCountOut": rng.randint(0, 6),
+                "firstTransferTimestamp": last - rng.randint(0, 30 * 86400),
+                "lastTransferTimestamp": last,
+            })
+        result.append((f"Wallet{w:06d}", rows))
+    return result
+
+
+def reference(rows: List[Dict], window: Window) -> Dict:
+    picked = [r for r in rows if (window.start is None or r["lastTransferTimestamp"] >= window.start)
+              and (window.end is None or r["lastTransferTimestamp"] <= window.end)]
+    non_zero = [r["netSolProfitLoss"] for r in picked if r["netSolProfitLoss"] != 0]
+    wins = sum(1 for pnl in non_zero if pnl > 0)
+    return {
+        "realized_pnl": round(sum(r["netSolProfitLoss"] for r in picked), 6),
+        "win_loss_count": f"{wins}/{len(non_zero)} wins",
+        "median_pl_token": round(statistics.median(non_zero), 2) if non_zero else 0,
+        "token_win_rate": round(wins / len(non_zero) * 100, 1) if non_zero else 0,
+        "trade_count": sum(r["transferCountIn"] + r["transferCountOut"] for r in picked),
+        "tokens_traded": len(picked),
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Multi-window PnL metrics on a synthetic cohort")
+    parser.add_argument("--wallets", type=int, default=10000, help="Wallets in the cohort")
+    parser.add_argument("--tokens", type=int, default=40, help="Most token rows per wallet")
+    parser.add_argument("--windows", default="7d,30d,90d,all", help="Windows to compute")
+    args = parser.parse_args(argv)
+
+    windows = parse_windows(args.windows, AS_OF)
+    sample = make_rows(300, args.tokens, seed=5)
+    metrics = window_metrics(sample, windows)
+    for wallet, rows in sample:
+        for window in windows:
+            expected = reference(rows, window)
+            got = {key: metrics[wallet][window.name][key] for key in expected}
+            # Floats may differ in the last rounded digit (np.round vs round on a .xx5 value)
+            if any(abs(got[k] - v) > 0.011 if isinstance(v, float) else got[k] != v for k, v in expected.items()):
+                raise SystemExit(f"Mismatch for {wallet} {window.name}:\n  reference {expected}\n  engine    {got}")
+    print(f"Matches the per-window reference for {len(sample)} wallets x {len(windows)} windows.\n")
+
+    cohort = make_rows(args.wallets, args.tokens)
+    rows = sum(len(r) for _, r in cohort)
+    print(f"{args.wallets} wallets, {rows} token rows (one token-performance fetch per wallet):")
+    for count in (1, len(windows), len(windows) * 3):
+        spec = ",".join(f"{7 * (i + 1)}d" for i in range(count))
+        started = time.perf_counter()
+        window_metrics(cohort, parse_windows(spec, AS_OF))
+        elapsed = time.perf_counter() - started
+        print(f"  {count:>3} windows  {elapsed:6.2f}s  ({elapsed / args.wallets * 1e6:.0f} µs per wallet)")
+
+if __name__ == "__main__":
+    main()
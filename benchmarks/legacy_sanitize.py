@@ -0,0 +1,225 @@
+"""
+The hand-written sanitize_* functions that field_mapping.py replaced, kept as the
+reference for bench_sanitize.py: outputs must match and timings are compared. timed()
+is the metrics decorator as it was, rebuilding the label key on every call.
+"""
+
+import time
+from functools import wraps
+from typing import Any, Dict
+
+from fetch_wallet_data_complete import TopN
+from metrics import FAST_BUCKETS, registry
+
+TOP_TOKENS = 5
+TOP_TOKENS_BY = "totalAmountIn"
+
+
+def timed(func):
+    name = func.__name__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            registry.observe("function_seconds", time.perf_counter() - started, FAST_BUCKETS, function=name)
+    return wrapper
+
+@timed
+def sanitize_summary(data: Dict) -> Dict:
+    return {
+        "status": data.get("status", "ok"),
+        "is_favorite": False,  # Not available in summary response
+        "total_pnl": data.get("latestPnl", 0.0),
+        "win_rate": data.get("tokenWinRate", 0.0),
+        "total_volume": 0.0,  # Not available in summary response
+        "days_active": data.get("daysActive", 0),
+        "last_active_timestamp": data.get("lastActiveTimestamp", 0),
+        "behavior_classification": data.get("behaviorClassification", "unknown"),
+        "classification": data.get("classification", "normal"),
+        "current_sol_balance": data.get("currentSolBalance"),
+        "current_usdc_balance": data.get("currentUsdcBalance"),
+        "balances_fetched_at": data.get("balancesFetchedAt")
+    }
+
+@timed
+def sanitize_pnl(data: Dict) -> Dict:
+    # The PNL overview returns { allTimeData: {...}, periodData: {...} }
+    # We want to use allTimeData for comprehensive analysis
+    pnl_data = data.get("allTimeData", {})
+    
+    return {
+        "realized_pnl": pnl_data.get("realizedPnl", 0.0),
+        "swap_win_rate": pnl_data.get("swapWinRate", 0.0),
+        "win_loss_count": pnl_data.get("winLossCount", "0/0 wins"),
+        "avg_pl_trade": pnl_data.get("avgPLTrade", 0.0),
+        "total_volume": pnl_data.get("totalVolume", 0.0),
+        "total_sol_spent": pnl_data.get("totalSolSpent", 0.0),
+        "total_sol_received": pnl_data.get("totalSolReceived", 0.0),
+        "median_pl_token": pnl_data.get("medianPLToken", 0.0),
+        "token_win_rate": pnl_data.get("tokenWinRate", 0.0),
+        "weighted_efficiency_score": pnl_data.get("weightedEfficiencyScore", 0.0),
+        "data_from": pnl_data.get("dataFrom", "N/A"),
+        "standard_deviation_pnl": pnl_data.get("standardDeviationPnl", 0.0),
+        "average_pnl_per_day": pnl_data.get("averagePnlPerDayActiveApprox", 0.0)
+    }
+
+@timed
+def sanitize_behavior_complete(data: Dict) -> Dict:
+    """COMPLETE behavior data extraction - includes ALL missing fields"""
+    return {
+        # Basic classification (already extracted)
+        "trading_style": data.get("tradingStyle"),
+        "confidence_score": data.get("confidenceScore"),
+        
+        # MISSING CRITICAL FIELDS - Now included
+        "buy_sell_ratio": data.get("buySellRatio"),
+        "buy_sell_symmetry": data.get("buySellSymmetry"),  # ⭐ KEY MISSING FIELD
+        "sequence_consistency": data.get("sequenceConsistency"),  # ⭐ KEY MISSING FIELD
+        "flipper_score": data.get("flipperScore"),
+        
+        # Timing analysis (MISSING)
+        "average_flip_duration_hours": data.get("averageFlipDurationHours"),  # ⭐ KEY
+        "median_hold_time": data.get("medianHoldTime"),  # ⭐ KEY
+        "percent_trades_under_1hour": data.get("percentTradesUnder1Hour"),  # ⭐ KEY
+        "percent_trades_under_4hours": data.get("percentTradesUnder4Hours"),  # ⭐ KEY
+        
+        # Trading time distribution (CRITICAL MISSING)
+        "trading_time_distribution": {
+            "ultra_fast": data.get("tradingTimeDistribution", {}).get("ultraFast", 0),  # ⭐ KEY
+            "very_fast": data.get("tradingTimeDistribution", {}).get("veryFast", 0),    # ⭐ KEY  
+            "fast": data.get("tradingTimeDistribution", {}).get("fast", 0),             # ⭐ KEY
+            "moderate": data.get("tradingTimeDistribution", {}).get("moderate", 0),
+            "day_trader": data.get("tradingTimeDistribution", {}).get("dayTrader", 0),
+            "swing": data.get("tradingTimeDistribution", {}).get("swing", 0),
+            "position": data.get("tradingTimeDistribution", {}).get("position", 0)
+        },
+        
+        # Token and trade analysis (MISSING)
+        "unique_tokens_traded": data.get("uniqueTokensTraded"),
+        "tokens_with_both_buy_and_sell": data.get("tokensWithBothBuyAndSell"),  # MISSING
+        "tokens_with_only_buys": data.get("tokensWithOnlyBuys"),  # MISSING
+        "tokens_with_only_sells": data.get("tokensWithOnlySells"),  # MISSING
+        "total_trade_count": data.get("totalTradeCount"),
+        "total_buy_count": data.get("totalBuyCount"),  # MISSING
+        "total_sell_count": data.get("totalSellCount"),  # MISSING
+        "complete_pairs_count": data.get("completePairsCount"),  # MISSING
+        "average_trades_per_token": data.get("averageTradesPerToken"),  # MISSING
+        
+        # Advanced behavioral metrics (MISSING)
+        "reentry_rate": data.get("reentryRate"),  # MISSING
+        "percentage_of_unpaired_tokens": data.get("percentageOfUnpairedTokens"),  # MISSING
+        
+        # Session analysis (MISSING)
+        "session_count": data.get("sessionCount"),  # MISSING
+        "avg_trades_per_session": data.get("avgTradesPerSession"),  # MISSING
+        "average_session_start_hour": data.get("averageSessionStartHour"),  # MISSING
+        "average_session_duration_minutes": data.get("averageSessionDurationMinutes"),  # MISSING
+        
+        # Current holdings analysis (MISSING) 
+        "average_current_holding_duration_hours": data.get("averageCurrentHoldingDurationHours"),  # MISSING
+        "median_current_holding_duration_hours": data.get("medianCurrentHoldingDurationHours"),  # MISSING
+        "weighted_average_holding_duration_hours": data.get("weightedAverageHoldingDurationHours"),  # MISSING
+        "percent_of_value_in_current_holdings": data.get("percentOfValueInCurrentHoldings"),
+        
+        # Active trading periods (MISSING)
+        "active_trading_periods": {
+            "hourly_trade_counts": data.get("activeTradingPeriods", {}).get("hourlyTradeCounts", {}),
+            "identified_windows": data.get("activeTradingPeriods", {}).get("identifiedWindows", []),
+            "activity_focus_score": data.get("activeTradingPeriods", {}).get("activityFocusScore", 0)
+        },
+        
+        # Existing fields (already extracted)
+        "trading_frequency": data.get("tradingFrequency"),
+        "token_preferences": data.get("tokenPreferences"),
+        "risk_metrics": data.get("riskMetrics"),
+        
+        # Timestamps (MISSING)
+        "first_transaction_timestamp": data.get("firstTransactionTimestamp"),  # MISSING
+        "last_transaction_timestamp": data.get("lastTransactionTimestamp")     # MISSING
+    }
+
+@timed
+def sanitize_token_performance_complete(data: Any) -> Any:
+    """COMPLETE token performance extraction - includes ALL missing fields"""
+    # Handle paginated response structure
+    if isinstance(data, dict) and "data" in data:
+        tokens = data.get("data", [])
+    elif isinstance(data, list):
+        tokens = data
+    else:
+        return []
+    
+    # Limit to top TOP_TOKENS tokens by TOP_TOKENS_BY (totalAmountIn by default) for LLM analysis
+    if not tokens:
+        return []
+    
+    top = TopN(TOP_TOKENS, TOP_TOKENS_BY)
+    for t in tokens:
+        top.push(t)
+    sorted_tokens = top.result()
+    return [
+        {
+            # Basic info (already extracted)
+            "token_address": t.get("tokenAddress"),
+            "name": t.get("name"),
+            "symbol": t.get("symbol"),
+            
+            # Trading volumes (already extracted)
+            "total_amount_in": t.get("totalAmountIn", 0.0),
+            "total_amount_out": t.get("totalAmountOut", 0.0),
+            "net_amount_change": t.get("netAmountChange", 0.0),
+            "total_sol_spent": t.get("totalSolSpent", 0.0),
+            "total_sol_received": t.get("totalSolReceived", 0.0),
+            "net_sol_profit_loss": t.get("netSolProfitLoss", 0.0),
+            
+            # MISSING: Trade frequency and timing
+            "transfer_count_in": t.get("transferCountIn", 0),   # MISSING
+            "transfer_count_out": t.get("transferCountOut", 0), # MISSING
+            "first_transfer_timestamp": t.get("firstTransferTimestamp"),  # MISSING
+            "last_transfer_timestamp": t.get("lastTransferTimestamp"),    # MISSING
+            
+            # MISSING: Separate realized vs unrealized PNL
+            "realized_pnl_sol": t.get("realizedPnlSol"),        # MISSING - critical
+            "unrealized_pnl_usd": t.get("unrealizedPnlUsd"),    # MISSING - critical
+            "unrealized_pnl_sol": t.get("unrealizedPnlSol"),    # MISSING
+            "total_pnl_sol": t.get("totalPnlSol"),              # MISSING
+            "realized_pnl_percentage": t.get("realizedPnlPercentage"),    # MISSING
+            "unrealized_pnl_percentage": t.get("unrealizedPnlPercentage"), # MISSING
+            
+            # Current holdings (already extracted)
+            "current_ui_balance": t.get("currentUiBalance"),
+            "current_holdings_value_usd": t.get("currentHoldingsValueUsd"),
+            "current_holdings_value_sol": t.get("currentHoldingsValueSol"),  # MISSING 
+            "price_usd": t.get("priceUsd"),
+            
+            # MISSING: Market data for context
+            "market_cap_usd": t.get("marketCapUsd"),          # MISSING
+            "liquidity_usd": t.get("liquidityUsd"),           # MISSING
+            "volume_24h": t.get("volume24h"),                 # MISSING
+            "fdv": t.get("fdv"),                              # MISSING
+            "pair_created_at": t.get("pairCreatedAt"),        # MISSING
+            
+            # Meta information
+            "image_url": t.get("imageUrl"),
+            "website_url": t.get("websiteUrl"),
+            "twitter_url": t.get("twitterUrl"),
+            "telegram_url": t.get("telegramUrl"),
+            "dexscreener_updated_at": t.get("dexscreenerUpdatedAt"),
+            "balance_fetched_at": t.get("balanceFetchedAt")
+        }
+        for t in sorted_tokens
+    ]
+
+
+def build_agent_input(wallet_address: str, summary: Dict, pnl: Dict, behavior: Dict, tokens: Any) -> Dict:
+    return {
+        "wallet_address": wallet_address,
+        "summary": sanitize_summary(summary),
+        "pnl_overview": sanitize_pnl(pnl),
+        "behavior": sanitize_behavior_complete(behavior),
+        "token_performance": sanitize_token_performance_complete(tokens),
+        "instruction": "Provide a comprehensive summary of this wallet's trading activity, performance, and any notable behavioral or risk patterns."
+    }
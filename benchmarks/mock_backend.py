@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the wallet backend and the chat-completions API, for benchmarks.
+
+Responses are rebuilt in the backend's camelCase shapes from the sanitized fixtures
+agent_input_gake.json and sample_agent_input.json (the sample is layered over the gake
+record so both profiles carry every field the formatter needs). Wallets alternate
+between the two profiles. Latency, error rate and token-performance size are configurable.
+
+    python benchmarks/mock_backend.py --port 8790 --latency-ms 50 --error-rate 0.01 --tokens 500
+
+Serves:
+    GET  /api/v1/wallets/{addr}/summary | pnl-overview | behavior-analysis | token-performance
+                                | classification | notes
+    POST /api/v1/analyses/wallets/status
+    POST /v1/chat/completions (plain and stream=True)
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+FIXTURES = ("agent_input_gake.json", "sample_agent_input.json")
+API_PREFIX = "/api/v1"
+LARGE_WALLET_PREFIX = "LARGE"
+
+# Sanitized field -> backend field where the sanitizers do not use a plain camelCase rename
+RENAMED_FIELDS = {
+    "total_pnl": "latestPnl",
+    "win_rate": "tokenWinRate",
+    "avg_pl_trade": "avgPLTrade",
+    "median_pl_token": "medianPLToken",
+    "average_pnl_per_day": "averagePnlPerDayActiveApprox",
+    "percent_trades_under_1hour": "percentTradesUnder1Hour",
+    "percent_trades_under_4hours": "percentTradesUnder4Hours",
+    "volume_24h": "volume24h",
+}
+# Sanitized behavior sub-objects whose own keys were renamed too
+NESTED_BEHAVIOR_FIELDS = ("trading_time_distribution", "active_trading_periods")
+
+
+def camel(name: str) -> str:
+    if name in RENAMED_FIELDS:
+        return RENAMED_FIELDS[name]
+    head, *rest = name.split("_")
+    return head + "".join(part[:1].upper() + part[1:] for part in rest)
+
+
+def camelize(section: Dict[str, Any]) -> Dict[str, Any]:
+    return {camel(key): value for key, value in section.items()}
+
+
+def raw_behavior(behavior: Dict[str, Any]) -> Dict[str, Any]:
+    raw = camelize(behavior)
+    for field in NESTED_BEHAVIOR_FIELDS:
+        if isinstance(behavior.get(field), dict):
+            raw[camel(field)] = camelize(behavior[field])
+    return raw
+
+
+def scalars(section: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in section.items() if not isinstance(value, (dict, list))}
+
+
+def load_profiles(root: Path = REPO_ROOT) -> List[Dict[str, Any]]:
+    """Backend-shaped responses for each fixture: summary, pnl, behavior and token rows."""
+    base = json.loads((root / FIXTURES[0]).read_text(encoding="utf-8"))
+    records = [base]
+    for name in FIXTURES[1:]:
+        overlay = json.loads((root / name).read_text(encoding="utf-8"))
+        merged = dict(base)
+        # Only scalar values are layered: the sample's nested objects use an older, partial shape
+        for section in ("summary", "pnl_overview", "behavior"):
+            merged[section] = {**base[section], **scalars(overlay.get(section, {}))}
+        tokens = overlay.get("token_performance") or []
+        merged["token_performance"] = [{**base["token_performance"][i % len(base["token_performance"])], **scalars(token)}
+                                       for i, token in enumerate(tokens)] or base["token_performance"]
+        records.append(merged)
+    return [{
+        "summary": camelize(record["summary"]),
+        "pnl": {"allTimeData": camelize(record["pnl_overview"])},
+        "behavior": raw_behavior(record["behavior"]),
+        "tokens": [camelize(token) for token in record["token_performance"]],
+    } for record in records]
+
+
+def token_rows(template: List[Dict[str, Any]], count: int, wallet: str) -> List[Dict[str, Any]]:
+    """count token rows cycled from the fixture tokens, with distinct addresses and varied amounts."""
+    rows = []
+    for i in range(count):
+        row = dict(template[i % len(template)])
+        row["tokenAddress"] = f"{wallet[:6]}Tok{i:06d}"
+        row["totalAmountIn"] = float((row.get("totalAmountIn") or 1.0) * ((i * 7919) % 997 + 1) / 500)
+        rows.append(row)
+    rows.sort(key=lambda r: r["tokenAddress"])
+    return rows
+
+
+class MockConfig:
+    def __init__(self, latency_ms: float = 20.0, jitter_ms: float = 10.0, error_rate: float = 0.0, tokens: int = 50,
+                 llm_latency_ms: float = 300.0, llm_chunks: int = 40, large_tokens: int = 5000):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.tokens = tokens
+        self.large_tokens = large_tokens  # for wallets whose address starts with LARGE_WALLET_PREFIX
+        self.llm_latency_ms = llm_latency_ms
+        self.llm_chunks = llm_chunks
+        self.profiles = load_profiles()
+        self._token_pages: Dict[str, List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.bytes_sent = 0  # response bodies
+
+    def delay(self, base_ms: Optional[float] = None) -> None:
+        base = self.latency_ms if base_ms is None else base_ms
+        time.sleep(max(base + random.uniform(-self.jitter_ms, self.jitter_ms), 0) / 1000)
+
+    def profile(self, wallet: str) -> Dict[str, Any]:
+        return self.profiles[sum(wallet.encode()) % len(self.profiles)]
+
+    def tokens_for(self, wallet: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            if wallet not in self._token_pages:
+                if len(self._token_pages) > 1000:
+                    self._token_pages.clear()
+                count = self.large_tokens if wallet.startswith(LARGE_WALLET_PREFIX) else self.tokens
+                self._token_pages[wallet] = token_rows(self.profile(wallet)["tokens"], count, wallet)
+            return self._token_pages[wallet]
+
+
+def make_handler(config: MockConfig):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out as separate writes; with Nagle on, the body waits for the
+        # client's delayed ACK of the headers (~40 ms per response)
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, body: Any, status: int = 200, headers: Optional[Dict[str, str]] = None) -> None:
+            payload = json.dumps(body).encode("utf-8")
+            config.bytes_sent += len(payload)
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _maybe_fail(self) -> bool:
+            if config.error_rate and random.random() < config.error_rate:
+                self._send({"message": "mock overload"}, 503, {"Retry-After": "0"})
+                return True
+            return False
+
+        def do_GET(self):
+            config.requests += 1
+            url = urlparse(self.path)
+            parts = url.path[len(API_PREFIX):].strip("/").split("/") if url.path.startswith(API_PREFIX) else []
+            if len(parts) != 3 or parts[0] != "wallets":
+                return self._send({"message": "not found"}, 404)
+            config.delay()
+            if self._maybe_fail():
+                return
+            wallet, endpoint = parts[1], parts[2]
+            profile = config.profile(wallet)
+            if endpoint == "summary":
+                return self._send(profile["summary"])
+            if endpoint == "pnl-overview":
+                return self._send(profile["pnl"])
+            if endpoint == "behavior-analysis":
+                return self._send(profile["behavior"])
+            if endpoint == "token-performance":
+                query = parse_qs(url.query)
+                page = int(query.get("page", ["1"])[0])
+                page_size = int(query.get("pageSize", ["20"])[0])
+                rows = config.tokens_for(wallet)
+                sort_by = query.get("sortBy", ["tokenAddress"])[0]
+                if sort_by != "tokenAddress":
+                    rows = sorted(rows, key=lambda r: r.get(sort_by) or 0,
+                                  reverse=query.get("sortOrder", ["DESC"])[0] == "DESC")
+                return self._send({"data": rows[(page - 1) * page_size:page * page_size], "total": len(rows),
+                                   "page": page, "pageSize": page_size,
+                                   "totalPages": (len(rows) + page_size - 1) // page_size})
+            if endpoint == "classification":
+                return self._send({"walletAddress": wallet, "classification": "normal",
+                                   "smartFetch": {"shouldLimitFetch": False, "maxSignatures": None,
+                                                  "reason": "Normal activity", "cacheHours": 24},
+                                   "message": "Normal transaction analysis applied."})
+            if endpoint == "notes":
+                return self._send([{"id": f"note-{wallet[:6]}", "walletAddress": wallet,
+                                    "content": "Mock note", "createdAt": "2025-01-01T00:00:00.000Z"}])
+            return self._send({"message": "not found"}, 404)
+
+        def do_POST(self):
+            config.requests += 1
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            path = urlparse(self.path).path
+            if path == f"{API_PREFIX}/analyses/wallets/status":
+                config.delay()
+                return self._send({"statuses": [{"walletAddress": w, "status": "READY"} for w in body.get("walletAddresses", [])]})
+            if path.endswith("/chat/completions"):
+                return self._chat(body)
+            return self._send({"message": "not found"}, 404)
+
+        def _chat(self, body: Dict[str, Any]) -> None:
+            if self._maybe_fail():
+                return
+            prompt_chars = sum(len(str(m.get("content", ""))) for m in body.get("messages", []))
+            content = "## Mock analysis\n\n" + " ".join(f"insight-{i}" for i in range(config.llm_chunks * 3))
+            usage = {"prompt_tokens": prompt_chars // 4, "completion_tokens": len(content) // 4,
+                     "total_tokens": prompt_chars // 4 + len(content) // 4,
+                     "prompt_tokens_details": {"cached_tokens": 0}}
+            if not body.get("stream"):
+                config.delay(config.llm_latency_ms)
+                return self._send({"id": "mock", "object": "chat.completion", "created": int(time.time()),
+                                   "model": body.get("model"), "usage": usage,
+                                   "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                                                "finish_reason": "stop"}]})
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def event(data: Dict[str, Any]) -> None:
+                payload = f"data: {json.dumps(data)}\n\n".encode("utf-8")
+                self.wfile.write(f"{len(payload):x}\r\n".encode() + payload + b"\r\n")
+                self.wfile.flush()
+
+            step = max(len(content) // config.llm_chunks, 1)
+            for i in range(0, len(content), step):
+                time.sleep(config.llm_latency_ms / 1000 / config.llm_chunks)
+                event({"id": "mock", "object": "chat.completion.chunk", "model": body.get("model"),
+                       "choices": [{"index": 0, "delta": {"content": content[i:i + step]}, "finish_reason": None}]})
+            event({"id": "mock", "object": "chat.completion.chunk", "model": body.get("model"), "choices": [], "usage": usage})
+            done = b"data: [DONE]\n\n"
+            self.wfile.write(f"{len(done):x}\r\n".encode() + done + b"\r\n0\r\n\r\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+class MockServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 makes extra concurrent connects wait ~1s for a SYN
+    # retry, which the benchmarks would then report as backend latency
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+def serve(port: int, config: MockConfig) -> ThreadingHTTPServer:
+    return MockServer(("127.0.0.1", port), make_handler(config))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Mock wallet backend + chat-completions endpoint for benchmarks")
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Base latency of backend endpoints")
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--tokens", type=int, default=50, help="Token-performance rows per wallet")
+    parser.add_argument("--large-tokens", type=int, default=5000,
+                        help=f"Token-performance rows for wallets starting with {LARGE_WALLET_PREFIX}")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    args = parser.parse_args(argv)
+
+    config = MockConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.tokens, args.llm_latency_ms,
+                        large_tokens=args.large_tokens)
+    server = serve(args.port, config)
+    print(f"Mock backend on http://127.0.0.1:{args.port}{API_PREFIX} (chat at http://127.0.0.1:{args.port}/v1)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
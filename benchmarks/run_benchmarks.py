@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmarks against the local mock backend (benchmarks/mock_backend.py).
+
+Starts the mock in-process, then runs each scenario in its own Python subprocess so that
+peak RSS is measured per scenario:
+
+    single     one wallet at a time: fetch -> sanitize -> format -> llm -> persist, N iterations
+    batch      many wallets through the staged pipeline (wallet_pipeline.Pipeline)
+    paginated  full token-performance walks over wallets with thousands of rows
+
+Reports wallets/sec, p50/p95/p99 latency per stage and peak RSS, writes them to JSON, and
+with --baseline prints the change against an earlier results file.
+
+    python benchmarks/run_benchmarks.py --wallets 200 --latency-ms 30 --output bench_results.json
+    python benchmarks/run_benchmarks.py --baseline bench_results.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(BENCH_DIR))
+
+from mock_backend import API_PREFIX, LARGE_WALLET_PREFIX, MockConfig, serve
+
+SCENARIOS = ("single", "batch", "paginated")
+STAGES = ("fetch", "sanitize", "format", "llm", "persist")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def summarize(samples: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+    return {stage: {"count": len(values),
+                    "p50_ms": percentile(values, 50) * 1000,
+                    "p95_ms": percentile(values, 95) * 1000,
+                    "p99_ms": percentile(values, 99) * 1000}
+            for stage, values in samples.items() if values}
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# --- Scenarios (run inside the child process) ---
+class StageTimer:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+
+    def wrap(self, stage: str, handler):
+        """Handler that records its own duration; works for plain and async handlers."""
+        if asyncio.iscoroutinefunction(handler):
+            async def timed(item):
+                started = time.perf_counter()
+                try:
+                    return await handler(item)
+                finally:
+                    self.samples[stage].append(time.perf_counter() - started)
+        else:
+            def timed(item):
+                started = time.perf_counter()
+                try:
+                    return handler(item)
+                finally:
+                    self.samples[stage].append(time.perf_counter() - started)
+        return timed
+
+
+def stage_handlers(client, async_openai, smart_prompt: str, out) -> Dict[str, Any]:
+    """The pipeline's stage functions, built from the same helpers wallet_pipeline uses."""
+    from fetch_wallet_data_complete import API_KEY, build_agent_input, fetch_wallet_sections, missing_section
+    from run_smart_analysis import LLM_PARAMS, MODEL, build_messages
+
+    async def fetch(address):
+        sections = await fetch_wallet_sections(address, API_KEY, {}, client)
+        return None if missing_section(*sections) else (address, sections)
+
+    def sanitize(fetched):
+        address, (summary, pnl, behavior, tokens) = fetched
+        return build_agent_input(address, summary, pnl, behavior, tokens)
+
+    def format_prompt(agent_input):
+        return agent_input, build_messages(smart_prompt, agent_input)
+
+    async def llm(formatted):
+        agent_input, messages = formatted
+        response = await async_openai.chat.completions.create(model=MODEL, messages=messages, **LLM_PARAMS)
+        return agent_input, response.choices[0].message.content
+
+    def persist(analyzed):
+        agent_input, analysis = analyzed
+        out.write(json.dumps({"agent_input": agent_input, "analysis": analysis}) + "\n")
+        return agent_input["wallet_address"]
+
+    return {"fetch": fetch, "sanitize": sanitize, "format": format_prompt, "llm": llm, "persist": persist}
+
+
+async def scenario_single(args, timer: StageTimer) -> int:
+    from openai import AsyncOpenAI
+    from api_client import AsyncWalletApiClient
+    from fetch_wallet_data_complete import API_BASE_URL, API_KEY
+    from run_smart_analysis import load_smart_prompt
+
+    async_openai = AsyncOpenAI(max_retries=3)  # the mock's error rate applies to chat calls too
+    with tempfile.TemporaryFile("w+", encoding="utf-8") as out:
+        async with AsyncWalletApiClient(API_BASE_URL, API_KEY) as client:
+            handlers = {stage: timer.wrap(stage, h)
+                        for stage, h in stage_handlers(client, async_openai, load_smart_prompt(), out).items()}
+            done = 0
+            for i in range(args.iterations):
+                item: Any = f"BenchSingle{i:05d}"
+                try:
+                    for stage in STAGES:
+                        item = handlers[stage](item)
+                        if asyncio.iscoroutine(item):
+                            item = await item
+                        if item is None:
+                            break
+                    else:
+                        done += 1
+                except Exception as e:
+                    print(f"Wallet {i} failed in {stage}: {e}", file=sys.stderr)
+    return done
+
+
+async def scenario_batch(args, timer: StageTimer) -> int:
+    from openai import AsyncOpenAI
+    from api_client import AsyncWalletApiClient
+    from fetch_wallet_data_complete import API_BASE_URL, API_KEY
+    from run_smart_analysis import load_smart_prompt
+    from wallet_pipeline import Pipeline, Stage
+
+    async_openai = AsyncOpenAI(max_retries=3)  # the mock's error rate applies to chat calls too
+    concurrency = {"fetch": args.fetch_concurrency, "llm": args.llm_concurrency}
+    with tempfile.TemporaryFile("w+", encoding="utf-8") as out:
+        async with AsyncWalletApiClient(API_BASE_URL, API_KEY, pool_size=args.fetch_concurrency * 4) as client:
+            handlers = stage_handlers(client, async_openai, load_smart_prompt(), out)
+            pipeline = Pipeline([Stage(stage, timer.wrap(stage, handlers[stage]), concurrency.get(stage, 1))
+                                 for stage in STAGES], report_interval=0)
+            stats = await pipeline.run(f"BenchBatch{i:05d}" for i in range(args.wallets))
+    return stats[-1].processed
+
+
+async def scenario_paginated(args, timer: StageTimer) -> int:
+    from api_client import AsyncWalletApiClient
+    from fetch_wallet_data_complete import API_BASE_URL, API_KEY, fetch_top_tokens, sanitize_token_performance_complete
+
+    done = 0
+    async with AsyncWalletApiClient(API_BASE_URL, API_KEY) as client:
+        for i in range(args.paginated_wallets):
+            started = time.perf_counter()
+            tokens = await fetch_top_tokens(client, f"{LARGE_WALLET_PREFIX}Bench{i:04d}")
+            timer.samples["fetch"].append(time.perf_counter() - started)
+            if tokens is None:
+                continue
+            started = time.perf_counter()
+            sanitize_token_performance_complete(tokens)
+            timer.samples["sanitize"].append(time.perf_counter() - started)
+            done += 1
+    return done
+
+
+def run_scenario(name: str, args) -> Dict[str, Any]:
+    timer = StageTimer()
+    runner = {"single": scenario_single, "batch": scenario_batch, "paginated": scenario_paginated}[name]
+    started = time.perf_counter()
+    wallets = asyncio.run(runner(args, timer))
+    elapsed = time.perf_counter() - started
+    return {
+        "scenario": name,
+        "wallets": wallets,
+        "elapsed_s": elapsed,
+        "wallets_per_sec": wallets / elapsed if elapsed else 0.0,
+        "stages": summarize(timer.samples),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+# --- Parent: mock server, subprocesses, report ---
+def child_env(port: int) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "API_BASE_URL": f"http://127.0.0.1:{port}{API_PREFIX}",
+        "API_KEY": "bench",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{port}/v1",
+        "OPENAI_API_KEY": "bench",
+        # Measure the work itself, not the local caches
+        "RESPONSE_CACHE_DISABLED": "1",
+        "LLM_CACHE_DISABLED": "1",
+        "RESULTS_STORE_DISABLED": "1",
+    })
+    return env
+
+
+def spawn(name: str, args, port: int) -> Dict[str, Any]:
+    command = [sys.executable, str(Path(__file__).resolve()), "--run-scenario", name,
+               "--iterations", str(args.iterations), "--wallets", str(args.wallets),
+               "--paginated-wallets", str(args.paginated_wallets),
+               "--fetch-concurrency", str(args.fetch_concurrency), "--llm-concurrency", str(args.llm_concurrency)]
+    proc = subprocess.run(command, cwd=REPO_ROOT, env=child_env(port), capture_output=True, text=True)
+    result_lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+    if proc.returncode != 0 or not result_lines:
+        print(proc.stdout[-2000:])
+        print(proc.stderr[-2000:])
+        raise RuntimeError(f"Scenario {name} failed (exit {proc.returncode})")
+    return json.loads(result_lines[-1])
+
+
+def format_result(result: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> str:
+    def change(current: float, previous: Optional[float]) -> str:
+        if not previous:
+            return ""
+        return f" ({(current - previous) / previous:+.0%})"
+
+    rss = result["peak_rss_mb"]
+    base_rss = baseline.get("peak_rss_mb") if baseline else None
+    lines = [f"[{result['scenario']}] {result['wallets']} wallets in {result['elapsed_s']:.2f}s = "
+             f"{result['wallets_per_sec']:.2f} wallets/s{change(result['wallets_per_sec'], baseline and baseline['wallets_per_sec'])}"
+             + (f" | peak RSS {rss:.1f} MB{change(rss, base_rss)}" if rss is not None else "")]
+    for stage, numbers in result["stages"].items():
+        previous = (baseline or {}).get("stages", {}).get(stage, {})
+        lines.append(f"    {stage:<9} n={numbers['count']:<5} p50 {numbers['p50_ms']:8.1f}ms{change(numbers['p50_ms'], previous.get('p50_ms'))}"
+                     f"  p95 {numbers['p95_ms']:8.1f}ms{change(numbers['p95_ms'], previous.get('p95_ms'))}"
+                     f"  p99 {numbers['p99_ms']:8.1f}ms{change(numbers['p99_ms'], previous.get('p99_ms'))}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the fetch/analysis pipeline against a local mock backend")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--iterations", type=int, default=20, help="Wallets in the single-wallet scenario")
+    parser.add_argument("--wallets", type=int, default=200, help="Wallets in the batch scenario")
+    parser.add_argument("--paginated-wallets", type=int, default=5)
+    parser.add_argument("--fetch-concurrency", type=int, default=8)
+    parser.add_argument("--llm-concurrency", type=int, default=16)
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--tokens", type=int, default=50, help="Token-performance rows per wallet")
+    parser.add_argument("--large-tokens", type=int, default=5000, help="Rows per wallet in the paginated scenario")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--run-scenario", choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_scenario:
+        print(json.dumps(run_scenario(args.run_scenario, args)))
+        return
+
+    config = MockConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.tokens, args.llm_latency_ms,
+                        large_tokens=args.large_tokens)
+    server = serve(args.port, config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Mock backend on port {args.port}: latency {args.latency_ms}±{args.jitter_ms}ms, "
+          f"error rate {args.error_rate:.1%}, {args.tokens} tokens/wallet, LLM {args.llm_latency_ms}ms")
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = {r["scenario"]: r for r in json.load(f)["results"]}
+
+    results = []
+    try:
+        for name in args.scenarios:
+            result = spawn(name, args, args.port)
+            results.append(result)
+            print(format_result(result, baseline.get(name)))
+    finally:
+        server.shutdown()
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"config": {k: v for k, v in vars(args).items() if k not in ("run_scenario", "baseline")},
+                   "results": results}, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
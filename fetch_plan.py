@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Template-driven fetch planning: fetch only the endpoints and fields a prompt reads.
+
+Each prompt formatter is declared here as a PromptTemplate listing, per agent_input
+section, the sanitized fields it uses and how many token-performance rows it shows.
+plan_fetch() merges one or more templates into a FetchPlan:
+
+    sections      endpoints to call; a section no template reads is never requested,
+                  e.g. no /token-performance for a prompt without token rows
+    token pages   token rows are ranked by TOP_TOKENS_BY, as in the complete fetch; when
+                  that is one of the backend's sortBy fields (the default, totalSolSpent)
+                  the top rows come from a single page sorted server-side, otherwise every
+                  page is walked and the top rows picked locally
+    sanitizers    field_mapping subsets, so records carry only the planned fields
+
+    python fetch_plan.py smart prescreen                  # show a plan
+    python fetch_plan.py smart --check agent_input.json   # formatter reads only declared fields
+    python fetch_plan.py smart --verify WALLET            # planned fetch == complete fetch, per field
+    python fetch_wallet_data_complete.py --batch wallets.txt --template prescreen
+"""
+
+import argparse
+import functools
+import importlib
+import json
+import os
+import sys
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from field_mapping import BEHAVIOR, PNL, SUMMARY, TOKEN, Section
+from prescreen import required_fields
+
+# Load environment variables from .env file
+load_dotenv()
+
+# --- Configuration ---
+# Same settings as fetch_wallet_data_complete.py: a plan must pick the rows the complete fetch would
+TOP_TOKENS = int(os.getenv("TOP_TOKENS", "5"))
+TOP_TOKENS_BY = os.getenv("TOP_TOKENS_BY", "totalSolSpent")
+
+# agent_input section -> field_mapping section and endpoint, in fetch order
+SECTIONS: Dict[str, Section] = {
+    "summary": SUMMARY,
+    "pnl_overview": PNL,
+    "behavior": BEHAVIOR,
+    "token_performance": TOKEN,
+}
+ENDPOINTS = {
+    "summary": "summary",
+    "pnl_overview": "pnl-overview",
+    "behavior": "behavior-analysis",
+    "token_performance": "token-performance",
+}
+# TokenPerformanceSortBy in the backend's token-performance-query.dto.ts
+BACKEND_SORT_FIELDS = frozenset({
+    "tokenAddress", "netSolProfitLoss", "totalPnlSol", "unrealizedPnlSol", "roi", "totalSolSpent",
+    "totalSolReceived", "currentUiBalance", "currentSolValue", "netAmountChange", "lastTransferTimestamp",
+})
+# Template name -> "module:function" of its formatter, for --check
+FORMATTERS = {
+    "smart": "run_smart_analysis:format_wallet_data_for_analysis",
+}
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    name: str
+    description: str
+    fields: Tuple[Tuple[str, Tuple[str, ...]], ...]  # (section, sanitized field names)
+    top_tokens: int = 0  # token_performance rows the prompt shows
+
+
+TEMPLATES: Dict[str, PromptTemplate] = {}
+
+
+def declare(name: str, description: str, fields: Dict[str, Iterable[str]], top_tokens: int = 0) -> PromptTemplate:
+    """Register a template; unknown sections or field names raise ValueError here, not mid-batch."""
+    declared = []
+    for section, names in fields.items():
+        if section not in SECTIONS:
+            raise ValueError(f"Template {name!r}: unknown section {section!r}")
+        SECTIONS[section].only(*names)  # validates the names
+        declared.append((section, tuple(names)))
+    if top_tokens and "token_performance" not in fields:
+        raise ValueError(f"Template {name!r} shows {top_tokens} token rows but declares no token_performance fields")
+    template = PromptTemplate(name, description, tuple(declared), top_tokens)
+    TEMPLATES[name] = template
+    return template
+
+
+# --- Templates ---
+declare("smart", "run_smart_analysis.py: format_wallet_data_for_analysis()", {
+    "summary": ("status", "current_sol_balance"),
+    "pnl_overview": ("data_from", "realized_pnl", "win_loss_count", "swap_win_rate", "total_volume", "total_sol_spent",
+                     "total_sol_received", "avg_pl_trade", "median_pl_token", "weighted_efficiency_score",
+                     "standard_deviation_pnl"),
+    "behavior": ("trading_style", "confidence_score", "buy_sell_ratio", "buy_sell_symmetry", "flipper_score",
+                 "trading_time_distribution", "unique_tokens_traded", "tokens_with_both_buy_and_sell",
+                 "tokens_with_only_buys", "total_trade_count", "complete_pairs_count", "average_flip_duration_hours",
+                 "median_hold_time", "percent_trades_under_1hour", "percent_of_value_in_current_holdings",
+                 "session_count", "avg_trades_per_session", "trading_frequency", "average_session_start_hour",
+                 "active_trading_periods", "risk_metrics", "token_preferences"),
+    "token_performance": ("name", "symbol", "market_cap_usd", "liquidity_usd", "total_sol_spent", "total_sol_received",
+                          "realized_pnl_sol", "realized_pnl_percentage", "current_ui_balance",
+                          "current_holdings_value_usd", "unrealized_pnl_usd", "unrealized_pnl_percentage",
+                          "transfer_count_in", "transfer_count_out", "first_transfer_timestamp",
+                          "last_transfer_timestamp", "website_url", "twitter_url", "telegram_url"),
+}, top_tokens=TOP_TOKENS)
+
+declare("notebook", "notebook/updated_analysis_cell.py: format_wallet_data()", {
+    "summary": ("total_pnl", "win_rate", "days_active", "behavior_classification", "classification"),
+    "pnl_overview": ("realized_pnl", "win_loss_count", "avg_pl_trade", "median_pl_token", "total_volume",
+                     "weighted_efficiency_score", "standard_deviation_pnl", "data_from"),
+    "behavior": ("trading_style", "confidence_score", "buy_sell_ratio", "flipper_score", "unique_tokens_traded",
+                 "total_trade_count", "trading_frequency", "percent_of_value_in_current_holdings", "risk_metrics",
+                 "token_preferences"),
+    "token_performance": ("name", "symbol", "token_address", "net_sol_profit_loss", "current_ui_balance",
+                          "current_holdings_value_usd", "realized_pnl_sol", "unrealized_pnl_usd", "price_usd"),
+}, top_tokens=3)
+
+declare("prescreen", "prescreen.py: the rules and the templated report", required_fields())
+
+# Whole sections: prompts that embed the agent_input JSON as-is (prompt_eval.py, the ReAct agent's context)
+declare("full", "every field of every section (the fetch without a template)", {
+    section: tuple(field.name for field in spec.fields) for section, spec in SECTIONS.items()
+}, top_tokens=TOP_TOKENS)
+
+
+@dataclass(frozen=True)
+class FetchPlan:
+    name: str
+    fields: Tuple[Tuple[str, Tuple[str, ...]], ...]  # (section, field names in spec order), fetch order
+    top_tokens: int = 0
+    token_rank: str = TOP_TOKENS_BY  # raw field the top token rows are picked by
+    token_sort: Optional[str] = None  # backend sortBy for a one-page top-n fetch; None walks every page
+
+    @property
+    def walks_every_page(self) -> bool:
+        return "token_performance" in self.sections and not self.token_sort
+
+    @property
+    def sections(self) -> Tuple[str, ...]:
+        return tuple(section for section, _ in self.fields)
+
+    def endpoints(self, wallet_address: str = "{wallet}") -> List[str]:
+        return [f"/wallets/{wallet_address}/{ENDPOINTS[section]}" for section in self.sections]
+
+    def sanitizer(self, section: str) -> Section:
+        return _subset(section, dict(self.fields)[section])
+
+    def requests(self, token_rows: int, page_size: int) -> int:
+        """Backend requests per wallet, for a wallet with token_rows token-performance rows."""
+        count = len(self.sections)
+        if self.walks_every_page:
+            count += max((token_rows + page_size - 1) // page_size, 1) - 1
+        return count
+
+    def describe(self) -> str:
+        lines = [f"Fetch plan for {self.name}:"]
+        for section, names in self.fields:
+            total = len(SECTIONS[section].fields)
+            lines.append(f"  /{ENDPOINTS[section]:<18} {len(names):>2}/{total} fields")
+        skipped = [f"/{ENDPOINTS[section]}" for section in SECTIONS if section not in self.sections]
+        if skipped:
+            lines.append(f"  skipped: {', '.join(skipped)}")
+        if "token_performance" in self.sections:
+            pages = (f"one page sorted by {self.token_sort} DESC" if self.token_sort
+                     else f"every page, top rows by {self.token_rank} picked locally")
+            lines.append(f"  token rows: top {self.top_tokens}, {pages}")
+        if self.walks_every_page:
+            lines.append(f"  ⚠️  {self.token_rank} is not a backend sortBy field: every token page is still "
+                         f"fetched, as without a plan")
+        return "\n".join(lines)
+
+
+@functools.lru_cache(maxsize=None)
+def _subset(section: str, names: Tuple[str, ...]) -> Section:
+    return SECTIONS[section].only(*names)
+
+
+def get_template(name: str) -> PromptTemplate:
+    if name not in TEMPLATES:
+        raise ValueError(f"Unknown prompt template {name!r} (known: {', '.join(TEMPLATES)})")
+    return TEMPLATES[name]
+
+
+def plan_fetch(*templates: PromptTemplate, sort_by: str = TOP_TOKENS_BY) -> FetchPlan:
+    """Smallest fetch that serves every template: union of their fields, the most token rows any shows.
+
+    sort_by must be the complete fetch's ranking for the records to match; other values are for benchmarks.
+    """
+    wanted: Dict[str, set] = {}
+    for template in templates:
+        for section, names in template.fields:
+            wanted.setdefault(section, set()).update(names)
+    top_tokens = max((template.top_tokens for template in templates), default=0)
+    if not top_tokens:
+        wanted.pop("token_performance", None)
+    fields = tuple(
+        (section, tuple(field.name for field in spec.fields if field.name in wanted[section]))
+        for section, spec in SECTIONS.items() if section in wanted
+    )
+    token_sort = sort_by if top_tokens and sort_by in BACKEND_SORT_FIELDS else None
+    return FetchPlan("+".join(template.name for template in templates), fields, top_tokens, sort_by, token_sort)
+
+
+def plan_for(names: str) -> FetchPlan:
+    """Plan for a comma-separated list of template names, as given on the command line."""
+    return plan_fetch(*(get_template(name.strip()) for name in names.split(",") if name.strip()))
+
+
+def restrict(agent_input: Dict, plan: FetchPlan) -> Dict:
+    """agent_input cut down to what the plan would have fetched (the top-level keys outside sections stay)."""
+    planned = dict(plan.fields)
+    record = {key: value for key, value in agent_input.items() if key not in SECTIONS}
+    for section, names in planned.items():
+        value = agent_input.get(section)
+        if section == "token_performance":
+            record[section] = [{name: row.get(name) for name in names} for row in (value or [])[:plan.top_tokens]]
+        elif isinstance(value, dict):
+            record[section] = {name: value.get(name) for name in names}
+    return record
+
+
+def load_formatter(template: PromptTemplate) -> Callable[[Dict], str]:
+    if template.name not in FORMATTERS:
+        raise ValueError(f"No importable formatter for template {template.name!r}")
+    module, function = FORMATTERS[template.name].split(":")
+    return getattr(importlib.import_module(module), function)
+
+
+def check_template(template: PromptTemplate, agent_input: Dict) -> Optional[str]:
+    """None if the formatter renders the same text from the restricted record, else what went wrong.
+
+    A formatter reading a field its template does not declare fails with a KeyError here,
+    instead of in production on a record fetched with the plan.
+    """
+    formatter = load_formatter(template)
+    try:
+        expected = formatter(agent_input)
+    except (KeyError, TypeError, IndexError) as e:
+        return f"formatter fails on the complete record too ({type(e).__name__}: {e})"
+    try:
+        restricted = formatter(restrict(agent_input, plan_fetch(template)))
+    except (KeyError, TypeError, IndexError) as e:
+        return f"{type(e).__name__}: {e} (field not declared in template {template.name!r}?)"
+    if restricted != expected:
+        return f"output differs when only the fields of template {template.name!r} are present"
+    return None
+
+
+def compare_records(plan: FetchPlan, complete_record: Dict, planned_record: Dict) -> List[str]:
+    """The plan's fields whose values differ between a complete agent_input and a planned one.
+
+    check_template() proves a formatter reads only its declared fields; this proves the plan
+    fetches the same values for them, token rows included (same rows, same order).
+    """
+    expected = restrict(complete_record, plan)
+    problems = []
+    for section, names in plan.fields:
+        want, got = expected.get(section), planned_record.get(section)
+        if section == "token_performance":
+            want, got = want or [], got or []
+            if len(want) != len(got):
+                problems.append(f"token_performance: {len(got)} rows planned, {len(want)} in the complete fetch")
+                continue
+            rows = [(f"token_performance[{i}]", a, b) for i, (a, b) in enumerate(zip(want, got))]
+        else:
+            rows = [(section, want or {}, got or {})]
+        for label, a, b in rows:
+            problems += [f"{label}.{name}: planned {b.get(name)!r}, complete {a.get(name)!r}"
+                         for name in names if a.get(name) != b.get(name)]
+    return problems
+
+
+def verify_plan(plan: FetchPlan, wallet_address: str, params: Optional[Dict] = None) -> List[str]:
+    """Fetch one wallet from the backend with and without the plan (no response cache) and compare_records()."""
+    import asyncio
+
+    import fetch_wallet_data_complete as complete
+    from api_client import AsyncWalletApiClient
+
+    async def fetch_both():
+        async with AsyncWalletApiClient(complete.API_BASE_URL, complete.API_KEY) as client:
+            full = await complete.fetch_wallet_sections(wallet_address, params=params, client=client)
+            planned = await complete.fetch_wallet_sections(wallet_address, params=params, client=client, plan=plan)
+        return full, planned
+
+    full, planned = asyncio.run(fetch_both())
+    failed = complete.missing_section(*full) or complete.missing_section(*planned, plan.sections)
+    if failed:
+        return [f"could not fetch {failed} for {wallet_address}"]
+    return compare_records(plan,
+                           complete.build_agent_input(wallet_address, *full, params, validate=False),
+                           complete.build_agent_input(wallet_address, *planned, params, validate=False, plan=plan))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Show the minimal fetch for one or more prompt templates")
+    parser.add_argument("templates", nargs="*", default=["full"], help=f"Template names: {', '.join(TEMPLATES)}")
+    parser.add_argument("--check", metavar="FILE",
+                        help="agent_input JSON to render each template's formatter with only its declared fields")
+    parser.add_argument("--verify", nargs="+", metavar="WALLET",
+                        help="Fetch these wallets with and without the plan and compare the planned fields")
+    args = parser.parse_args(argv)
+
+    try:
+        templates = [get_template(name) for name in args.templates]
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    for template in templates:
+        print(f"{template.name:<10} {template.description}")
+    print(plan_fetch(*templates).describe())
+    if args.check:
+        with open(args.check, "r", encoding="utf-8") as f:
+            agent_input = json.load(f)
+        failed = False
+        for template in templates:
+            if template.name not in FORMATTERS:
+                continue
+            problem = check_template(template, agent_input)
+            print(f"{'❌' if problem else '✅'} {template.name}: {problem or 'formatter reads only declared fields'}")
+            failed = failed or bool(problem)
+        if failed:
+            sys.exit(1)
+    if args.verify:
+        import fetch_wallet_data_complete as complete
+
+        params = {"startDate": complete.START_DATE, "endDate": complete.END_DATE} if complete.START_DATE and complete.END_DATE else {}
+        failed = False
+        for wallet_address in args.verify:
+            problems = verify_plan(plan_fetch(*templates), wallet_address, params)
+            print(f"{'❌' if problems else '✅'} {wallet_address}: "
+                  f"{'; '.join(problems[:5]) or 'planned fetch matches the complete fetch'}")
+            failed = failed or bool(problems)
+        if failed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,14 @@
-import requests
+import argparse
 import json
 import os
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from dotenv import load_dotenv
 
+from api_client import WalletApiClient
+from field_mapping import BEHAVIOR, PNL, SUMMARY, TOKEN
+from response_cache import open_default_cache
+from results_store import open_default_results_store
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -18,67 +23,46 @@ START_DATE = os.getenv("START_DATE")  # Format: "2024-01-01"
 END_DATE = os.getenv("END_DATE")      # Format: "2024-12-31"
 
 # --- Helper functions ---
+# On-disk response cache (None when RESPONSE_CACHE_DISABLED is set)
+response_cache = open_default_cache()
+# Every agent_input is also indexed in the results store (RESULTS_STORE_DISABLED=1 to skip)
+results_store = open_default_results_store()
+
+_clients: Dict[Optional[str], WalletApiClient] = {}
+
+def get_client(api_key: Optional[str] = None) -> WalletApiClient:
+    """Pooled keep-alive client shared by every fetch() call in this process."""
+    if api_key not in _clients:
+        _clients[api_key] = WalletApiClient(API_BASE_URL, api_key, cache=response_cache)
+    return _clients[api_key]
+
 def fetch(endpoint: str, api_key: Optional[str] = None, params: Optional[Dict] = None) -> Any:
     url = f"{API_BASE_URL}{endpoint}"
-    headers = {}
-    if api_key:
-        headers['x-api-key'] = api_key
-    
     try:
-        resp = requests.get(url, headers=headers, params=params)
-        resp.raise_for_status()
-        return resp.json()
+        return get_client(api_key).get(endpoint, params)
     except Exception as e:
         print(f"Error fetching {url}: {e}")
         return None
 
+# Same field specs as fetch_wallet_data_complete.py, restricted to this script's smaller record
+_SUMMARY = SUMMARY.only("status", "is_favorite", "total_pnl", "win_rate", "total_volume", "days_active",
+                        "last_active_timestamp", "behavior_classification", "classification")
+_BEHAVIOR = BEHAVIOR.only("trading_style", "confidence_score", "buy_sell_ratio", "flipper_score",
+                          "unique_tokens_traded", "total_trade_count", "trading_frequency", "token_preferences",
+                          "risk_metrics", "percent_of_value_in_current_holdings")
+_TOKEN = TOKEN.only("token_address", "name", "symbol", "total_amount_in", "total_amount_out", "net_amount_change",
+                    "total_sol_spent", "total_sol_received", "net_sol_profit_loss", "current_ui_balance",
+                    "current_holdings_value_usd", "realized_pnl_sol", "unrealized_pnl_usd", "price_usd")
+
 def sanitize_summary(data: Dict) -> Dict:
-    return {
-        "status": data.get("status", "ok"),
-        "is_favorite": False,  # Not available in summary response
-        "total_pnl": data.get("latestPnl", 0.0),
-        "win_rate": data.get("tokenWinRate", 0.0),
-        "total_volume": 0.0,  # Not available in summary response
-        "days_active": data.get("daysActive", 0),
-        "last_active_timestamp": data.get("lastActiveTimestamp", 0),
-        "behavior_classification": data.get("behaviorClassification", "unknown"),
-        "classification": data.get("classification", "normal")
-    }
+    return _SUMMARY(data)
 
 def sanitize_pnl(data: Dict) -> Dict:
-    # The PNL overview returns { allTimeData: {...}, periodData: {...} }
-    # We want to use allTimeData for comprehensive analysis
-    pnl_data = data.get("allTimeData", {})
-    
-    return {
-        "realized_pnl": pnl_data.get("realizedPnl", 0.0),
-        "swap_win_rate": pnl_data.get("swapWinRate", 0.0),
-        "win_loss_count": pnl_data.get("winLossCount", "0/0 wins"),
-        "avg_pl_trade": pnl_data.get("avgPLTrade", 0.0),
-        "total_volume": pnl_data.get("totalVolume", 0.0),
-        "total_sol_spent": pnl_data.get("totalSolSpent", 0.0),
-        "total_sol_received": pnl_data.get("totalSolReceived", 0.0),
-        "median_pl_token": pnl_data.get("medianPLToken", 0.0),
-        "token_win_rate": pnl_data.get("tokenWinRate", 0.0),
-        "weighted_efficiency_score": pnl_data.get("weightedEfficiencyScore", 0.0),
-        "data_from": pnl_data.get("dataFrom", "N/A"),
-        "standard_deviation_pnl": pnl_data.get("standardDeviationPnl", 0.0),
-        "average_pnl_per_day": pnl_data.get("averagePnlPerDayActiveApprox", 0.0)
-    }
+    # The PNL overview returns { allTimeData: {...}, periodData: {...} }; PNL reads allTimeData
+    return PNL(data)
 
 def sanitize_behavior(data: Dict) -> Dict:
-    return {
-        "trading_style": data.get("tradingStyle"),
-        "confidence_score": data.get("confidenceScore"),
-        "buy_sell_ratio": data.get("buySellRatio"),
-        "flipper_score": data.get("flipperScore"),
-        "unique_tokens_traded": data.get("uniqueTokensTraded"),
-        "total_trade_count": data.get("totalTradeCount"),
-        "trading_frequency": data.get("tradingFrequency"),
-        "token_preferences": data.get("tokenPreferences"),
-        "risk_metrics": data.get("riskMetrics"),
-        "percent_of_value_in_current_holdings": data.get("percentOfValueInCurrentHoldings")
-    }
+    return _BEHAVIOR(data)
 
 def sanitize_token_performance(data: Any) -> Any:
     # Handle paginated response structure
@@ -94,25 +78,7 @@ def sanitize_token_performance(data: Any) -> Any:
         return []
     
     sorted_tokens = sorted(tokens, key=lambda t: t.get("totalAmountIn", 0), reverse=True)[:3]
-    return [
-        {
-            "token_address": t.get("tokenAddress"),
-            "name": t.get("name"),
-            "symbol": t.get("symbol"),
-            "total_amount_in": t.get("totalAmountIn", 0.0),
-            "total_amount_out": t.get("totalAmountOut", 0.0),
-            "net_amount_change": t.get("netAmountChange", 0.0),
-            "total_sol_spent": t.get("totalSolSpent", 0.0),
-            "total_sol_received": t.get("totalSolReceived", 0.0),
-            "net_sol_profit_loss": t.get("netSolProfitLoss", 0.0),
-            "current_ui_balance": t.get("currentUiBalance"),
-            "current_holdings_value_usd": t.get("currentHoldingsValueUsd"),
-            "realized_pnl_sol": t.get("realizedPnlSol"),
-            "unrealized_pnl_usd": t.get("unrealizedPnlUsd"),
-            "price_usd": t.get("priceUsd")
-        }
-        for t in sorted_tokens
-    ]
+    return _TOKEN.many(sorted_tokens)
 
 def sanitize_similarity(data: Dict) -> Dict:
     # Only include top 1 pair for brevity
@@ -123,7 +89,9 @@ def sanitize_similarity(data: Dict) -> Dict:
         "unique_tokens_per_wallet": data.get("uniqueTokensPerWallet", {})
     }
 
-def main():
+def main(argv: Optional[List[str]] = None):
+    argparse.ArgumentParser(description="Fetch the basic agent_input for WALLET_ADDRESS into OUTPUT_FILE "
+                                        "(configured through .env).").parse_args(argv)
     print(f"Fetching data for wallet: {WALLET_ADDRESS}")
     print(f"API Base URL: {API_BASE_URL}")
     
@@ -194,6 +162,9 @@ def main():
     with open(OUTPUT_FILE, "w") as f:
         json.dump(agent_input, f, indent=2)
     print(f"Agent input saved to {OUTPUT_FILE}")
+    if results_store is not None:
+        results_store.save_agent_input(agent_input)
+        print(f"Indexed in results store {results_store.path}")
     
     # Print some basic info to verify the data
     print(f"\nSummary:")
@@ -206,6 +177,9 @@ def main():
     
     if START_DATE and END_DATE:
         print(f"  Period: {START_DATE} to {END_DATE}")
+    print(f"  {get_client(API_KEY).stats.report()}")
+    if response_cache:
+        print(f"  {response_cache.stats.report()}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
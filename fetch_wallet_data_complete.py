@@ -1,9 +1,24 @@
-import requests
+import argparse
+import asyncio
+import heapq
+import itertools
 import json
 import os
-from typing import Any, Dict, Optional
+import sys
+import time
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from dotenv import load_dotenv
 
+from api_client import AsyncWalletApiClient, WalletApiClient
+from field_mapping import BEHAVIOR, PNL, SUMMARY, TOKEN, validate_agent_input
+from metrics import METRICS_FILE, export_at_exit, registry
+from profiling import StageProfiler
+from response_cache import ResponseCache, open_default_cache
+from results_store import ResultsStore, open_default_results_store
+
+if TYPE_CHECKING:
+    from fetch_plan import FetchPlan  # imported by --template, which is the only path that plans
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -17,134 +32,246 @@ API_KEY = os.getenv("API_KEY")
 START_DATE = os.getenv("START_DATE")  # Format: "2024-01-01"
 END_DATE = os.getenv("END_DATE")      # Format: "2024-12-31"
 
+# Batch mode: number of wallets fetched at the same time, and wallets per /analyses/wallets/status call
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+STATUS_CHUNK_SIZE = 200
+
+# Token performance: walk every page (backend max pageSize is 100) and keep the top N by TOP_TOKENS_BY.
+# totalSolSpent (position size in SOL) is also a backend sortBy field, so a fetch plan gets the
+# same rows from one sorted page; raw token amounts (totalAmountIn) are not comparable across tokens
+TOKEN_PAGE_SIZE = 100
+TOP_TOKENS = int(os.getenv("TOP_TOKENS", "5"))
+TOP_TOKENS_BY = os.getenv("TOP_TOKENS_BY", "totalSolSpent")
+
+# agent_input sections, in the order fetch_wallet_sections() returns them
+ALL_SECTIONS = ("summary", "pnl_overview", "behavior", "token_performance")
+DETAIL_SECTIONS = ALL_SECTIONS[1:]
+SECTION_ENDPOINTS = {"summary": "summary", "pnl_overview": "pnl-overview", "behavior": "behavior-analysis",
+                     "token_performance": "token-performance"}
+
+# Check every agent_input against the field_mapping specs and print any mismatches (slower)
+VALIDATE_AGENT_INPUT = os.getenv("VALIDATE_AGENT_INPUT", "").lower() in ("1", "true", "yes")
+
+AGENT_INSTRUCTION = "Provide a comprehensive summary of this wallet's trading activity, performance, and any notable behavioral or risk patterns."
+
 # --- Helper functions ---
+# On-disk response cache shared by all clients; run() swaps it out for --no-cache
+response_cache: Optional[ResponseCache] = open_default_cache()
+# Every agent_input is also indexed in the results store (RESULTS_STORE_DISABLED=1 to skip)
+results_store: Optional[ResultsStore] = open_default_results_store()
+
+_clients: Dict[Optional[str], WalletApiClient] = {}
+
+def get_client(api_key: Optional[str] = None) -> WalletApiClient:
+    """Pooled keep-alive client shared by every fetch() call in this process."""
+    if api_key not in _clients:
+        _clients[api_key] = WalletApiClient(API_BASE_URL, api_key, cache=response_cache)
+    return _clients[api_key]
+
 def fetch(endpoint: str, api_key: Optional[str] = None, params: Optional[Dict] = None) -> Any:
     url = f"{API_BASE_URL}{endpoint}"
-    headers = {}
-    if api_key:
-        headers['x-api-key'] = api_key
-    
     try:
-        resp = requests.get(url, headers=headers, params=params)
-        resp.raise_for_status()
-        return resp.json()
+        return get_client(api_key).get(endpoint, params)
     except Exception as e:
         print(f"Error fetching {url}: {e}")
         return None
 
+async def fetch_async(client: AsyncWalletApiClient, endpoint: str, params: Optional[Dict] = None,
+                      fresh: bool = False) -> Any:
+    """Async twin of fetch(): same error handling, over a shared pooled client. fresh skips the response cache."""
+    url = f"{API_BASE_URL}{endpoint}"
+    try:
+        return await client.get(endpoint, params, fresh=fresh)
+    except Exception as e:
+        print(f"Error fetching {url}: {e}")
+        return None
+
+async def post_async(client: AsyncWalletApiClient, endpoint: str, payload: Dict, idempotent: bool = False) -> Any:
+    """POST with the client's retries; only an idempotent POST is retried after the backend may have seen it."""
+    url = f"{API_BASE_URL}{endpoint}"
+    try:
+        return await client.post(endpoint, payload, idempotent=idempotent)
+    except Exception as e:
+        print(f"Error posting to {url}: {e}")
+        return None
+
+async def fetch_wallet_sections(wallet_address: str, api_key: Optional[str] = None, params: Optional[Dict] = None,
+                                client: Optional[AsyncWalletApiClient] = None,
+                                sections: Iterable[str] = ALL_SECTIONS,
+                                plan: Optional["FetchPlan"] = None) -> Tuple[Any, Any, Any, Any]:
+    """Fetch summary, PNL overview, behavior and token performance concurrently.
+
+    Total latency is roughly that of the slowest endpoint instead of the sum of all four.
+    Returns (summary, pnl, behavior, tokens); failed sections are None, as with fetch().
+    Sections not listed in `sections` are not requested and come back as None.
+    With a plan (fetch_plan.py), its sections and token rows are fetched instead.
+    Pass a shared client to reuse its connections across wallets.
+    """
+    if client is None:
+        async with AsyncWalletApiClient(API_BASE_URL, api_key, cache=response_cache) as own_client:
+            result = await fetch_wallet_sections(wallet_address, api_key, params, own_client, sections, plan)
+            print(own_client.stats.report())
+            return result
+
+    async def skipped() -> None:
+        return None
+
+    def fetch_tokens():
+        if plan is None:
+            return fetch_top_tokens(client, wallet_address, params)
+        return fetch_top_tokens(client, wallet_address, params, plan.top_tokens, plan.token_rank, plan.token_sort)
+
+    wanted = set(plan.sections if plan is not None else sections)
+    summary, pnl, behavior, tokens = await asyncio.gather(
+        fetch_async(client, f"/wallets/{wallet_address}/summary", params) if "summary" in wanted else skipped(),
+        fetch_async(client, f"/wallets/{wallet_address}/pnl-overview", params) if "pnl_overview" in wanted else skipped(),
+        fetch_async(client, f"/wallets/{wallet_address}/behavior-analysis", params) if "behavior" in wanted else skipped(),
+        fetch_tokens() if "token_performance" in wanted else skipped(),
+    )
+    return summary, pnl, behavior, tokens
+
+# --- Token performance pagination ---
+def row_key(key: Union[str, Callable[[Dict], float]]) -> Callable[[Dict], float]:
+    """Sort key for token rows: a backend field name (missing or null counts as 0) or a callable."""
+    return key if callable(key) else (lambda row, field=key: row.get(field) or 0)
+
+class TopN:
+    """Keep the n largest rows seen so far in a bounded min-heap: O(n) memory for any stream length.
+
+    Ties keep the earlier row, matching sorted(..., reverse=True)[:n].
+    """
+
+    def __init__(self, n: int, key: Union[str, Callable[[Dict], float]] = TOP_TOKENS_BY):
+        self.n = n
+        self.key = row_key(key)
+        self._heap: List[Tuple[float, int, Dict]] = []
+        self._counter = itertools.count()
+        self.seen = 0
+
+    def push(self, row: Dict) -> None:
+        self.seen += 1
+        if self.n <= 0:
+            return
+        # Negated sequence number: among equal keys the later row is the smallest, so it is evicted first
+        entry = (self.key(row), -next(self._counter), row)
+        if len(self._heap) < self.n:
+            heapq.heappush(self._heap, entry)
+        elif entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def result(self) -> List[Dict]:
+        return [row for _, _, row in sorted(self._heap, reverse=True)]
+
+async def iter_token_performance(client: AsyncWalletApiClient, wallet_address: str, params: Optional[Dict] = None,
+                                 page_size: int = TOKEN_PAGE_SIZE, prefetch: bool = True) -> AsyncIterator[Dict]:
+    """Yield every token-performance row for a wallet, page by page.
+
+    With prefetch, the request for page k+1 is in flight while page k is being consumed,
+    so only two pages are ever held in memory. Raises if any page fails.
+    """
+    endpoint = f"/wallets/{wallet_address}/token-performance"
+    # Stable sort so rows cannot shift between pages while we walk them
+    base = dict(params or {}, pageSize=page_size, sortBy="tokenAddress", sortOrder="ASC")
+
+    page = 1
+    response = await client.get(endpoint, dict(base, page=page))
+    while True:
+        if isinstance(response, list):  # unpaginated response shape
+            for row in response:
+                yield row
+            return
+        total_pages = response.get("totalPages") or 1
+        next_page = None
+        if page < total_pages and prefetch:
+            next_page = asyncio.ensure_future(client.get(endpoint, dict(base, page=page + 1)))
+        try:
+            for row in response.get("data", []):
+                yield row
+        except BaseException:
+            if next_page:
+                next_page.cancel()
+            raise
+        if page >= total_pages:
+            return
+        page += 1
+        response = await next_page if next_page else await client.get(endpoint, dict(base, page=page))
+
+async def fetch_top_tokens(client: AsyncWalletApiClient, wallet_address: str, params: Optional[Dict] = None,
+                           n: int = TOP_TOKENS, key: Union[str, Callable[[Dict], float]] = TOP_TOKENS_BY,
+                           sort_by: Optional[str] = None) -> Any:
+    """Top-n token-performance rows across all pages, in the backend's paginated envelope; None on failure.
+
+    With sort_by (one of the backend's sortBy fields) the backend sorts and a single page of n
+    rows is requested instead of walking every page.
+    """
+    if sort_by:
+        endpoint = f"/wallets/{wallet_address}/token-performance"
+        try:
+            response = await client.get(endpoint, dict(params or {}, page=1, pageSize=max(n, 1), sortBy=sort_by, sortOrder="DESC"))
+        except Exception as e:
+            print(f"Error fetching {API_BASE_URL}{endpoint}: {e}")
+            return None
+        rows = response if isinstance(response, list) else response.get("data", [])
+        return {"data": rows[:n], "total": len(rows) if isinstance(response, list) else response.get("total", len(rows))}
+    top = TopN(n, key)
+    try:
+        async for row in iter_token_performance(client, wallet_address, params):
+            top.push(row)
+    except Exception as e:
+        print(f"Error fetching {API_BASE_URL}/wallets/{wallet_address}/token-performance: {e}")
+        return None
+    return {"data": top.result(), "total": top.seen}
+
+async def fetch_all_token_rows(wallets: Iterable[str], concurrency: int = BATCH_CONCURRENCY) -> List[Tuple[str, List[Dict]]]:
+    """Every token-performance row of each wallet, over one pooled client. Failed wallets are left out.
+
+    Unlike fetch_top_tokens() nothing is dropped, so callers can slice the rows locally
+    (similarity.py, window_metrics.py) instead of asking the backend again.
+    """
+    results: List[Tuple[str, List[Dict]]] = []
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    async with AsyncWalletApiClient(API_BASE_URL, API_KEY, pool_size=concurrency * 2, cache=response_cache) as client:
+
+        async def producer():
+            for address in wallets:
+                await queue.put(address)
+            for _ in range(concurrency):
+                await queue.put(None)
+
+        async def worker():
+            while True:
+                address = await queue.get()
+                if address is None:
+                    return
+                try:
+                    rows = [row async for row in iter_token_performance(client, address)]
+                except Exception as e:
+                    print(f"Error fetching {API_BASE_URL}/wallets/{address}/token-performance: {e}")
+                    continue
+                results.append((address, rows))
+
+        await asyncio.gather(producer(), *(worker() for _ in range(concurrency)))
+        print(client.stats.report())
+    return results
+
+# --- Sanitizing (field specs live in field_mapping.py) ---
+@registry.timed_function
 def sanitize_summary(data: Dict) -> Dict:
-    return {
-        "status": data.get("status", "ok"),
-        "is_favorite": False,  # Not available in summary response
-        "total_pnl": data.get("latestPnl", 0.0),
-        "win_rate": data.get("tokenWinRate", 0.0),
-        "total_volume": 0.0,  # Not available in summary response
-        "days_active": data.get("daysActive", 0),
-        "last_active_timestamp": data.get("lastActiveTimestamp", 0),
-        "behavior_classification": data.get("behaviorClassification", "unknown"),
-        "classification": data.get("classification", "normal"),
-        "current_sol_balance": data.get("currentSolBalance"),
-        "current_usdc_balance": data.get("currentUsdcBalance"),
-        "balances_fetched_at": data.get("balancesFetchedAt")
-    }
+    return SUMMARY(data)
 
+@registry.timed_function
 def sanitize_pnl(data: Dict) -> Dict:
-    # The PNL overview returns { allTimeData: {...}, periodData: {...} }
-    # We want to use allTimeData for comprehensive analysis
-    pnl_data = data.get("allTimeData", {})
-    
-    return {
-        "realized_pnl": pnl_data.get("realizedPnl", 0.0),
-        "swap_win_rate": pnl_data.get("swapWinRate", 0.0),
-        "win_loss_count": pnl_data.get("winLossCount", "0/0 wins"),
-        "avg_pl_trade": pnl_data.get("avgPLTrade", 0.0),
-        "total_volume": pnl_data.get("totalVolume", 0.0),
-        "total_sol_spent": pnl_data.get("totalSolSpent", 0.0),
-        "total_sol_received": pnl_data.get("totalSolReceived", 0.0),
-        "median_pl_token": pnl_data.get("medianPLToken", 0.0),
-        "token_win_rate": pnl_data.get("tokenWinRate", 0.0),
-        "weighted_efficiency_score": pnl_data.get("weightedEfficiencyScore", 0.0),
-        "data_from": pnl_data.get("dataFrom", "N/A"),
-        "standard_deviation_pnl": pnl_data.get("standardDeviationPnl", 0.0),
-        "average_pnl_per_day": pnl_data.get("averagePnlPerDayActiveApprox", 0.0)
-    }
+    # The PNL overview returns { allTimeData: {...}, periodData: {...} }; PNL reads allTimeData
+    return PNL(data)
 
+@registry.timed_function
 def sanitize_behavior_complete(data: Dict) -> Dict:
-    """COMPLETE behavior data extraction - includes ALL missing fields"""
-    return {
-        # Basic classification (already extracted)
-        "trading_style": data.get("tradingStyle"),
-        "confidence_score": data.get("confidenceScore"),
-        
-        # MISSING CRITICAL FIELDS - Now included
-        "buy_sell_ratio": data.get("buySellRatio"),
-        "buy_sell_symmetry": data.get("buySellSymmetry"),  # ⭐ KEY MISSING FIELD
-        "sequence_consistency": data.get("sequenceConsistency"),  # ⭐ KEY MISSING FIELD
-        "flipper_score": data.get("flipperScore"),
-        
-        # Timing analysis (MISSING)
-        "average_flip_duration_hours": data.get("averageFlipDurationHours"),  # ⭐ KEY
-        "median_hold_time": data.get("medianHoldTime"),  # ⭐ KEY
-        "percent_trades_under_1hour": data.get("percentTradesUnder1Hour"),  # ⭐ KEY
-        "percent_trades_under_4hours": data.get("percentTradesUnder4Hours"),  # ⭐ KEY
-        
-        # Trading time distribution (CRITICAL MISSING)
-        "trading_time_distribution": {
-            "ultra_fast": data.get("tradingTimeDistribution", {}).get("ultraFast", 0),  # ⭐ KEY
-            "very_fast": data.get("tradingTimeDistribution", {}).get("veryFast", 0),    # ⭐ KEY  
-            "fast": data.get("tradingTimeDistribution", {}).get("fast", 0),             # ⭐ KEY
-            "moderate": data.get("tradingTimeDistribution", {}).get("moderate", 0),
-            "day_trader": data.get("tradingTimeDistribution", {}).get("dayTrader", 0),
-            "swing": data.get("tradingTimeDistribution", {}).get("swing", 0),
-            "position": data.get("tradingTimeDistribution", {}).get("position", 0)
-        },
-        
-        # Token and trade analysis (MISSING)
-        "unique_tokens_traded": data.get("uniqueTokensTraded"),
-        "tokens_with_both_buy_and_sell": data.get("tokensWithBothBuyAndSell"),  # MISSING
-        "tokens_with_only_buys": data.get("tokensWithOnlyBuys"),  # MISSING
-        "tokens_with_only_sells": data.get("tokensWithOnlySells"),  # MISSING
-        "total_trade_count": data.get("totalTradeCount"),
-        "total_buy_count": data.get("totalBuyCount"),  # MISSING
-        "total_sell_count": data.get("totalSellCount"),  # MISSING
-        "complete_pairs_count": data.get("completePairsCount"),  # MISSING
-        "average_trades_per_token": data.get("averageTradesPerToken"),  # MISSING
-        
-        # Advanced behavioral metrics (MISSING)
-        "reentry_rate": data.get("reentryRate"),  # MISSING
-        "percentage_of_unpaired_tokens": data.get("percentageOfUnpairedTokens"),  # MISSING
-        
-        # Session analysis (MISSING)
-        "session_count": data.get("sessionCount"),  # MISSING
-        "avg_trades_per_session": data.get("avgTradesPerSession"),  # MISSING
-        "average_session_start_hour": data.get("averageSessionStartHour"),  # MISSING
-        "average_session_duration_minutes": data.get("averageSessionDurationMinutes"),  # MISSING
-        
-        # Current holdings analysis (MISSING) 
-        "average_current_holding_duration_hours": data.get("averageCurrentHoldingDurationHours"),  # MISSING
-        "median_current_holding_duration_hours": data.get("medianCurrentHoldingDurationHours"),  # MISSING
-        "weighted_average_holding_duration_hours": data.get("weightedAverageHoldingDurationHours"),  # MISSING
-        "percent_of_value_in_current_holdings": data.get("percentOfValueInCurrentHoldings"),
-        
-        # Active trading periods (MISSING)
-        "active_trading_periods": {
-            "hourly_trade_counts": data.get("activeTradingPeriods", {}).get("hourlyTradeCounts", {}),
-            "identified_windows": data.get("activeTradingPeriods", {}).get("identifiedWindows", []),
-            "activity_focus_score": data.get("activeTradingPeriods", {}).get("activityFocusScore", 0)
-        },
-        
-        # Existing fields (already extracted)
-        "trading_frequency": data.get("tradingFrequency"),
-        "token_preferences": data.get("tokenPreferences"),
-        "risk_metrics": data.get("riskMetrics"),
-        
-        # Timestamps (MISSING)
-        "first_transaction_timestamp": data.get("firstTransactionTimestamp"),  # MISSING
-        "last_transaction_timestamp": data.get("lastTransactionTimestamp")     # MISSING
-    }
+    """COMPLETE behavior data extraction, including the nested time distribution and trading periods"""
+    return BEHAVIOR(data)
 
+@registry.timed_function
 def sanitize_token_performance_complete(data: Any) -> Any:
-    """COMPLETE token performance extraction - includes ALL missing fields"""
+    """COMPLETE token performance extraction for the top TOP_TOKENS rows by TOP_TOKENS_BY"""
     # Handle paginated response structure
     if isinstance(data, dict) and "data" in data:
         tokens = data.get("data", [])
@@ -152,65 +279,13 @@ def sanitize_token_performance_complete(data: Any) -> Any:
         tokens = data
     else:
         return []
-    
-    # Limit to top 5 tokens by totalAmountIn for LLM analysis
     if not tokens:
         return []
     
-    sorted_tokens = sorted(tokens, key=lambda t: t.get("totalAmountIn", 0), reverse=True)[:5]
-    return [
-        {
-            # Basic info (already extracted)
-            "token_address": t.get("tokenAddress"),
-            "name": t.get("name"),
-            "symbol": t.get("symbol"),
-            
-            # Trading volumes (already extracted)
-            "total_amount_in": t.get("totalAmountIn", 0.0),
-            "total_amount_out": t.get("totalAmountOut", 0.0),
-            "net_amount_change": t.get("netAmountChange", 0.0),
-            "total_sol_spent": t.get("totalSolSpent", 0.0),
-            "total_sol_received": t.get("totalSolReceived", 0.0),
-            "net_sol_profit_loss": t.get("netSolProfitLoss", 0.0),
-            
-            # MISSING: Trade frequency and timing
-            "transfer_count_in": t.get("transferCountIn", 0),   # MISSING
-            "transfer_count_out": t.get("transferCountOut", 0), # MISSING
-            "first_transfer_timestamp": t.get("firstTransferTimestamp"),  # MISSING
-            "last_transfer_timestamp": t.get("lastTransferTimestamp"),    # MISSING
-            
-            # MISSING: Separate realized vs unrealized PNL
-            "realized_pnl_sol": t.get("realizedPnlSol"),        # MISSING - critical
-            "unrealized_pnl_usd": t.get("unrealizedPnlUsd"),    # MISSING - critical
-            "unrealized_pnl_sol": t.get("unrealizedPnlSol"),    # MISSING
-            "total_pnl_sol": t.get("totalPnlSol"),              # MISSING
-            "realized_pnl_percentage": t.get("realizedPnlPercentage"),    # MISSING
-            "unrealized_pnl_percentage": t.get("unrealizedPnlPercentage"), # MISSING
-            
-            # Current holdings (already extracted)
-            "current_ui_balance": t.get("currentUiBalance"),
-            "current_holdings_value_usd": t.get("currentHoldingsValueUsd"),
-            "current_holdings_value_sol": t.get("currentHoldingsValueSol"),  # MISSING 
-            "price_usd": t.get("priceUsd"),
-            
-            # MISSING: Market data for context
-            "market_cap_usd": t.get("marketCapUsd"),          # MISSING
-            "liquidity_usd": t.get("liquidityUsd"),           # MISSING
-            "volume_24h": t.get("volume24h"),                 # MISSING
-            "fdv": t.get("fdv"),                              # MISSING
-            "pair_created_at": t.get("pairCreatedAt"),        # MISSING
-            
-            # Meta information
-            "image_url": t.get("imageUrl"),
-            "website_url": t.get("websiteUrl"),
-            "twitter_url": t.get("twitterUrl"),
-            "telegram_url": t.get("telegramUrl"),
-            "dexscreener_updated_at": t.get("dexscreenerUpdatedAt"),
-            "balance_fetched_at": t.get("balanceFetchedAt")
-        }
-        for t in sorted_tokens
-    ]
+    # Same rows and tie order as TopN, but the selection runs in heapq's C code
+    return TOKEN.many(heapq.nlargest(TOP_TOKENS, tokens, key=row_key(TOP_TOKENS_BY)))
 
+@registry.timed_function
 def sanitize_similarity(data: Dict) -> Dict:
     # Only include top 1 pair for brevity
     pairs = data.get("pairwiseSimilarities", [])
@@ -220,8 +295,335 @@ def sanitize_similarity(data: Dict) -> Dict:
         "unique_tokens_per_wallet": data.get("uniqueTokensPerWallet", {})
     }
 
-def main():
-    print(f"Fetching COMPLETE data for wallet: {WALLET_ADDRESS}")
+def missing_section(summary: Any, pnl: Any, behavior: Any, tokens: Any,
+                    sections: Iterable[str] = ALL_SECTIONS) -> Optional[str]:
+    """Name of the first of `sections` that failed to fetch, or None if all of them are present."""
+    wanted = set(sections)
+    if "summary" in wanted and not summary:
+        return "wallet summary"
+    if "pnl_overview" in wanted and not pnl:
+        return "PNL overview"
+    if "behavior" in wanted and not behavior:
+        return "behavior analysis"
+    if "token_performance" in wanted and not tokens:
+        return "token performance"
+    return None
+
+def sanitize_planned(plan: "FetchPlan", summary: Any, pnl: Any, behavior: Any, tokens: Any) -> Dict:
+    """Only the plan's sections, each cut down to the fields its templates read."""
+    raw = {"summary": summary, "pnl_overview": pnl, "behavior": behavior}
+    sections = {}
+    for section in plan.sections:
+        if section == "token_performance":
+            rows = tokens.get("data", []) if isinstance(tokens, dict) else tokens or []
+            sections[section] = plan.sanitizer(section).many(
+                heapq.nlargest(plan.top_tokens, rows, key=row_key(plan.token_rank)))
+        else:
+            sections[section] = plan.sanitizer(section)(raw[section])
+    return sections
+
+def build_agent_input(wallet_address: str, summary: Dict, pnl: Dict, behavior: Dict, tokens: Any,
+                      params: Optional[Dict] = None, validate: bool = VALIDATE_AGENT_INPUT,
+                      plan: Optional["FetchPlan"] = None) -> Dict:
+    """Sanitize and merge the raw endpoint responses into one agent_input record.
+
+    With a plan the record holds only the planned sections and fields, and names the plan
+    under "fetch_plan".
+    """
+    if plan is not None:
+        agent_input = {"wallet_address": wallet_address, **sanitize_planned(plan, summary, pnl, behavior, tokens),
+                       "instruction": AGENT_INSTRUCTION, "fetch_plan": plan.name}
+    else:
+        agent_input = {
+            "wallet_address": wallet_address,
+            "summary": sanitize_summary(summary),
+            "pnl_overview": sanitize_pnl(pnl),
+            "behavior": sanitize_behavior_complete(behavior),  # NOW COMPLETE
+            "token_performance": sanitize_token_performance_complete(tokens),  # NOW COMPLETE
+            "instruction": AGENT_INSTRUCTION
+        }
+
+    # Add date range info if specified
+    if params and params.get("startDate") and params.get("endDate"):
+        agent_input["date_range"] = {
+            "start_date": params["startDate"],
+            "end_date": params["endDate"]
+        }
+    if validate:
+        for problem in validate_agent_input(agent_input):
+            print(f"WARNING: agent_input for {wallet_address} does not match the schema - {problem}")
+    return agent_input
+
+# --- Incremental refresh ---
+def plan_refresh(previous: Optional[Dict], summary: Dict, params: Optional[Dict] = None) -> List[str]:
+    """Sections (besides summary) that may have changed since the previous agent_input.
+
+    A new lastActiveTimestamp means the wallet traded, so every section is stale. New balances
+    without new trades only move current holdings, which live in token_performance.
+    """
+    stale = list(DETAIL_SECTIONS)
+    if not previous:
+        return stale
+    previous_range = previous.get("date_range")
+    current_range = ({"start_date": params["startDate"], "end_date": params["endDate"]}
+                     if params and params.get("startDate") and params.get("endDate") else None)
+    if previous_range != current_range or any(section not in previous for section in stale):
+        return stale
+    previous_summary = previous.get("summary", {})
+    if summary.get("last_active_timestamp") != previous_summary.get("last_active_timestamp"):
+        return stale
+    if summary.get("balances_fetched_at") != previous_summary.get("balances_fetched_at"):
+        return ["token_performance"]
+    return []
+
+async def refresh_wallet(client: AsyncWalletApiClient, wallet_address: str, previous: Optional[Dict],
+                         params: Optional[Dict] = None) -> Optional[Dict]:
+    """Fetch /summary, then only the sections plan_refresh() marks as stale, merged over `previous`.
+
+    The returned record carries "refreshed_sections"; an empty list means nothing changed
+    and the LLM analysis from the previous run is still valid. Returns None on fetch failure.
+    The /summary probe bypasses the response cache, and cached copies of the stale sections
+    are dropped first, so a refreshed section is never served from the cache.
+    """
+    summary = await fetch_async(client, f"/wallets/{wallet_address}/summary", params, fresh=True)
+    if not summary:
+        print(f"ERROR: Failed to fetch wallet summary for {wallet_address}")
+        return None
+    stale = plan_refresh(previous, sanitize_summary(summary), params)
+    if client.cache is not None:
+        for section in stale:
+            # Every cached page and date range of the section
+            client.cache.invalidate(f"/wallets/{wallet_address}/{SECTION_ENDPOINTS[section]}")
+    if set(stale) == set(DETAIL_SECTIONS):
+        _, pnl, behavior, tokens = await fetch_wallet_sections(wallet_address, params=params, client=client, sections=stale)
+        failed = missing_section(summary, pnl, behavior, tokens)
+        if failed:
+            print(f"ERROR: Failed to fetch {failed} for {wallet_address}")
+            return None
+        record = build_agent_input(wallet_address, summary, pnl, behavior, tokens, params)
+    else:
+        record = dict(previous)
+        record["summary"] = sanitize_summary(summary)
+        if stale:
+            _, _, _, tokens = await fetch_wallet_sections(wallet_address, params=params, client=client, sections=stale)
+            if not tokens:
+                print(f"ERROR: Failed to fetch token performance for {wallet_address}")
+                return None
+            record["token_performance"] = sanitize_token_performance_complete(tokens)
+    record["refreshed_sections"] = stale
+    return record
+
+def index_ndjson(path: str) -> Dict[str, int]:
+    """Map wallet_address -> byte offset of its record, so previous records are read on demand."""
+    index = {}
+    if not os.path.exists(path):
+        return index
+    with open(path, "rb") as f:
+        offset = 0
+        for line in f:
+            if line.strip():
+                index[json.loads(line)["wallet_address"]] = offset
+            offset += len(line)
+    return index
+
+def read_ndjson_record(path: str, offset: int) -> Dict:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return json.loads(f.readline())
+
+# --- Batch mode ---
+def read_wallet_list(path: str) -> Iterator[str]:
+    """Yield wallet addresses from a file (or stdin for '-'), one per line; blank lines and # comments are skipped."""
+    stream = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        for line in stream:
+            address = line.split("#", 1)[0].strip()
+            if address:
+                yield address
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+def chunked(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+async def filter_wallets_by_status(client: AsyncWalletApiClient, wallets: List[str]) -> List[str]:
+    """Drop wallets the backend has no data for (status MISSING) using POST /analyses/wallets/status.
+
+    If the status call itself fails, all wallets are kept and the per-wallet fetch decides.
+    """
+    response = await post_async(client, "/analyses/wallets/status", {"walletAddresses": wallets}, idempotent=True)
+    if not response:
+        return wallets
+    missing = {s.get("walletAddress") for s in response.get("statuses", []) if s.get("status") == "MISSING"}
+    for address in wallets:
+        if address in missing:
+            print(f"Skipping {address}: no data in backend (MISSING)")
+    return [w for w in wallets if w not in missing]
+
+async def run_batch(wallets: Iterable[str], output_path: str, api_key: Optional[str] = None, params: Optional[Dict] = None,
+                    concurrency: int = BATCH_CONCURRENCY, check_status: bool = True,
+                    previous_path: Optional[str] = None, plan: Optional["FetchPlan"] = None) -> Dict[str, int]:
+    """Fetch and sanitize many wallets over one pooled client, streaming each record to NDJSON.
+
+    Wallets are read lazily and handed to a fixed pool of workers through a bounded queue,
+    so memory use does not grow with the size of the batch. With previous_path (an earlier
+    run's NDJSON), each wallet is refreshed incrementally instead of fetched in full; with
+    a plan, only the plan's endpoints and fields are fetched.
+
+    Refreshing in place (previous_path is output_path) never drops a record: a wallet whose
+    refresh fails keeps its previous record, and wallets not in this run are copied through.
+    """
+    stats = {"written": 0, "failed": 0, "skipped": 0, "unchanged": 0, "kept": 0}
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    previous_index = index_ndjson(previous_path) if previous_path else None
+    # Refreshing in place: write next to the previous file and swap it in at the end
+    in_place = bool(previous_path) and os.path.abspath(previous_path) == os.path.abspath(output_path)
+    write_path = output_path + ".tmp" if in_place else output_path
+    written_addresses = set()
+
+    # Four endpoints per wallet in flight at once
+    async with AsyncWalletApiClient(API_BASE_URL, api_key, pool_size=concurrency * 4, cache=response_cache) as client:
+        with open(write_path, "w", encoding="utf-8") as out:
+
+            async def producer():
+                for chunk in chunked(wallets, STATUS_CHUNK_SIZE):
+                    kept = await filter_wallets_by_status(client, chunk) if check_status else chunk
+                    stats["skipped"] += len(chunk) - len(kept)
+                    for address in kept:
+                        await queue.put(address)
+                for _ in range(concurrency):
+                    await queue.put(None)
+
+            async def worker():
+                while True:
+                    address = await queue.get()
+                    if address is None:
+                        return
+                    if previous_index is not None:
+                        previous = read_ndjson_record(previous_path, previous_index[address]) if address in previous_index else None
+                        record = await refresh_wallet(client, address, previous, params)
+                        if record is None:
+                            stats["failed"] += 1
+                            if in_place and previous is not None:
+                                out.write(json.dumps(previous) + "\n")
+                                written_addresses.add(address)
+                                stats["kept"] += 1
+                            continue
+                        if not record["refreshed_sections"]:
+                            stats["unchanged"] += 1
+                    else:
+                        sections = await fetch_wallet_sections(address, api_key, params, client, plan=plan)
+                        failed = missing_section(*sections, plan.sections if plan else ALL_SECTIONS)
+                        if failed:
+                            print(f"ERROR: Failed to fetch {failed} for {address}")
+                            stats["failed"] += 1
+                            continue
+                        record = build_agent_input(address, *sections, params, plan=plan)
+                    out.write(json.dumps(record) + "\n")
+                    out.flush()
+                    written_addresses.add(address)
+                    if results_store is not None:
+                        results_store.save_agent_input(record)
+                    stats["written"] += 1
+
+            await asyncio.gather(producer(), *(worker() for _ in range(concurrency)))
+            if in_place:
+                # Wallets not refreshed this run (not listed, or skipped as MISSING) keep their records
+                for address, offset in previous_index.items():
+                    if address not in written_addresses:
+                        out.write(json.dumps(read_ndjson_record(previous_path, offset)) + "\n")
+                        stats["kept"] += 1
+        print(client.stats.report())
+    if write_path != output_path:
+        os.replace(write_path, output_path)
+    return stats
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Fetch COMPLETE wallet data and build agent_input records.")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="File with one wallet address per line ('-' for stdin). Writes NDJSON instead of a single JSON file.")
+    parser.add_argument("--output", help="Output path (defaults to OUTPUT_FILE, or agent_inputs.ndjson in batch mode)")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="Wallets fetched at the same time in batch mode")
+    parser.add_argument("--no-status-check", action="store_true",
+                        help="Do not filter the batch through POST /analyses/wallets/status first")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the on-disk response cache")
+    parser.add_argument("--metrics", metavar="FILE", default=METRICS_FILE,
+                        help="Write request/LLM/sanitize metrics at exit: Prometheus text for .prom/.txt, JSON otherwise")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Fetch /summary first and only re-fetch sections that changed since the previous output")
+    parser.add_argument("--previous", metavar="FILE",
+                        help="Previous agent_input (JSON, or NDJSON in batch mode) for --incremental; defaults to the output path")
+    parser.add_argument("--template", metavar="NAME[,NAME]",
+                        help="Fetch only the endpoints and fields these prompt templates read (see fetch_plan.py)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Run each stage under cProfile and tracemalloc and write a per-stage report under PROFILE_DIR")
+    return parser.parse_args(argv)
+
+def main_batch(args: argparse.Namespace, params: Dict, profiler: StageProfiler, plan: Optional["FetchPlan"] = None):
+    output_path = args.output or "agent_inputs.ndjson"
+    print(f"Batch mode: reading wallets from {'stdin' if args.batch == '-' else args.batch}, concurrency {args.concurrency}")
+    started = time.perf_counter()
+    previous_path = (args.previous or output_path) if args.incremental else None
+    # Fetch, sanitize and write interleave across workers, so the batch is profiled as one stage
+    with profiler.stage("batch"):
+        stats = asyncio.run(run_batch(read_wallet_list(args.batch), output_path, API_KEY, params,
+                                      concurrency=args.concurrency, check_status=not args.no_status_check,
+                                      previous_path=previous_path, plan=plan))
+    elapsed = time.perf_counter() - started
+    print(f"\n=== BATCH COMPLETE ===")
+    print(f"Written: {stats['written']} | Failed: {stats['failed']} | Skipped (MISSING): {stats['skipped']}")
+    if args.incremental:
+        print(f"Unchanged since previous run (LLM step can be skipped): {stats['unchanged']}")
+        if stats["kept"]:
+            print(f"Previous records kept (refresh failed or wallet not in this run): {stats['kept']}")
+    print(f"Elapsed: {elapsed:.1f}s ({stats['written'] / elapsed if elapsed else 0:.2f} wallets/s)")
+    print(f"Agent inputs streamed to {output_path}")
+    if response_cache:
+        print(response_cache.stats.report())
+
+async def main_incremental(previous_path: str, params: Dict) -> Optional[Dict]:
+    previous = None
+    if os.path.exists(previous_path):
+        with open(previous_path, "r") as f:
+            previous = json.load(f)
+        if previous.get("wallet_address") != WALLET_ADDRESS:
+            previous = None
+    print(f"Incremental refresh against {previous_path if previous else 'nothing (no previous agent input)'}...")
+    async with AsyncWalletApiClient(API_BASE_URL, API_KEY, cache=response_cache) as client:
+        agent_input = await refresh_wallet(client, WALLET_ADDRESS, previous, params)
+        print(client.stats.report())
+    if agent_input is not None:
+        refreshed = agent_input["refreshed_sections"]
+        print(f"Re-fetched sections: {', '.join(refreshed) if refreshed else 'none - wallet unchanged, LLM step can be skipped'}")
+    return agent_input
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    profiler = StageProfiler(args.profile, "fetch")
+    try:
+        run(args, profiler)
+    finally:
+        report_path = profiler.write_report()
+        if report_path:
+            print(f"Profile report written to {report_path}")
+
+def run(args: argparse.Namespace, profiler: StageProfiler):
+    global response_cache
+    export_at_exit(args.metrics)
+    if args.no_cache:
+        response_cache = None
+    if args.batch:
+        print(f"Fetching COMPLETE data in batch mode")
+    else:
+        print(f"Fetching COMPLETE data for wallet: {WALLET_ADDRESS}")
     print(f"API Base URL: {API_BASE_URL}")
     
     # Check if API key is provided
@@ -239,58 +641,61 @@ def main():
         print(f"Fetching data for period: {START_DATE} to {END_DATE}")
     else:
         print("Fetching all-time data (no date range specified)")
-    
-    # Fetch data from API
-    print("Fetching wallet summary...")
-    summary = fetch(f"/wallets/{WALLET_ADDRESS}/summary", API_KEY, params)
-    
-    print("Fetching PNL overview...")
-    pnl = fetch(f"/wallets/{WALLET_ADDRESS}/pnl-overview", API_KEY, params)
-    
-    print("Fetching COMPLETE behavior analysis...")
-    behavior = fetch(f"/wallets/{WALLET_ADDRESS}/behavior-analysis", API_KEY, params)
-    
-    print("Fetching COMPLETE token performance...")
-    tokens = fetch(f"/wallets/{WALLET_ADDRESS}/token-performance", API_KEY, params)
 
-    # Check if we got valid responses
-    if not summary:
-        print("ERROR: Failed to fetch wallet summary")
-        return
-    
-    if not pnl:
-        print("ERROR: Failed to fetch PNL overview")
-        return
-    
-    if not behavior:
-        print("ERROR: Failed to fetch behavior analysis")
+    plan = None
+    if args.template:
+        if args.incremental:
+            print("ERROR: --template cannot be combined with --incremental (refreshes merge into complete records)")
+            return
+        try:
+            from fetch_plan import plan_for
+
+            plan = plan_for(args.template)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            return
+        print(plan.describe())
+
+    if args.batch:
+        main_batch(args, params, profiler, plan)
         return
     
-    if not tokens:
-        print("ERROR: Failed to fetch token performance")
-        return
+    output_file = args.output or OUTPUT_FILE
+    if args.incremental:
+        with profiler.stage("refresh"):
+            agent_input = asyncio.run(main_incremental(args.previous or output_file, params))
+        if agent_input is None:
+            return
+    else:
+        # Fetch data from API - all four endpoints in parallel
+        if plan is None:
+            print("Fetching summary, PNL overview, COMPLETE behavior analysis and COMPLETE token performance...")
+        with profiler.stage("fetch"):
+            summary, pnl, behavior, tokens = asyncio.run(fetch_wallet_sections(WALLET_ADDRESS, API_KEY, params, plan=plan))
 
-    # Sanitize and merge with COMPLETE data extraction
-    agent_input = {
-        "wallet_address": WALLET_ADDRESS,
-        "summary": sanitize_summary(summary),
-        "pnl_overview": sanitize_pnl(pnl),
-        "behavior": sanitize_behavior_complete(behavior),  # NOW COMPLETE
-        "token_performance": sanitize_token_performance_complete(tokens),  # NOW COMPLETE
-        "instruction": "Provide a comprehensive summary of this wallet's trading activity, performance, and any notable behavioral or risk patterns."
-    }
+        # Check if we got valid responses
+        failed = missing_section(summary, pnl, behavior, tokens, plan.sections if plan else ALL_SECTIONS)
+        if failed:
+            print(f"ERROR: Failed to fetch {failed}")
+            return
 
-    # Add date range info if specified
-    if START_DATE and END_DATE:
-        agent_input["date_range"] = {
-            "start_date": START_DATE,
-            "end_date": END_DATE
-        }
+        # Sanitize and merge with COMPLETE data extraction
+        with profiler.stage("sanitize"):
+            agent_input = build_agent_input(WALLET_ADDRESS, summary, pnl, behavior, tokens, params, plan=plan)
 
     # Save to file
-    with open(OUTPUT_FILE, "w") as f:
-        json.dump(agent_input, f, indent=2)
-    print(f"COMPLETE agent input saved to {OUTPUT_FILE}")
+    with profiler.stage("save"):
+        with open(output_file, "w") as f:
+            json.dump(agent_input, f, indent=2)
+        print(f"COMPLETE agent input saved to {output_file}")
+        if results_store is not None:
+            results_store.save_agent_input(agent_input)
+            print(f"Indexed in results store {results_store.path}")
+    if plan is not None:
+        # Planned records only carry their templates' fields
+        if response_cache:
+            print(response_cache.stats.report())
+        return
     
     # Print summary of extracted data
     print(f"\n=== COMPLETE DATA EXTRACTION SUMMARY ===")
@@ -318,6 +723,8 @@ def main():
     
     if START_DATE and END_DATE:
         print(f"\nPeriod: {START_DATE} to {END_DATE}")
+    if response_cache:
+        print(response_cache.stats.report())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,356 @@
+"""
+Declarative backend -> agent_input field mapping, compiled into plain extractor functions.
+
+Every agent_input section (the AgentInput schema in react_agent_execution_plan.md, plus
+the fields the complete fetch added since) is described once as a tuple of Field / Nested
+entries: output name, backend key (camelCase of the name unless given), default and value
+type. On first use a Section generates plain Python functions from its spec: all keys of
+an object are read in one C-level itemgetter call, each nested object
+(tradingTimeDistribution, ...) is looked up once, and many() is a single loop with no
+call per row. Records missing a key fall back to the hand-written .get(key, default) form:
+
+    SUMMARY(raw)                 one sanitized section
+    TOKEN.many(rows)             a whole batch in one loop
+    SUMMARY.only("status", ...)  a subset of the fields, in the given order
+    validate_agent_input(rec)    optional pydantic check, models built on first use
+"""
+
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+
+def camel_case(name: str) -> str:
+    head, *rest = name.split("_")
+    return head + "".join(part[:1].upper() + part[1:] for part in rest)
+
+
+@dataclass(frozen=True)
+class Field:
+    name: str
+    source: Optional[str] = None  # backend key; camel_case(name) when None
+    default: Any = None
+    type: Any = Any
+    const: bool = False  # not in the backend response: always emit the default
+
+    @property
+    def key(self) -> str:
+        return self.source or camel_case(self.name)
+
+
+@dataclass(frozen=True)
+class Nested:
+    name: str
+    fields: Tuple[Field, ...]
+    source: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        return self.source or camel_case(self.name)
+
+
+Spec = Tuple[Union[Field, Nested], ...]
+
+def _literal(value: Any) -> str:
+    import ast
+
+    text = repr(value)
+    if ast.literal_eval(text) != value:
+        raise ValueError(f"Field default must be a literal, got {value!r}")
+    return text
+
+
+class _Generator:
+    """Builds the source of one/many for a spec.
+
+    The fast path reads every backend key of an object with one operator.itemgetter call
+    (a single C-level lookup pass) unpacked into locals, and each nested object is read
+    the same way from its value. A record missing a key, or with a null nested object,
+    raises KeyError/TypeError and takes the slow path instead: the hand-written form, one
+    obj.get(key, default) per field with each nested object looked up once, so defaults
+    behave exactly as before.
+    """
+
+    def __init__(self, fields: Spec, root: Optional[str]):
+        self.fields = fields
+        self.root = root
+        self.namespace: Dict[str, Any] = {}
+        self.fast_lines: List[str] = []
+        self.slow_lines: List[str] = []
+        self.values = 0
+
+    def _fast(self, fields: Spec, obj: str) -> str:
+        readable = [field for field in fields if isinstance(field, Nested) or not field.const]
+        names = []
+        for _ in readable:
+            self.values += 1
+            names.append(f"v{self.values}")
+        if len(readable) == 1:
+            self.fast_lines.append(f"{names[0]} = {obj}[{readable[0].key!r}]")
+        elif readable:
+            getter = f"_keys{len(self.namespace)}"
+            self.namespace[getter] = itemgetter(*(field.key for field in readable))
+            self.fast_lines.append(f"{', '.join(names)} = {getter}({obj})")
+        values = iter(names)
+        items = []
+        for field in fields:
+            if isinstance(field, Nested):
+                value = self._fast(field.fields, next(values))
+            elif field.const:
+                value = _literal(field.default)
+            else:
+                value = next(values)
+            items.append(f"{field.name!r}: {value}")
+        return "{" + ", ".join(items) + "}"
+
+    def _slow(self, fields: Spec, obj: str) -> str:
+        items = []
+        for field in fields:
+            if isinstance(field, Nested):
+                nested = f"n{len(self.slow_lines)}"
+                self.slow_lines.append(f"{nested} = {obj}.get({field.key!r}) or {{}}")
+                value = self._slow(field.fields, nested)
+            elif field.const:
+                value = _literal(field.default)
+            elif field.default is None:
+                value = f"{obj}.get({field.key!r})"
+            else:
+                value = f"{obj}.get({field.key!r}, {_literal(field.default)})"
+            items.append(f"{field.name!r}: {value}")
+        return "{" + ", ".join(items) + "}"
+
+    def source(self) -> str:
+        fast = self._fast(self.fields, f"data[{self.root!r}]" if self.root else "data")
+        if self.root:
+            self.slow_lines.append(f"data = data.get({self.root!r}) or {{}}")
+        slow = self._slow(self.fields, "data")
+        lines = ["def slow(data):"] + [f"    {line}" for line in self.slow_lines] + [f"    return {slow}", ""]
+        lines += ["def one(data):", "    try:"] + [f"        {line}" for line in self.fast_lines]
+        lines += [f"        return {fast}", "    except (KeyError, TypeError):", "        return slow(data)", ""]
+        lines += ["def many(rows):", "    out = []", "    append = out.append", "    for data in rows:", "        try:"]
+        lines += [f"            {line}" for line in self.fast_lines]
+        lines += [f"            append({fast})", "        except (KeyError, TypeError):", "            append(slow(data))",
+                  "    return out"]
+        return "\n".join(lines) + "\n"
+
+
+def generate_source(fields: Spec, root: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+    """Source of slow(data), one(data) and many(rows) for a spec, and the namespace it runs in."""
+    generator = _Generator(fields, root)
+    return generator.source(), generator.namespace
+
+
+class Section:
+    """Extractors generated from one section spec; call it like a sanitize_* function.
+
+    one() and many() are compiled on first use and then replace these methods on the
+    instance, so importing the module compiles nothing.
+    """
+
+    def __init__(self, name: str, fields: Spec, root: Optional[str] = None):
+        self.name = name
+        self.fields = fields
+        self.root = root  # sub-object of the response the fields live in, e.g. pnl's allTimeData
+        self.source: Optional[str] = None
+        self._model = None
+
+    def _compile(self) -> None:
+        self.source, namespace = generate_source(self.fields, self.root)
+        exec(compile(self.source, f"<field_mapping {self.name}>", "exec"), namespace)
+        self.one: Callable[[Dict], Dict] = namespace["one"]
+        self.many: Callable[[Sequence[Dict]], List[Dict]] = namespace["many"]
+
+    def one(self, data: Dict) -> Dict:
+        self._compile()
+        return self.one(data)
+
+    def many(self, rows: Sequence[Dict]) -> List[Dict]:
+        self._compile()
+        return self.many(rows)
+
+    def __call__(self, data: Dict) -> Dict:
+        return self.one(data)
+
+    def only(self, *names: str) -> "Section":
+        by_name = {field.name: field for field in self.fields}
+        unknown = [name for name in names if name not in by_name]
+        if unknown:
+            raise ValueError(f"Unknown {self.name} fields: {', '.join(unknown)}")
+        return Section(self.name, tuple(by_name[name] for name in names), self.root)
+
+    def model(self):
+        """pydantic model for the sanitized section (pydantic is imported on first use)."""
+        if self._model is None:
+            self._model = _build_model(self.name, self.fields)
+        return self._model
+
+    def validate(self, record: Dict) -> Optional[str]:
+        """None if record matches the spec's types, else the problems as 'field: message; ...'."""
+        from pydantic import ValidationError
+
+        model = self.model()
+        try:
+            if hasattr(model, "model_validate"):
+                model.model_validate(record)
+            else:  # pydantic v1
+                model.parse_obj(record)
+        except ValidationError as e:
+            return "; ".join(f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors())
+        return None
+
+
+def _build_model(name: str, fields: Spec):
+    from pydantic import create_model
+
+    definitions = {}
+    for field in fields:
+        if isinstance(field, Nested):
+            definitions[field.name] = (_build_model(f"{name}_{field.name}", field.fields), ...)
+        elif field.type is Any:
+            definitions[field.name] = (Any, None)
+        else:
+            # Backend nulls are passed through as-is, so every field is nullable
+            definitions[field.name] = (Optional[field.type], None)
+    return create_model(f"{camel_case(name)[:1].upper()}{camel_case(name)[1:]}Section", **definitions)
+
+
+# --- Section specs ---
+SUMMARY_FIELDS: Spec = (
+    Field("status", default="ok", type=str),
+    Field("is_favorite", default=False, type=bool, const=True),  # Not available in summary response
+    Field("total_pnl", "latestPnl", 0.0, float),
+    Field("win_rate", "tokenWinRate", 0.0, float),
+    Field("total_volume", default=0.0, type=float, const=True),  # Not available in summary response
+    Field("days_active", default=0, type=int),
+    Field("last_active_timestamp", default=0, type=int),
+    Field("behavior_classification", default="unknown", type=str),
+    Field("classification", default="normal", type=str),
+    Field("current_sol_balance", type=float),
+    Field("current_usdc_balance", type=float),
+    Field("balances_fetched_at", type=str),
+)
+
+# Read from the overview's allTimeData (periodData is ignored)
+PNL_FIELDS: Spec = (
+    Field("realized_pnl", default=0.0, type=float),
+    Field("swap_win_rate", default=0.0, type=float),
+    Field("win_loss_count", default="0/0 wins", type=str),
+    Field("avg_pl_trade", "avgPLTrade", 0.0, float),
+    Field("total_volume", default=0.0, type=float),
+    Field("total_sol_spent", default=0.0, type=float),
+    Field("total_sol_received", default=0.0, type=float),
+    Field("median_pl_token", "medianPLToken", 0.0, float),
+    Field("token_win_rate", default=0.0, type=float),
+    Field("weighted_efficiency_score", default=0.0, type=float),
+    Field("data_from", default="N/A", type=str),
+    Field("standard_deviation_pnl", default=0.0, type=float),
+    Field("average_pnl_per_day", "averagePnlPerDayActiveApprox", 0.0, float),
+)
+
+BEHAVIOR_FIELDS: Spec = (
+    Field("trading_style", type=str),
+    Field("confidence_score", type=float),
+    Field("buy_sell_ratio", type=float),
+    Field("buy_sell_symmetry", type=float),
+    Field("sequence_consistency", type=float),
+    Field("flipper_score", type=float),
+    Field("average_flip_duration_hours", type=float),
+    Field("median_hold_time", type=float),
+    Field("percent_trades_under_1hour", "percentTradesUnder1Hour", type=float),
+    Field("percent_trades_under_4hours", "percentTradesUnder4Hours", type=float),
+    Nested("trading_time_distribution", (
+        Field("ultra_fast", default=0, type=float),
+        Field("very_fast", default=0, type=float),
+        Field("fast", default=0, type=float),
+        Field("moderate", default=0, type=float),
+        Field("day_trader", default=0, type=float),
+        Field("swing", default=0, type=float),
+        Field("position", default=0, type=float),
+    )),
+    Field("unique_tokens_traded", type=int),
+    Field("tokens_with_both_buy_and_sell", type=int),
+    Field("tokens_with_only_buys", type=int),
+    Field("tokens_with_only_sells", type=int),
+    Field("total_trade_count", type=int),
+    Field("total_buy_count", type=int),
+    Field("total_sell_count", type=int),
+    Field("complete_pairs_count", type=int),
+    Field("average_trades_per_token", type=float),
+    Field("reentry_rate", type=float),
+    Field("percentage_of_unpaired_tokens", type=float),
+    Field("session_count", type=int),
+    Field("avg_trades_per_session", type=float),
+    Field("average_session_start_hour", type=float),
+    Field("average_session_duration_minutes", type=float),
+    Field("average_current_holding_duration_hours", type=float),
+    Field("median_current_holding_duration_hours", type=float),
+    Field("weighted_average_holding_duration_hours", type=float),
+    Field("percent_of_value_in_current_holdings", type=float),
+    Nested("active_trading_periods", (
+        Field("hourly_trade_counts", default={}, type=dict),
+        Field("identified_windows", default=[], type=list),
+        Field("activity_focus_score", default=0, type=float),
+    )),
+    Field("trading_frequency", type=dict),
+    Field("token_preferences", type=dict),
+    Field("risk_metrics", type=dict),
+    Field("first_transaction_timestamp", type=int),
+    Field("last_transaction_timestamp", type=int),
+)
+
+TOKEN_FIELDS: Spec = (
+    Field("token_address", type=str),
+    Field("name", type=str),
+    Field("symbol", type=str),
+    Field("total_amount_in", default=0.0, type=float),
+    Field("total_amount_out", default=0.0, type=float),
+    Field("net_amount_change", default=0.0, type=float),
+    Field("total_sol_spent", default=0.0, type=float),
+    Field("total_sol_received", default=0.0, type=float),
+    Field("net_sol_profit_loss", default=0.0, type=float),
+    Field("transfer_count_in", default=0, type=int),
+    Field("transfer_count_out", default=0, type=int),
+    Field("first_transfer_timestamp", type=int),
+    Field("last_transfer_timestamp", type=int),
+    Field("realized_pnl_sol", type=float),
+    Field("unrealized_pnl_usd", type=float),
+    Field("unrealized_pnl_sol", type=float),
+    Field("total_pnl_sol", type=float),
+    Field("realized_pnl_percentage", type=float),
+    Field("unrealized_pnl_percentage", type=float),
+    Field("current_ui_balance", type=float),
+    Field("current_holdings_value_usd", type=float),
+    Field("current_holdings_value_sol", type=float),
+    Field("price_usd", type=str),
+    Field("market_cap_usd", type=float),
+    Field("liquidity_usd", type=float),
+    Field("volume_24h", type=float),
+    Field("fdv", type=float),
+    Field("pair_created_at", type=int),
+    Field("image_url", type=str),
+    Field("website_url", type=str),
+    Field("twitter_url", type=str),
+    Field("telegram_url", type=str),
+    Field("dexscreener_updated_at", type=str),
+    Field("balance_fetched_at", type=str),
+)
+
+SUMMARY = Section("summary", SUMMARY_FIELDS)
+PNL = Section("pnl_overview", PNL_FIELDS, root="allTimeData")
+BEHAVIOR = Section("behavior", BEHAVIOR_FIELDS)
+TOKEN = Section("token_performance", TOKEN_FIELDS)
+
+
+def validate_agent_input(record: Dict) -> List[str]:
+    """Problems found in an agent_input record's sections (empty when it matches the specs)."""
+    problems = []
+    for section in (SUMMARY, PNL, BEHAVIOR):
+        if section.name in record:
+            error = section.validate(record[section.name])
+            if error:
+                problems.append(f"{section.name}: {error}")
+    for i, row in enumerate(record.get(TOKEN.name) or []):
+        error = TOKEN.validate(row)
+        if error:
+            problems.append(f"{TOKEN.name}[{i}]: {error}")
+    return problems
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Job-based orchestration for large batches of cold wallets.
+
+The synchronous /wallets/{addr}/behavior-analysis and /token-performance endpoints block
+while the backend syncs a wallet it has not seen recently. For those wallets this script
+submits POST /jobs/wallets/sync followed by POST /jobs/wallets/analyze instead, follows
+each job through the /job-progress Socket.IO namespace (or by polling
+GET /jobs/:jobId/progress when python-socketio is not installed or the socket is down),
+and fetches the wallet's sections only after its jobs have finished.
+
+Wallets the backend reports as fresh skip the jobs and go straight to the fetch workers,
+so backend sync/analysis of cold wallets overlaps with fetching and writing warm ones.
+
+    python job_orchestrator.py wallets.txt --output agent_inputs.ndjson
+
+Optional dependency for push notifications: pip install "python-socketio[asyncio_client]"
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from dotenv import load_dotenv
+
+from api_client import AsyncWalletApiClient
+import fetch_wallet_data_complete as complete
+from fetch_wallet_data_complete import (API_BASE_URL, API_KEY, BATCH_CONCURRENCY, END_DATE, START_DATE,
+                                        STATUS_CHUNK_SIZE, build_agent_input, chunked, fetch_wallet_sections,
+                                        missing_section, post_async, read_wallet_list)
+from metrics import METRICS_FILE, export_at_exit
+
+# Load environment variables from .env file
+load_dotenv()
+
+# --- Configuration ---
+# Socket.IO is served from the API host root, not under /api/v1
+JOB_SOCKET_URL = os.getenv("JOB_SOCKET_URL")
+JOB_NAMESPACE = "/job-progress"
+MAX_PENDING_JOBS = int(os.getenv("MAX_PENDING_JOBS", "50"))  # wallets with sync/analyze jobs in flight
+JOB_TIMEOUT_SECONDS = float(os.getenv("JOB_TIMEOUT_SECONDS", "1800"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+JOB_POLL_MAX_INTERVAL = float(os.getenv("JOB_POLL_MAX_INTERVAL", "10.0"))
+# With a live socket, polling only guards against missed events
+SOCKET_POLL_INTERVAL = 30.0
+
+ANALYSIS_TYPES = ["pnl", "behavior"]
+NEEDS_SYNC = {"STALE", "MISSING"}
+FINAL_STATES = {"completed", "failed"}
+
+
+def default_socket_url(api_base_url: str = API_BASE_URL) -> str:
+    parts = urlsplit(api_base_url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class JobWatcher:
+    """Waits for backend jobs to reach a final state.
+
+    Completion events arrive over the /job-progress namespace when a socket is connected;
+    every job is also polled (immediately after subscribing, then with growing intervals)
+    so a job that finished before the subscription, or a dropped socket, never hangs a wallet.
+    """
+
+    def __init__(self, client: AsyncWalletApiClient, api_key: Optional[str] = None,
+                 socket_url: Optional[str] = None, timeout: float = JOB_TIMEOUT_SECONDS):
+        self.client = client
+        self.api_key = api_key
+        self.socket_url = socket_url or JOB_SOCKET_URL or default_socket_url(client.base_url)
+        self.timeout = timeout
+        self.progress: Dict[str, Any] = {}
+        self.events_received = 0
+        self.polls = 0
+        self._waiters: Dict[str, asyncio.Future] = {}
+        self._sio = None
+
+    @property
+    def connected(self) -> bool:
+        return self._sio is not None and self._sio.connected
+
+    async def connect(self) -> bool:
+        """Open the progress socket; returns False (and polling is used) if that is not possible."""
+        try:
+            import socketio
+        except ImportError:
+            print("python-socketio not installed; following jobs by polling /jobs/:jobId/progress")
+            return False
+        sio = socketio.AsyncClient(reconnection=True)
+
+        async def on_progress(data):
+            self.events_received += 1
+            self.progress[data.get("jobId")] = data.get("progress")
+
+        async def on_completed(data):
+            self.events_received += 1
+            self._resolve(data.get("jobId"), {"status": "completed", "result": data.get("result")})
+
+        async def on_failed(data):
+            self.events_received += 1
+            self._resolve(data.get("jobId"), {"status": "failed", "error": data.get("error")})
+
+        sio.on("job-progress", on_progress, namespace=JOB_NAMESPACE)
+        sio.on("job-completed", on_completed, namespace=JOB_NAMESPACE)
+        sio.on("job-failed", on_failed, namespace=JOB_NAMESPACE)
+        headers = {"x-api-key": self.api_key} if self.api_key else {}
+        try:
+            await sio.connect(self.socket_url, namespaces=[JOB_NAMESPACE], headers=headers, transports=["websocket"])
+        except Exception as e:
+            print(f"Could not connect to {self.socket_url}{JOB_NAMESPACE} ({e}); following jobs by polling")
+            return False
+        self._sio = sio
+        print(f"Following jobs over {self.socket_url}{JOB_NAMESPACE}")
+        return True
+
+    async def close(self) -> None:
+        if self._sio is not None:
+            await self._sio.disconnect()
+            self._sio = None
+
+    def _resolve(self, job_id: Optional[str], outcome: Dict) -> None:
+        waiter = self._waiters.get(job_id)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(outcome)
+
+    async def _emit(self, event: str, job_id: str) -> None:
+        if self.connected:
+            try:
+                await self._sio.emit(event, {"jobId": job_id}, namespace=JOB_NAMESPACE)
+            except Exception as e:
+                print(f"Socket emit {event} failed for job {job_id}: {e}")
+
+    async def _poll(self, job_id: str) -> Optional[Dict]:
+        """Final outcome from GET /jobs/:jobId/progress, or None while the job is still running."""
+        self.polls += 1
+        # request() rather than get(): job state must never come from the response cache
+        progress = await self.client.request("GET", f"/jobs/{job_id}/progress")
+        self.progress[job_id] = progress.get("progress")
+        if progress.get("status") not in FINAL_STATES:
+            return None
+        if progress["status"] == "completed":
+            return {"status": "completed"}
+        result = await self.client.request("GET", f"/jobs/{job_id}/result")
+        return {"status": "failed", "error": result.get("error")}
+
+    async def wait(self, job_id: str) -> Dict:
+        """Block until the job completes or fails; returns {"status": ..., "result"/"error": ...}."""
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[job_id] = waiter
+        await self._emit("subscribe-to-job", job_id)
+        deadline = time.monotonic() + self.timeout
+        interval = JOB_POLL_INTERVAL
+        try:
+            while True:
+                try:
+                    outcome = await self._poll(job_id)
+                except Exception as e:
+                    return {"status": "failed", "error": f"progress check failed: {e}"}
+                if outcome is not None:
+                    return outcome
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return {"status": "timeout", "error": f"not finished after {self.timeout:.0f}s"}
+                wait_for = SOCKET_POLL_INTERVAL if self.connected else interval
+                try:
+                    return await asyncio.wait_for(asyncio.shield(waiter), timeout=min(wait_for, remaining))
+                except asyncio.TimeoutError:
+                    interval = min(interval * 1.5, JOB_POLL_MAX_INTERVAL)
+        finally:
+            self._waiters.pop(job_id, None)
+            await self._emit("unsubscribe-from-job", job_id)
+
+    def report(self) -> str:
+        mode = "socket + polling" if self.connected else "polling"
+        return f"Jobs ({mode}): {self.events_received} socket events, {self.polls} progress polls"
+
+
+async def run_job(client: AsyncWalletApiClient, watcher: JobWatcher, endpoint: str, payload: Dict) -> Dict:
+    submitted = await post_async(client, endpoint, payload)
+    if not submitted or not submitted.get("jobId"):
+        return {"status": "failed", "error": f"could not submit {endpoint}"}
+    return await watcher.wait(str(submitted["jobId"]))
+
+
+async def prepare_wallet(client: AsyncWalletApiClient, watcher: JobWatcher, wallet_address: str) -> Optional[str]:
+    """Run sync then analyze jobs for a cold wallet; returns an error message, or None on success."""
+    synced = await run_job(client, watcher, "/jobs/wallets/sync", {"walletAddress": wallet_address, "fetchAll": True})
+    if synced["status"] != "completed":
+        return f"sync job {synced['status']}: {synced.get('error')}"
+    analyzed = await run_job(client, watcher, "/jobs/wallets/analyze",
+                             {"walletAddress": wallet_address, "analysisTypes": ANALYSIS_TYPES})
+    if analyzed["status"] != "completed":
+        return f"analyze job {analyzed['status']}: {analyzed.get('error')}"
+    return None
+
+
+async def wallet_statuses(client: AsyncWalletApiClient, wallets: List[str]) -> Dict[str, str]:
+    """wallet -> READY/STALE/MISSING/...; if the status call fails every wallet is treated as stale."""
+    response = await post_async(client, "/analyses/wallets/status", {"walletAddresses": wallets}, idempotent=True)
+    if not response:
+        return {address: "STALE" for address in wallets}
+    return {s.get("walletAddress"): s.get("status") for s in response.get("statuses", [])}
+
+
+async def run_orchestrated_batch(wallets: Iterable[str], output_path: str, api_key: Optional[str] = None,
+                                 params: Optional[Dict] = None, concurrency: int = BATCH_CONCURRENCY,
+                                 max_pending_jobs: int = MAX_PENDING_JOBS, use_socket: bool = True) -> Dict[str, int]:
+    """Like fetch_wallet_data_complete.run_batch(), but cold wallets are synced through backend jobs first.
+
+    Up to max_pending_jobs wallets wait on jobs at once while `concurrency` fetch workers
+    drain the wallets that are ready, streaming each record to NDJSON.
+    """
+    stats = {"written": 0, "failed": 0, "synced": 0, "job_failures": 0}
+    ready: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    pending_jobs = asyncio.Semaphore(max_pending_jobs)
+
+    async with AsyncWalletApiClient(API_BASE_URL, api_key, pool_size=max(concurrency * 4, 20),
+                                    cache=complete.response_cache) as client:
+        watcher = JobWatcher(client, api_key)
+        if use_socket:
+            await watcher.connect()
+
+        async def through_jobs(address: str):
+            try:
+                error = await prepare_wallet(client, watcher, address)
+                if error:
+                    print(f"ERROR: {address}: {error}")
+                    stats["job_failures"] += 1
+                    return
+                stats["synced"] += 1
+                if complete.response_cache is not None:
+                    # Anything cached before the sync describes the old state of the wallet
+                    complete.response_cache.invalidate(f"/wallets/{address}/")
+                await ready.put(address)
+            finally:
+                pending_jobs.release()
+
+        async def producer():
+            job_tasks = []
+            for chunk in chunked(wallets, STATUS_CHUNK_SIZE):
+                statuses = await wallet_statuses(client, chunk)
+                for address in chunk:
+                    if statuses.get(address, "STALE") in NEEDS_SYNC:
+                        await pending_jobs.acquire()
+                        job_tasks.append(asyncio.create_task(through_jobs(address)))
+                    else:
+                        await ready.put(address)
+            await asyncio.gather(*job_tasks)
+            for _ in range(concurrency):
+                await ready.put(None)
+
+        async def worker(out):
+            while True:
+                address = await ready.get()
+                if address is None:
+                    return
+                summary, pnl, behavior, tokens = await fetch_wallet_sections(address, api_key, params, client)
+                failed = missing_section(summary, pnl, behavior, tokens)
+                if failed:
+                    print(f"ERROR: Failed to fetch {failed} for {address}")
+                    stats["failed"] += 1
+                    continue
+                record = build_agent_input(address, summary, pnl, behavior, tokens, params)
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                if complete.results_store is not None:
+                    complete.results_store.save_agent_input(record)
+                stats["written"] += 1
+
+        try:
+            with open(output_path, "w", encoding="utf-8") as out:
+                await asyncio.gather(producer(), *(worker(out) for _ in range(concurrency)))
+        finally:
+            await watcher.close()
+        print(watcher.report())
+        print(client.stats.report())
+    return stats
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Sync cold wallets through backend jobs, then build agent_input records.")
+    parser.add_argument("wallets", help="File with one wallet address per line ('-' for stdin)")
+    parser.add_argument("--output", default="agent_inputs.ndjson")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="Wallets fetched at the same time")
+    parser.add_argument("--max-pending-jobs", type=int, default=MAX_PENDING_JOBS,
+                        help="Wallets with sync/analyze jobs in flight at the same time")
+    parser.add_argument("--poll-only", action="store_true", help="Do not use the /job-progress socket")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the on-disk response cache")
+    parser.add_argument("--metrics", metavar="FILE", default=METRICS_FILE,
+                        help="Write request/LLM/sanitize metrics at exit: Prometheus text for .prom/.txt, JSON otherwise")
+    args = parser.parse_args(argv)
+    export_at_exit(args.metrics)
+
+    if not API_KEY or API_KEY == "your-api-key-here":
+        print("ERROR: Please set your API key in the .env file")
+        return
+    if args.no_cache:
+        complete.response_cache = None
+
+    params = {}
+    if START_DATE and END_DATE:
+        params["startDate"] = START_DATE
+        params["endDate"] = END_DATE
+
+    print(f"API Base URL: {API_BASE_URL}")
+    started = time.perf_counter()
+    stats = asyncio.run(run_orchestrated_batch(read_wallet_list(args.wallets), args.output, API_KEY, params,
+                                               concurrency=args.concurrency, max_pending_jobs=args.max_pending_jobs,
+                                               use_socket=not args.poll_only))
+    elapsed = time.perf_counter() - started
+    print(f"\n=== ORCHESTRATED BATCH COMPLETE ===")
+    print(f"Written: {stats['written']} | Failed: {stats['failed']} | "
+          f"Synced via jobs: {stats['synced']} | Job failures: {stats['job_failures']}")
+    print(f"Elapsed: {elapsed:.1f}s ({stats['written'] / elapsed if elapsed else 0:.2f} wallets/s)")
+    print(f"Agent inputs streamed to {args.output}")
+    if complete.response_cache:
+        print(complete.response_cache.stats.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Offline batch-job mode for LLM wallet analysis.
+
+For overnight scoring the per-request chat API is the wrong tool: this module turns
+agent_input records into a Batch-API style JSONL of chat requests (one line per wallet,
+custom_id = wallet address), and ingests the matching results file back into
+smart_analysis_<addr>.md files.
+
+    python llm_batch.py build agent_inputs.ndjson --output batch_requests.jsonl
+    python llm_batch.py submit batch_requests.jsonl            # OpenAI Batch API
+    python llm_batch.py download <batch_id> --output batch_results.jsonl
+    python llm_batch.py ingest batch_results.jsonl agent_inputs.ndjson
+
+`echo` is a local stand-in for the provider. It answers every request in a requests file
+with a result line that echoes the request, so build and ingest can be exercised
+end to end offline.
+"""
+
+import argparse
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from llm_cache import estimate_cost
+from run_smart_analysis import (LLM_PARAMS, MODEL, build_messages, is_unchanged, iter_agent_inputs,
+                                load_smart_prompt, save_analysis)
+
+# OpenAI Batch API limit is 50,000 requests per input file
+MAX_REQUESTS_PER_FILE = 50_000
+CHAT_COMPLETIONS_URL = "/v1/chat/completions"
+BATCH_PRICE_DISCOUNT = 0.5  # Batch API bills at half the synchronous price
+
+
+def batch_request(wallet_data: Dict, smart_prompt: str) -> Dict:
+    """One Batch API request line for a wallet, with the same messages run_smart_analysis sends."""
+    return {
+        "custom_id": wallet_data["wallet_address"],
+        "method": "POST",
+        "url": CHAT_COMPLETIONS_URL,
+        "body": {"model": MODEL, "messages": build_messages(smart_prompt, wallet_data), **LLM_PARAMS},
+    }
+
+
+def part_path(output: str, part: int) -> str:
+    path = Path(output)
+    return str(path.with_name(f"{path.stem}.part{part:03d}{path.suffix}"))
+
+
+def build_requests(input_paths: List[str], output: str, max_per_file: int = MAX_REQUESTS_PER_FILE) -> Dict[str, int]:
+    """Write request JSONL for every analyzable wallet; splits into .partNNN files past max_per_file."""
+    smart_prompt = load_smart_prompt()
+    stats = {"requests": 0, "unchanged": 0, "duplicates": 0, "failed": 0, "files": 0}
+    seen = set()
+    out = None
+    written_in_file = 0
+    paths_written = []
+    try:
+        for wallet_data in iter_agent_inputs(input_paths):
+            address = wallet_data.get("wallet_address")
+            if address in seen:
+                stats["duplicates"] += 1  # custom_id must be unique within a batch
+                continue
+            seen.add(address)
+            if is_unchanged(wallet_data):
+                stats["unchanged"] += 1
+                continue
+            try:
+                line = json.dumps(batch_request(wallet_data, smart_prompt))
+            except Exception as e:
+                print(f"❌ Could not format {address}: {e}")
+                stats["failed"] += 1
+                continue
+            if out is None or written_in_file >= max_per_file:
+                if out is not None:
+                    out.close()
+                paths_written.append(part_path(output, len(paths_written) + 1))
+                out = open(paths_written[-1], "w", encoding="utf-8")
+                written_in_file = 0
+            out.write(line + "\n")
+            written_in_file += 1
+            stats["requests"] += 1
+    finally:
+        if out is not None:
+            out.close()
+    # A single file keeps the plain output name
+    if len(paths_written) == 1:
+        os.replace(paths_written[0], output)
+        paths_written = [output]
+    stats["files"] = len(paths_written)
+    for path in paths_written:
+        print(f"📦 {path}")
+    return stats
+
+
+def iter_results(path: str) -> Iterator[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def ingest_results(results_path: str, input_paths: List[str]) -> Dict[str, float]:
+    """Join batch results back to their agent inputs by wallet address and write the analyses."""
+    stats = {"written": 0, "errors": 0, "unmatched": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0}
+    # Only the fields save_analysis needs are kept per wallet, not whole records
+    headers = {}
+    for wallet_data in iter_agent_inputs(input_paths):
+        headers[wallet_data["wallet_address"]] = {
+            "wallet_address": wallet_data["wallet_address"],
+            "pnl_overview": {"data_from": wallet_data.get("pnl_overview", {}).get("data_from", "N/A")},
+        }
+        if wallet_data.get("date_range"):
+            headers[wallet_data["wallet_address"]]["date_range"] = wallet_data["date_range"]
+
+    for result in iter_results(results_path):
+        address = result.get("custom_id")
+        response = result.get("response") or {}
+        if result.get("error") or response.get("status_code") != 200:
+            print(f"❌ {address}: {result.get('error') or response.get('body')}")
+            stats["errors"] += 1
+            continue
+        if address not in headers:
+            print(f"⚠️  {address}: no matching agent input")
+            stats["unmatched"] += 1
+            continue
+        body = response["body"]
+        usage = body.get("usage") or {}
+        stats["prompt_tokens"] += usage.get("prompt_tokens", 0)
+        stats["completion_tokens"] += usage.get("completion_tokens", 0)
+        stats["cost_usd"] += BATCH_PRICE_DISCOUNT * estimate_cost(
+            body.get("model", MODEL), usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0))
+        save_analysis(headers[address], body["choices"][0]["message"]["content"] or "", body.get("model", MODEL))
+        stats["written"] += 1
+    return stats
+
+
+def echo_results(requests_path: str, output: str) -> int:
+    """Local stand-in for the provider: answer each request with a result that echoes it."""
+    count = 0
+    with open(output, "w", encoding="utf-8") as out:
+        for request in iter_results(requests_path):
+            body = request["body"]
+            prompt = "\n".join(m["content"] for m in body["messages"])
+            content = f"ECHO {request['custom_id']}\n\n{body['messages'][-1]['content']}"
+            out.write(json.dumps({
+                "id": f"batch_req_{count}",
+                "custom_id": request["custom_id"],
+                "response": {
+                    "status_code": 200,
+                    "request_id": f"echo-{count}",
+                    "body": {
+                        "object": "chat.completion",
+                        "model": body["model"],
+                        "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                                     "finish_reason": "stop"}],
+                        "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4},
+                    },
+                },
+                "error": None,
+            }) + "\n")
+            count += 1
+    return count
+
+
+def submit_batch(requests_path: str, client=None) -> str:
+    """Upload a requests file and start an OpenAI batch job; returns the batch id."""
+    if client is None:
+        from openai import OpenAI
+        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    with open(requests_path, "rb") as f:
+        uploaded = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(input_file_id=uploaded.id, endpoint=CHAT_COMPLETIONS_URL, completion_window="24h")
+    return batch.id
+
+
+def download_batch(batch_id: str, output: str, client=None) -> Optional[str]:
+    """Save the results of a finished batch to output; returns the batch status."""
+    if client is None:
+        from openai import OpenAI
+        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    batch = client.batches.retrieve(batch_id)
+    if batch.status != "completed" or not batch.output_file_id:
+        return batch.status
+    with open(output, "wb") as f:
+        f.write(client.files.content(batch.output_file_id).read())
+    return batch.status
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Offline batch-job mode for LLM wallet analysis")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_build = sub.add_parser("build", help="Turn agent_input files into a batch requests JSONL")
+    p_build.add_argument("inputs", nargs="+", help="agent_input .json files or .ndjson batch outputs")
+    p_build.add_argument("--output", default="batch_requests.jsonl")
+    p_build.add_argument("--max-per-file", type=int, default=MAX_REQUESTS_PER_FILE)
+
+    p_ingest = sub.add_parser("ingest", help="Write analyses from a batch results JSONL")
+    p_ingest.add_argument("results", help="Batch results JSONL")
+    p_ingest.add_argument("inputs", nargs="+", help="The agent_input files the requests were built from")
+
+    p_echo = sub.add_parser("echo", help="Offline stand-in: produce a results JSONL echoing each request")
+    p_echo.add_argument("requests")
+    p_echo.add_argument("--output", default="batch_results.jsonl")
+
+    p_submit = sub.add_parser("submit", help="Upload a requests JSONL and create an OpenAI batch")
+    p_submit.add_argument("requests")
+
+    p_download = sub.add_parser("download", help="Download the results of a completed OpenAI batch")
+    p_download.add_argument("batch_id")
+    p_download.add_argument("--output", default="batch_results.jsonl")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        stats = build_requests(args.inputs, args.output, args.max_per_file)
+        print(f"🧾 {stats['requests']} requests in {stats['files']} file(s); "
+              f"{stats['unchanged']} unchanged, {stats['duplicates']} duplicates, {stats['failed']} failed")
+    elif args.command == "ingest":
+        stats = ingest_results(args.results, args.inputs)
+        print(f"💾 {stats['written']} analyses written; {stats['errors']} errors, {stats['unmatched']} unmatched")
+        print(f"🧾 {stats['prompt_tokens']:,} prompt + {stats['completion_tokens']:,} completion tokens, "
+              f"~${stats['cost_usd']:.4f} at batch pricing")
+    elif args.command == "echo":
+        print(f"🔁 Echoed {echo_results(args.requests, args.output)} requests to {args.output}")
+    elif args.command == "submit":
+        print(f"🚀 Submitted batch {submit_batch(args.requests)}")
+    elif args.command == "download":
+        status = download_batch(args.batch_id, args.output)
+        print(f"📥 Batch {args.batch_id}: {status}" + (f" -> {args.output}" if status == "completed" else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+Content-addressed cache for LLM chat completions.
+
+The key is a SHA-256 of the full message list plus model and sampling parameters, so
+re-running an analysis with byte-identical prompt, wallet data and settings returns the
+stored answer instantly instead of paying for a new completion. Entries older than
+max_age are ignored and purged, and the store is capped by total size, evicting the
+least recently used entries first.
+
+Disable with LLM_CACHE_DISABLED=1.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from llm_scheduler import LLMScheduler, estimate_request_tokens
+from metrics import registry
+
+# Load environment variables from .env file
+load_dotenv()
+
+# --- Configuration ---
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_responses.sqlite")
+LLM_CACHE_MAX_AGE = float(os.getenv("LLM_CACHE_MAX_AGE", str(30 * 24 * 3600)))  # seconds
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(100 * 1024 * 1024)))
+LLM_CACHE_DISABLED = os.getenv("LLM_CACHE_DISABLED", "").lower() in ("1", "true", "yes")
+
+# USD per 1M tokens (input, output); prompt tokens served from the provider's prompt cache bill at a discount
+CACHED_INPUT_DISCOUNT = 0.5
+MODEL_PRICING = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4": (30.00, 60.00),
+    "claude-3-5-sonnet-20241022": (3.00, 15.00),
+    "claude-3-5-haiku-20241022": (0.80, 4.00),
+    "claude-sonnet-4-20250514": (3.00, 15.00),
+}
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_prompt_tokens: int = 0) -> float:
+    """Estimated USD cost of a completion; unknown models are priced as gpt-4o."""
+    price_in, price_out = MODEL_PRICING.get(model, MODEL_PRICING["gpt-4o"])
+    billed_prompt = prompt_tokens - cached_prompt_tokens * (1 - CACHED_INPUT_DISCOUNT)
+    return (billed_prompt * price_in + completion_tokens * price_out) / 1_000_000
+
+
+def cached_prompt_tokens(usage: Any) -> int:
+    """Prompt tokens the provider served from its prompt cache (usage.prompt_tokens_details.cached_tokens)."""
+    details = getattr(usage, "prompt_tokens_details", None)
+    if isinstance(details, dict):
+        return details.get("cached_tokens") or 0
+    return getattr(details, "cached_tokens", 0) or 0
+
+
+@dataclass
+class ProviderUsage:
+    """Token usage reported by the provider across all non-cached calls in this process."""
+    calls: int = 0
+    prompt_tokens: int = 0
+    cached_prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    @property
+    def prompt_cache_ratio(self) -> float:
+        return self.cached_prompt_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def add(self, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> None:
+        self.calls += 1
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cached_prompt_tokens += cached_tokens
+
+    def report(self) -> str:
+        return (f"Provider usage: {self.calls} calls, {self.prompt_tokens:,} prompt tokens "
+                f"({self.cached_prompt_tokens:,} from prompt cache, {self.prompt_cache_ratio:.0%}), "
+                f"{self.completion_tokens:,} completion tokens")
+
+
+provider_usage = ProviderUsage()
+
+
+def request_key(model: str, messages: List[Dict[str, Any]], params: Dict[str, Any]) -> str:
+    material = json.dumps({"model": model, "messages": messages, "params": params},
+                          sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class LLMCacheStats:
+    hits: int = 0
+    misses: int = 0
+    saved_seconds: float = 0.0
+    saved_cost_usd: float = 0.0
+    spent_cost_usd: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["hit_rate"] = self.hit_rate
+        return data
+
+    def report(self) -> str:
+        return (f"LLM cache: {self.hits} hits, {self.misses} misses ({self.hit_rate:.0%} hit rate), "
+                f"saved {self.saved_seconds:.1f}s and ${self.saved_cost_usd:.4f}; spent ${self.spent_cost_usd:.4f} on misses")
+
+
+class LLMCache:
+    """SQLite store of completions keyed by request_key()."""
+
+    def __init__(self, path: str = LLM_CACHE_PATH, max_age: float = LLM_CACHE_MAX_AGE,
+                 max_bytes: int = LLM_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.stats = LLMCacheStats()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        # Connected lazily, like ResponseCache
+        if self._conn is None:
+            self._conn = self._open()
+        return self._conn
+
+    def _open(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS completions (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                content TEXT NOT NULL,
+                prompt_tokens INTEGER NOT NULL,
+                completion_tokens INTEGER NOT NULL,
+                latency REAL NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        db.execute("CREATE INDEX IF NOT EXISTS idx_completions_last_access ON completions(last_access)")
+        db.commit()
+        return db
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached completion for key, or None if missing or older than max_age."""
+        row = self._db.execute(
+            "SELECT model, content, prompt_tokens, completion_tokens, latency, created_at FROM completions WHERE key = ?",
+            (key,),
+        ).fetchone()
+        now = time.time()
+        if row is None or now - row[5] > self.max_age:
+            self.stats.misses += 1
+            if row is not None:
+                self._db.execute("DELETE FROM completions WHERE key = ?", (key,))
+                self._db.commit()
+            return None
+        model, content, prompt_tokens, completion_tokens, latency, _ = row
+        self._db.execute("UPDATE completions SET last_access = ? WHERE key = ?", (now, key))
+        self._db.commit()
+        self.stats.hits += 1
+        registry.inc("llm_cache_hits_total", model=model)
+        self.stats.saved_seconds += latency
+        self.stats.saved_cost_usd += estimate_cost(model, prompt_tokens, completion_tokens)
+        return {"content": content, "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens, "latency": latency}
+
+    def put(self, key: str, model: str, content: str, prompt_tokens: int, completion_tokens: int, latency: float) -> None:
+        size = len(content.encode("utf-8"))
+        now = time.time()
+        self._db.execute(
+            "INSERT OR REPLACE INTO completions (key, model, content, prompt_tokens, completion_tokens, latency, size, created_at, last_access) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, model, content, prompt_tokens, completion_tokens, latency, size, now, now),
+        )
+        self._evict(now)
+        self._db.commit()
+
+    def _evict(self, now: float) -> None:
+        self._db.execute("DELETE FROM completions WHERE created_at < ?", (now - self.max_age,))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM completions ORDER BY last_access ASC").fetchall():
+            self._db.execute("DELETE FROM completions WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def open_default_llm_cache() -> Optional[LLMCache]:
+    """The shared completion cache, or None when LLM_CACHE_DISABLED is set."""
+    if LLM_CACHE_DISABLED:
+        return None
+    return LLMCache()
+
+
+def record_completion(cache: Optional[LLMCache], key: str, model: str, content: str,
+                      prompt_tokens: int, completion_tokens: int, latency: float, cached_tokens: int = 0) -> None:
+    """Count provider usage for a freshly generated completion, then store it and its cost."""
+    provider_usage.add(prompt_tokens, completion_tokens, cached_tokens)
+    cost = estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens)
+    registry.observe("llm_request_seconds", latency, model=model)
+    registry.inc("llm_prompt_tokens_total", prompt_tokens, model=model)
+    registry.inc("llm_cached_prompt_tokens_total", cached_tokens, model=model)
+    registry.inc("llm_completion_tokens_total", completion_tokens, model=model)
+    registry.inc("llm_cost_usd_total", cost, model=model)
+    if cache is not None:
+        cache.stats.spent_cost_usd += cost
+        cache.put(key, model, content, prompt_tokens, completion_tokens, latency)
+
+
+def _record_response(cache: Optional[LLMCache], key: str, model: str, response: Any, latency: float) -> str:
+    content = response.choices[0].message.content or ""
+    usage = getattr(response, "usage", None)
+    record_completion(cache, key, model, content, getattr(usage, "prompt_tokens", 0) or 0,
+                      getattr(usage, "completion_tokens", 0) or 0, latency, cached_prompt_tokens(usage))
+    return content
+
+
+def cached_chat_completion(client, cache: Optional[LLMCache], model: str, messages: List[Dict[str, Any]],
+                           **params: Any) -> str:
+    """client.chat.completions.create(...) returning the message text, served from cache when possible."""
+    return cached_chat_completion_timed(client, cache, model, messages, **params)[0]
+
+
+def cached_chat_completion_timed(client, cache: Optional[LLMCache], model: str, messages: List[Dict[str, Any]],
+                                 **params: Any) -> Tuple[str, Optional[float]]:
+    """cached_chat_completion() plus the provider call's latency, None when the cache answered."""
+    key = request_key(model, messages, params)
+    if cache is not None:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit["content"], None
+
+    started = time.perf_counter()
+    response = client.chat.completions.create(model=model, messages=messages, **params)
+    latency = time.perf_counter() - started
+    return _record_response(cache, key, model, response, latency), latency
+
+
+async def cached_chat_completion_async(client, cache: Optional[LLMCache], model: str, messages: List[Dict[str, Any]],
+                                       scheduler: Optional[LLMScheduler] = None, **params: Any) -> str:
+    """Async twin of cached_chat_completion() for an AsyncOpenAI client.
+
+    Cache misses go through the scheduler's rate limits when one is given; hits never do.
+    """
+    return (await cached_chat_completion_timed_async(client, cache, model, messages, scheduler, **params))[0]
+
+
+async def cached_chat_completion_timed_async(client, cache: Optional[LLMCache], model: str,
+                                             messages: List[Dict[str, Any]], scheduler: Optional[LLMScheduler] = None,
+                                             **params: Any) -> Tuple[str, Optional[float]]:
+    """Async twin of cached_chat_completion_timed(); the latency leaves out time queued in the scheduler."""
+    key = request_key(model, messages, params)
+    if cache is not None:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit["content"], None
+
+    async def call():
+        started = time.perf_counter()
+        response = await client.chat.completions.create(model=model, messages=messages, **params)
+        return response, time.perf_counter() - started
+
+    if scheduler is not None:
+        response, latency = await scheduler.submit(call, estimate_request_tokens(messages, params.get("max_tokens", 0)))
+    else:
+        response, latency = await call()
+    return _record_response(cache, key, model, response, latency), latency
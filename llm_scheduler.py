@@ -0,0 +1,155 @@
+"""
+Rate-limit aware scheduler for running many LLM analyses concurrently.
+
+Two token buckets gate every call: one for requests per minute and one for tokens per minute.
+The token cost of a call is estimated up front from the prompt text plus max_tokens. On a 429
+the scheduler waits (honouring Retry-After), shrinks both rates multiplicatively, then grows
+them back slowly as calls succeed (AIMD), so a batch settles just under the provider's limit.
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from dotenv import load_dotenv
+
+from api_client import backoff_delay, retry_after_seconds
+
+# Load environment variables from .env file
+load_dotenv()
+
+# --- Configuration ---
+LLM_RPM = float(os.getenv("LLM_RPM", "500"))
+LLM_TPM = float(os.getenv("LLM_TPM", "30000"))
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "16"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "6"))
+
+CHARS_PER_TOKEN = 4  # rough average for English/markdown prompts
+MIN_RATE_SCALE = 0.1
+
+T = TypeVar("T")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def estimate_request_tokens(messages: List[Dict[str, Any]], max_tokens: int = 0) -> int:
+    """TPM cost of a chat request as providers count it: prompt tokens plus the max_tokens reservation."""
+    return sum(estimate_tokens(str(m.get("content", ""))) for m in messages) + (max_tokens or 0)
+
+
+class TokenBucket:
+    """Refills continuously at per_minute/60 units per second, up to capacity (one minute's worth by default)."""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.capacity = capacity if capacity is not None else per_minute
+        self.rate = per_minute / 60.0
+        self.available = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def set_rate(self, per_minute: float) -> None:
+        self._refill()
+        self.rate = per_minute / 60.0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float) -> None:
+        # A single request larger than the bucket would never fit; let it through once the bucket is full
+        amount = min(amount, self.capacity)
+        async with self._lock:  # first come, first served
+            while True:
+                self._refill()
+                if self.available >= amount:
+                    self.available -= amount
+                    return
+                await asyncio.sleep((amount - self.available) / self.rate)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    return getattr(error, "status_code", None) == 429
+
+
+@dataclass
+class SchedulerStats:
+    completed: int = 0
+    failed: int = 0
+    rate_limited: int = 0
+    estimated_tokens: int = 0
+    started_at: float = 0.0
+    finished_at: float = 0.0
+
+    @property
+    def elapsed(self) -> float:
+        end = self.finished_at or time.perf_counter()
+        return max(end - self.started_at, 1e-9) if self.started_at else 0.0
+
+    @property
+    def per_minute(self) -> float:
+        return self.completed / self.elapsed * 60 if self.elapsed else 0.0
+
+    def report(self, unit: str = "wallets") -> str:
+        return (f"Scheduler: {self.completed} {unit} done, {self.failed} failed, {self.rate_limited} rate-limited retries, "
+                f"{self.elapsed:.1f}s elapsed, {self.per_minute:.1f} {unit}/min sustained")
+
+
+class LLMScheduler:
+    """Runs coroutine factories under RPM/TPM buckets and a concurrency cap, retrying 429s adaptively."""
+
+    def __init__(self, rpm: float = LLM_RPM, tpm: float = LLM_TPM, max_concurrency: int = LLM_CONCURRENCY,
+                 max_retries: int = LLM_MAX_RETRIES):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_retries = max_retries
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.scale = 1.0
+        self.stats = SchedulerStats()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    def _apply_scale(self) -> None:
+        self.requests.set_rate(self.rpm * self.scale)
+        self.tokens.set_rate(self.tpm * self.scale)
+
+    def _on_rate_limit(self) -> None:
+        self.stats.rate_limited += 1
+        self.scale = max(MIN_RATE_SCALE, self.scale * 0.7)
+        self._apply_scale()
+
+    def _on_success(self) -> None:
+        if self.scale < 1.0:
+            self.scale = min(1.0, self.scale + 0.02)
+            self._apply_scale()
+
+    async def submit(self, call: Callable[[], Awaitable[T]], estimated_tokens: int) -> T:
+        """Await call() once both buckets allow it; 429s are retried with backoff, other errors propagate."""
+        if not self.stats.started_at:
+            self.stats.started_at = time.perf_counter()
+        attempt = 0
+        while True:
+            await self.requests.acquire(1)
+            await self.tokens.acquire(estimated_tokens)
+            self.stats.estimated_tokens += estimated_tokens
+            try:
+                async with self._semaphore:
+                    result = await call()
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt >= self.max_retries:
+                    self.stats.failed += 1
+                    self.stats.finished_at = time.perf_counter()
+                    raise
+                self._on_rate_limit()
+                response = getattr(e, "response", None)
+                await asyncio.sleep(backoff_delay(attempt, retry_after_seconds(response) if response is not None else None))
+                attempt += 1
+                continue
+            self._on_success()
+            self.stats.completed += 1
+            self.stats.finished_at = time.perf_counter()
+            return result
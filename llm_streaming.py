@@ -0,0 +1,90 @@
+"""
+Streaming chat completions with perceived-latency metrics.
+
+stream_chat_completion() hands each text delta to a callback as soon as it arrives and
+returns the full text together with time-to-first-token, tokens/sec and total latency.
+Metrics can be appended to a JSONL log so models can be compared on speed.
+"""
+
+import json
+import os
+import time
+from dataclasses import dataclass, asdict, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from llm_cache import cached_prompt_tokens
+from llm_scheduler import estimate_tokens
+
+# Load environment variables from .env file
+load_dotenv()
+
+# --- Configuration ---
+STREAM_METRICS_FILE = os.getenv("STREAM_METRICS_FILE", "llm_stream_metrics.jsonl")
+
+
+@dataclass
+class StreamMetrics:
+    model: str
+    wallet_address: Optional[str] = None
+    time_to_first_token: Optional[float] = None  # seconds from request to first content delta
+    total_latency: float = 0.0
+    completion_tokens: int = 0
+    prompt_tokens: int = 0
+    cached_prompt_tokens: int = 0  # served from the provider's prompt cache
+    cached: bool = False
+    recorded_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+
+    @property
+    def tokens_per_second(self) -> float:
+        """Generation speed after the first token arrived."""
+        generating = self.total_latency - (self.time_to_first_token or 0.0)
+        return self.completion_tokens / generating if generating > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["tokens_per_second"] = self.tokens_per_second
+        return data
+
+    def report(self) -> str:
+        ttft = f"{self.time_to_first_token:.2f}s" if self.time_to_first_token is not None else "n/a"
+        return (f"TTFT {ttft} | {self.tokens_per_second:.1f} tokens/s | total {self.total_latency:.2f}s | "
+                f"{self.completion_tokens} completion tokens, {self.cached_prompt_tokens}/{self.prompt_tokens} prompt tokens "
+                f"from provider cache ({self.model}{', cached' if self.cached else ''})")
+
+
+def stream_chat_completion(client, model: str, messages: List[Dict[str, Any]], on_token: Callable[[str], None],
+                           **params: Any) -> Tuple[str, StreamMetrics]:
+    """Stream a completion, calling on_token(delta) per chunk; returns (full_text, metrics)."""
+    metrics = StreamMetrics(model=model)
+    parts = []
+    started = time.perf_counter()
+    stream = client.chat.completions.create(model=model, messages=messages, stream=True,
+                                            stream_options={"include_usage": True}, **params)
+    for chunk in stream:
+        usage = getattr(chunk, "usage", None)
+        if usage:
+            metrics.prompt_tokens = usage.prompt_tokens or 0
+            metrics.completion_tokens = usage.completion_tokens or 0
+            metrics.cached_prompt_tokens = cached_prompt_tokens(usage)
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            if metrics.time_to_first_token is None:
+                metrics.time_to_first_token = time.perf_counter() - started
+            parts.append(delta)
+            on_token(delta)
+    metrics.total_latency = time.perf_counter() - started
+    text = "".join(parts)
+    if not metrics.completion_tokens:
+        # Provider did not send a usage chunk; fall back to the same estimate the scheduler uses
+        metrics.completion_tokens = estimate_tokens(text)
+    return text, metrics
+
+
+def record_stream_metrics(metrics: StreamMetrics, path: str = STREAM_METRICS_FILE) -> None:
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(metrics.as_dict()) + "\n")
@@ -0,0 +1,181 @@
+"""
+In-process metrics for the fetch and LLM hot paths.
+
+A single module-level registry collects counters and fixed-bucket histograms with labels:
+
+- http_request_seconds / http_response_bytes / http_retries_total per endpoint (api_client)
+- llm_request_seconds, llm_*_tokens_total, llm_cost_usd_total per model (llm_cache)
+- function_seconds per sanitize_* / format step (@registry.timed_function)
+
+At the end of a run the scripts write it with --metrics FILE (or METRICS_FILE), as
+Prometheus text exposition (.prom / .txt) or a JSON summary with estimated percentiles.
+"""
+
+import atexit
+import json
+import os
+import re
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# --- Configuration ---
+METRICS_FILE = os.getenv("METRICS_FILE")  # default for the scripts' --metrics option
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+FAST_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5)
+BYTE_BUCKETS = (1_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000, 20_000_000)
+
+# Address / job id path segments are collapsed so each endpoint is one series;
+# /analyses/wallets/status and /jobs/wallets/sync are literal routes, not ids
+_PATH_IDS = re.compile(r"(?<=/wallets/)[^/?]+(?=/)|(?<=/jobs/)(?!wallets/|queues/)[^/?]+")
+
+LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def endpoint_label(endpoint: str) -> str:
+    """'/wallets/<addr>/summary?x=1' -> '/wallets/{id}/summary'."""
+    return _PATH_IDS.sub("{id}", endpoint.split("?", 1)[0])
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Estimate from bucket counts, interpolating linearly inside the bucket."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= target and bucket_count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (target - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.counters: Dict[LabelKey, float] = {}
+        self.histograms: Dict[LabelKey, Histogram] = {}
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, Any]) -> LabelKey:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = self._key(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = LATENCY_BUCKETS, **labels: Any) -> None:
+        self._observe_key(self._key(name, labels), value, buckets)
+
+    def _observe_key(self, key: LabelKey, value: float, buckets: Sequence[float]) -> None:
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(buckets)
+        histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, buckets: Sequence[float] = LATENCY_BUCKETS, **labels: Any) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, buckets, **labels)
+
+    def timed_function(self, func: Callable) -> Callable:
+        """Decorator recording each call's duration as function_seconds{function=<name>}."""
+        # The label key is built once here: sanitize_* run per record, so per-call overhead matters
+        key = self._key("function_seconds", {"function": func.__name__})
+        perf_counter = time.perf_counter
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._observe_key(key, perf_counter() - started, FAST_BUCKETS)
+        return wrapper
+
+    def reset(self) -> None:
+        self.counters.clear()
+        self.histograms.clear()
+
+    # --- Export ---
+    @staticmethod
+    def _labels(labels: Tuple[Tuple[str, str], ...], extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(labels) + ([extra] if extra else [])
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+    def prometheus_text(self) -> str:
+        lines: List[str] = []
+        typed = set()
+        for (name, labels), value in sorted(self.counters.items()):
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{self._labels(labels)} {value:g}")
+        for (name, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{self._labels(labels, ('le', f'{bound:g}'))} {cumulative}")
+            lines.append(f"{name}_bucket{self._labels(labels, ('le', '+Inf'))} {histogram.count}")
+            lines.append(f"{name}_sum{self._labels(labels)} {histogram.sum:g}")
+            lines.append(f"{name}_count{self._labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict[str, Any]:
+        counters: Dict[str, List[Dict[str, Any]]] = {}
+        for (name, labels), value in sorted(self.counters.items()):
+            counters.setdefault(name, []).append({"labels": dict(labels), "value": value})
+        histograms: Dict[str, List[Dict[str, Any]]] = {}
+        for (name, labels), h in sorted(self.histograms.items(), key=lambda item: item[0]):
+            histograms.setdefault(name, []).append({
+                "labels": dict(labels), "count": h.count, "sum": h.sum,
+                "mean": h.sum / h.count if h.count else 0.0,
+                "p50": h.quantile(0.5), "p95": h.quantile(0.95), "p99": h.quantile(0.99),
+            })
+        return {"counters": counters, "histograms": histograms}
+
+    def write(self, path: str) -> None:
+        """Prometheus text for .prom/.txt paths, JSON summary otherwise."""
+        with open(path, "w", encoding="utf-8") as f:
+            if path.endswith((".prom", ".txt")):
+                f.write(self.prometheus_text())
+            else:
+                json.dump(self.summary(), f, indent=2)
+
+
+registry = MetricsRegistry()
+
+
+def export_at_exit(path: Optional[str]) -> None:
+    """Write the registry to path when the process exits, whichever way main() returns."""
+    if path:
+        atexit.register(registry.write, path)
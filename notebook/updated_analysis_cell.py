@@ -3,12 +3,19 @@
 
 import json
 import os
+import sys
 from pathlib import Path
 from openai import OpenAI
 
+sys.path.append('..')
+from llm_cache import LLMCache, cached_chat_completion
+
 # Initialize OpenAI client (modern API)
 client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
 
+# Re-running the cell with an unchanged prompt/data/model is served from this cache
+llm_cache = LLMCache('../.cache/llm_responses.sqlite')
+
 def load_analysis_prompt():
     """Load the professional analysis prompt template"""
     prompt_path = Path('../wallet_analysis_prompt_v1.txt')
@@ -90,7 +97,9 @@ def analyze_wallet(agent_input):
     
     # Call OpenAI with modern API
     try:
-        response = client.chat.completions.create(
+        return cached_chat_completion(
+            client,
+            llm_cache,
             model="gpt-4o",  # Using GPT-4 Omni for best analysis
             messages=[
                 {
@@ -107,8 +116,6 @@ def analyze_wallet(agent_input):
             top_p=0.9
         )
         
-        return response.choices[0].message.content
-        
     except Exception as e:
         return f"Error in analysis: {str(e)}"
 
@@ -130,4 +137,5 @@ with open(output_path, 'w') as f:
     f.write(f"# Wallet Analysis: {wallet_data['wallet_address']}\n\n")
     f.write(analysis_result)
 
-print(f"\n💾 Analysis saved to: {output_path}")
\ No newline at end of file
+print(f"\n💾 Analysis saved to: {output_path}")
+print(f"🗄️  {llm_cache.stats.report()}")
\ No newline at end of file
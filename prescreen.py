@@ -0,0 +1,238 @@
+"""
+Deterministic pre-screening in front of the LLM analysis.
+
+Many wallets are clear-cut: high-frequency bots, wallets with a handful of trades, or
+dormant wallets with nothing left in them. Threshold rules over the sanitized behavior,
+pnl_overview and summary sections catch those and produce a templated report instead
+of a GPT-4o call. Everything else goes to the LLM as before, including any wallet
+missing a field that a rule needs.
+
+Rules are checked in order and the first one whose checks all hold decides the route.
+Every decision is counted in the metrics registry and stored in the results store's
+routing table together with how long it took (the LLM call, for LLM-routed wallets), so
+the calls and latency saved can be measured:
+
+    wallet-agent results routing --days 7
+
+Disable with PRESCREEN_DISABLED=1 or the analysis scripts' --no-prescreen flag.
+"""
+
+import functools
+import hashlib
+import os
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from metrics import registry
+
+# Load environment variables from .env file
+load_dotenv()
+
+# --- Configuration ---
+PRESCREEN_DISABLED = os.getenv("PRESCREEN_DISABLED", "").lower() in ("1", "true", "yes")
+BOT_MIN_FLIPPER_SCORE = float(os.getenv("PRESCREEN_BOT_FLIPPER_SCORE", "0.95"))
+BOT_MIN_UNDER_1H = float(os.getenv("PRESCREEN_BOT_UNDER_1H", "0.9"))  # share of trades, 0-1
+BOT_MIN_TRADES = int(os.getenv("PRESCREEN_BOT_MIN_TRADES", "200"))
+MIN_TRADES = int(os.getenv("PRESCREEN_MIN_TRADES", "5"))
+DUST_SOL = float(os.getenv("PRESCREEN_DUST_SOL", "0.01"))
+DORMANT_DAYS = float(os.getenv("PRESCREEN_DORMANT_DAYS", "30"))
+# Wallets whose PnL is this large (either way) are worth a full analysis whatever they look like
+NOTABLE_PNL_SOL = float(os.getenv("PRESCREEN_NOTABLE_PNL_SOL", "1000"))
+
+PRESCREEN_MODEL = "prescreen"  # model column of templated analyses in the results store
+ROUTE_TEMPLATE = "template"
+ROUTE_LLM = "llm"
+
+
+@dataclass(frozen=True)
+class Check:
+    section: str
+    field: str
+    op: str  # ">=", "<=", "<", "abs<" or "days_ago>="
+    threshold: float
+
+    def value(self, agent_input: Dict) -> Any:
+        return (agent_input.get(self.section) or {}).get(self.field)
+
+    def holds(self, value: Any, now: float) -> bool:
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            return False  # missing or malformed: not clear-cut
+        if self.op == ">=":
+            return value >= self.threshold
+        if self.op == "<=":
+            return value <= self.threshold
+        if self.op == "<":
+            return value < self.threshold
+        if self.op == "abs<":
+            return abs(value) < self.threshold
+        if self.op == "days_ago>=":
+            return value > 0 and (now - value) / 86400 >= self.threshold
+        raise ValueError(f"Unknown check operator {self.op!r}")
+
+    def describe(self, value: Any, now: float) -> str:
+        if self.op == "days_ago>=":
+            return f"{self.field} {(now - value) / 86400:.0f} days ago (>= {self.threshold:g})"
+        if self.op == "abs<":
+            return f"|{self.field}| {abs(value):.4g} < {self.threshold:g}"
+        return f"{self.field} {value:.4g} {self.op} {self.threshold:g}"
+
+
+@dataclass(frozen=True)
+class Rule:
+    label: str
+    title: str
+    summary: str
+    checks: Tuple[Check, ...]
+
+
+RULES: Tuple[Rule, ...] = (
+    Rule("insufficient_activity", "Insufficient trading activity",
+         "Too few trades for a behavioral or performance read; re-analyze once the wallet has more history.",
+         (Check("behavior", "total_trade_count", "<", MIN_TRADES),)),
+    Rule("bot", "Automated high-frequency trading (bot)",
+         "Near-total flipping with sub-hour holds across hundreds of trades is characteristic of an automated "
+         "strategy; copy-trading or conviction signals do not apply.",
+         (Check("behavior", "flipper_score", ">=", BOT_MIN_FLIPPER_SCORE),
+          Check("behavior", "percent_trades_under_1hour", ">=", BOT_MIN_UNDER_1H),
+          Check("behavior", "total_trade_count", ">=", BOT_MIN_TRADES),
+          Check("pnl_overview", "realized_pnl", "abs<", NOTABLE_PNL_SOL))),
+    Rule("dormant", "Dormant, emptied wallet",
+         "No SOL left, no open positions of note and no recent activity; nothing current to analyze.",
+         (Check("summary", "current_sol_balance", "<=", DUST_SOL),
+          Check("behavior", "percent_of_value_in_current_holdings", "<=", 1.0),
+          Check("summary", "last_active_timestamp", "days_ago>=", DORMANT_DAYS),
+          Check("pnl_overview", "realized_pnl", "abs<", NOTABLE_PNL_SOL))),
+)
+
+
+# Fields render_report() shows besides the ones the rules check
+REPORT_FIELDS = (
+    ("behavior", "trading_style"),
+    ("pnl_overview", "token_win_rate"),
+    ("behavior", "unique_tokens_traded"),
+    ("pnl_overview", "data_from"),
+)
+
+
+def required_fields(rules: Tuple[Rule, ...] = RULES) -> Dict[str, Tuple[str, ...]]:
+    """agent_input fields the rules and the templated report read, by section (see fetch_plan.py)."""
+    fields: Dict[str, List[str]] = {}
+    pairs = [(check.section, check.field) for rule in rules for check in rule.checks] + list(REPORT_FIELDS)
+    for section, name in pairs:
+        if name not in fields.setdefault(section, []):
+            fields[section].append(name)
+    return {section: tuple(names) for section, names in fields.items()}
+
+
+@functools.lru_cache(maxsize=None)
+def rules_version(rules: Tuple[Rule, ...] = RULES) -> str:
+    """Short hash of the rules and thresholds, stored with each routing decision."""
+    return hashlib.sha256(repr(rules).encode("utf-8")).hexdigest()[:12]
+
+
+@dataclass
+class Verdict:
+    wallet_address: str
+    route: str                   # ROUTE_TEMPLATE or ROUTE_LLM
+    label: Optional[str] = None  # rule that matched
+    reasons: List[str] = field(default_factory=list)
+    report: Optional[str] = None
+
+
+@dataclass
+class PrescreenStats:
+    """Routing decisions in this process, and the LLM time the routed-to-LLM wallets took."""
+    templated: Counter = field(default_factory=Counter)
+    llm: int = 0
+    llm_timed: int = 0  # LLM routes that called the provider; completion-cache hits take no LLM time
+    llm_seconds: float = 0.0
+
+    @property
+    def screened(self) -> int:
+        return sum(self.templated.values()) + self.llm
+
+    def report(self) -> str:
+        skipped = sum(self.templated.values())
+        text = (f"Pre-screen: {skipped}/{self.screened} wallets answered without the LLM "
+                f"({skipped / self.screened if self.screened else 0:.0%})")
+        if skipped:
+            text += " - " + ", ".join(f"{label} {count}" for label, count in self.templated.most_common())
+        if self.llm_timed and skipped:
+            per_call = self.llm_seconds / self.llm_timed
+            text += f"; ~{skipped * per_call:.0f}s of LLM time saved at {per_call:.1f}s/call"
+        return text
+
+
+prescreen_stats = PrescreenStats()
+
+
+def _fmt(value: Any, spec: str = ".2f", suffix: str = "") -> str:
+    return f"{value:{spec}}{suffix}" if isinstance(value, (int, float)) and not isinstance(value, bool) else "N/A"
+
+
+def render_report(agent_input: Dict, rule: Rule, reasons: List[str]) -> str:
+    """Markdown in place of the LLM analysis (the file header is written by save_analysis)."""
+    pnl = agent_input.get("pnl_overview") or {}
+    behavior = agent_input.get("behavior") or {}
+    summary = agent_input.get("summary") or {}
+    under_1h = behavior.get("percent_trades_under_1hour")
+    lines = [
+        f"## Pre-screen verdict: {rule.title}",
+        "",
+        rule.summary,
+        "",
+        f"_Classified by deterministic pre-screening rules (version {rules_version()}); no LLM analysis was run._",
+        "",
+        "**Matched checks:**",
+        *(f"- {reason}" for reason in reasons),
+        "",
+        "| Metric | Value |",
+        "|---|---|",
+        f"| Trading style | {behavior.get('trading_style') or 'N/A'} |",
+        f"| Realized PnL | {_fmt(pnl.get('realized_pnl'), '.2f', ' SOL')} |",
+        f"| Token win rate | {_fmt(pnl.get('token_win_rate'), '.1f', '%')} |",
+        f"| Trades / unique tokens | {_fmt(behavior.get('total_trade_count'), '.0f')} / "
+        f"{_fmt(behavior.get('unique_tokens_traded'), '.0f')} |",
+        f"| Flipper score | {_fmt(behavior.get('flipper_score'), '.2f')} |",
+        f"| Trades under 1 hour | {_fmt(under_1h * 100 if isinstance(under_1h, (int, float)) else None, '.0f', '%')} |",
+        f"| Current SOL balance | {_fmt(summary.get('current_sol_balance'), '.4f', ' SOL')} |",
+        f"| Data range | {pnl.get('data_from') or 'N/A'} |",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def prescreen(agent_input: Dict, rules: Tuple[Rule, ...] = RULES, now: Optional[float] = None) -> Verdict:
+    """Route one sanitized agent_input: a templated report for clear-cut wallets, otherwise the LLM."""
+    now = time.time() if now is None else now
+    address = agent_input.get("wallet_address", "")
+    for rule in rules:
+        values = [check.value(agent_input) for check in rule.checks]
+        if all(check.holds(value, now) for check, value in zip(rule.checks, values)):
+            reasons = [check.describe(value, now) for check, value in zip(rule.checks, values)]
+            return Verdict(address, ROUTE_TEMPLATE, rule.label, reasons, render_report(agent_input, rule, reasons))
+    return Verdict(address, ROUTE_LLM)
+
+
+def record_route(verdict: Verdict, seconds: Optional[float], store: Any = None) -> None:
+    """Count a finished routing decision; seconds is the LLM call for LLM routes, else the pre-screen itself.
+
+    seconds is None for an LLM route answered from the completion cache: the decision counts,
+    but it is left out of the per-call LLM time.
+    """
+    label = verdict.label or ""
+    registry.inc("prescreen_routes_total", route=verdict.route, label=label)
+    if seconds is not None:
+        registry.observe("prescreen_route_seconds", seconds, route=verdict.route)
+    if verdict.route == ROUTE_TEMPLATE:
+        prescreen_stats.templated[label] += 1
+    else:
+        prescreen_stats.llm += 1
+        if seconds is not None:
+            prescreen_stats.llm_timed += 1
+            prescreen_stats.llm_seconds += seconds
+    if store is not None:
+        store.save_routing(verdict.wallet_address, verdict.route, verdict.label, verdict.reasons, rules_version(), seconds)
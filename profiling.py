@@ -0,0 +1,112 @@
+"""
+Per-stage CPU and memory profiling for the fetch and analysis scripts (--profile).
+
+Each `with profiler.stage("fetch"):` block runs under cProfile and tracemalloc. At the
+end of the run one directory is written with:
+
+- <stage>.prof   raw cProfile data (open with snakeviz or pstats)
+- report.txt     per stage: wall time, peak traced memory, top functions by cumulative
+                 time, and the largest allocation sites still alive when the stage ended
+
+Stages must not overlap: only one cProfile profiler can be active at a time.
+cProfile, pstats and tracemalloc are imported by the first profiled stage, so a run
+without --profile does not load them.
+"""
+
+import io
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# --- Configuration ---
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_TOP_FUNCTIONS = int(os.getenv("PROFILE_TOP_FUNCTIONS", "25"))
+PROFILE_TOP_ALLOCATIONS = 10
+
+
+@dataclass
+class StageProfile:
+    name: str
+    wall_seconds: float = 0.0
+    peak_bytes: int = 0
+    functions: str = ""
+    allocations: List[str] = field(default_factory=list)
+
+
+class StageProfiler:
+    """No-op unless enabled, so call sites can wrap stages unconditionally."""
+
+    def __init__(self, enabled: bool = False, label: str = "run", output_dir: str = PROFILE_DIR,
+                 top_functions: int = PROFILE_TOP_FUNCTIONS):
+        self.enabled = enabled
+        self.top_functions = top_functions
+        self.stages: List[StageProfile] = []
+        self.run_dir = os.path.join(output_dir, f"{label}_{time.strftime('%Y%m%d_%H%M%S')}")
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        import cProfile
+        import pstats
+        import tracemalloc
+
+        os.makedirs(self.run_dir, exist_ok=True)
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(10)
+        elif hasattr(tracemalloc, "reset_peak"):  # Python 3.9+
+            tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            result = StageProfile(name, wall_seconds=time.perf_counter() - started)
+            _, peak = tracemalloc.get_traced_memory()
+            result.peak_bytes = max(peak - baseline, 0)
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ))
+            result.allocations = [str(stat) for stat in snapshot.statistics("lineno")[:PROFILE_TOP_ALLOCATIONS]]
+            if started_tracing:
+                tracemalloc.stop()
+            profiler.dump_stats(os.path.join(self.run_dir, f"{name}.prof"))
+            buffer = io.StringIO()
+            pstats.Stats(profiler, stream=buffer).strip_dirs().sort_stats("cumulative").print_stats(self.top_functions)
+            result.functions = buffer.getvalue()
+            self.stages.append(result)
+
+    def report(self) -> str:
+        lines = [f"Profile {self.run_dir}", ""]
+        for stage in self.stages:
+            lines.append(f"{stage.name}: {stage.wall_seconds:.3f}s wall, peak {stage.peak_bytes / 1024 / 1024:.2f} MiB traced")
+        for stage in self.stages:
+            lines += ["", "=" * 80, f"STAGE {stage.name}", "=" * 80,
+                      f"Wall time: {stage.wall_seconds:.3f}s",
+                      f"Peak traced memory: {stage.peak_bytes / 1024 / 1024:.2f} MiB",
+                      "", f"Largest allocation sites alive at end of stage:"]
+            lines += [f"  {line}" for line in stage.allocations] or ["  (none)"]
+            lines += ["", f"Top {self.top_functions} functions by cumulative time:", stage.functions]
+        return "\n".join(lines)
+
+    def write_report(self) -> Optional[str]:
+        """Write report.txt for the stages profiled so far; returns its path, or None if disabled."""
+        if not self.enabled or not self.stages:
+            return None
+        path = os.path.join(self.run_dir, "report.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.report())
+        return path
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Concurrent prompt x model evaluation over a sample of wallets.
+
+Replaces the notebook's serial loop (one wallet, one call at a time with sleeps in
+between): every (prompt, model, wallet) cell is submitted at once and each provider
+gets its own LLMScheduler, so OpenAI and Anthropic calls run side by side, each
+under its own RPM/TPM limits and concurrency cap. Identical calls are answered from
+the shared completion cache (llm_cache.py), and duplicate cells in one run share a
+single in-flight request.
+
+Every cell is written to a JSONL file (latency, tokens, cost, cache hit, response
+text), and a prompt x model matrix is printed: latency p50/p95, mean tokens and cost
+at list price (provider prompt-cache discounts show in the provider usage line).
+
+    python prompt_eval.py agent_inputs.ndjson --sample 100
+    python prompt_eval.py agent_input_gake.json --models gpt4o=openai:gpt-4o,haiku=anthropic:claude-3-5-haiku-20241022
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from llm_cache import (LLMCache, cached_prompt_tokens, estimate_cost, open_default_llm_cache, provider_usage,
+                       record_completion, request_key)
+from llm_scheduler import LLM_CONCURRENCY, LLM_RPM, LLM_TPM, LLMScheduler, estimate_request_tokens
+from metrics import METRICS_FILE, export_at_exit, registry
+
+# Load environment variables from .env file
+load_dotenv()
+
+# --- Configuration ---
+EVAL_PROMPTS = os.getenv("EVAL_PROMPTS", "wallet_analysis_prompt_v2_gemini.md,wallet_analysis_prompt_v2_sonnet_4.md")
+EVAL_MODELS = os.getenv("EVAL_MODELS", "gpt4o=openai:gpt-4o,claude=anthropic:claude-3-5-sonnet-20241022")
+EVAL_SAMPLE = int(os.getenv("EVAL_SAMPLE", "100"))
+EVAL_OUTPUT = os.getenv("EVAL_OUTPUT", "eval_results.jsonl")
+# Per-provider limits; OpenAI shares the analysis defaults
+PROVIDER_LIMITS = {
+    "openai": (LLM_RPM, LLM_TPM, LLM_CONCURRENCY),
+    "anthropic": (float(os.getenv("ANTHROPIC_RPM", "50")), float(os.getenv("ANTHROPIC_TPM", "40000")),
+                  int(os.getenv("ANTHROPIC_CONCURRENCY", "8"))),
+}
+
+# Same system prompt and sampling settings the notebook comparison used
+EVAL_SYSTEM_PROMPT = "You are an expert cryptocurrency analyst."
+EVAL_PARAMS = {"max_tokens": 1500, "temperature": 0.7}
+WALLET_PLACEHOLDERS = ("<PASTE WALLET JSON OBJECT HERE>", "<PASTE ONE OR MORE WALLET JSON OBJECTS>")
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    name: str      # column label in the matrix, e.g. "gpt4o"
+    provider: str  # "openai" or "anthropic"
+    model: str
+
+
+def parse_models(spec: str) -> List[ModelSpec]:
+    """'gpt4o=openai:gpt-4o,claude=anthropic:claude-3-5-sonnet-20241022'; the label defaults to the model."""
+    models = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, target = item.rpartition("=")
+        provider, _, model = target.partition(":")
+        if provider not in PROVIDER_LIMITS or not model:
+            raise ValueError(f"Bad model spec {item!r}: expected [label=]openai:<model> or [label=]anthropic:<model>")
+        models.append(ModelSpec(name or model, provider, model))
+    return models
+
+
+def load_prompts(paths: Iterable[str]) -> Dict[str, str]:
+    """Prompt templates keyed by file stem."""
+    return {Path(path).stem: Path(path).read_text(encoding="utf-8") for path in paths}
+
+
+def build_eval_messages(prompt_text: str, agent_input: Dict) -> List[Dict[str, str]]:
+    """System + user messages with the wallet JSON in the template's placeholder (or appended)."""
+    wallet_json = json.dumps(agent_input, indent=2)
+    for placeholder in WALLET_PLACEHOLDERS:
+        if placeholder in prompt_text:
+            content = prompt_text.replace(placeholder, wallet_json)
+            break
+    else:
+        content = f"{prompt_text}\n\nHere is the wallet data:\n```json\n{wallet_json}\n```"
+    return [{"role": "system", "content": EVAL_SYSTEM_PROMPT}, {"role": "user", "content": content}]
+
+
+def sample_wallets(agent_inputs: Iterable[Dict], size: int, seed: Optional[int] = None) -> List[Dict]:
+    """Uniform sample of up to size wallets in one pass (reservoir), so large NDJSON files are never fully loaded."""
+    rng = random.Random(seed)
+    sample: List[Dict] = []
+    for seen, agent_input in enumerate(agent_inputs):
+        if len(sample) < size:
+            sample.append(agent_input)
+        else:
+            slot = rng.randint(0, seen)
+            if slot < size:
+                sample[slot] = agent_input
+    return sample
+
+
+@dataclass
+class EvalCell:
+    prompt: str
+    model: str
+    wallet_address: str
+    latency: float = 0.0  # provider latency; for cache hits, that of the original call
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_prompt_tokens: int = 0
+    cost_usd: float = 0.0
+    cached: bool = False
+    error: Optional[str] = None
+    content: str = ""
+
+
+# --- Providers: (content, prompt_tokens, completion_tokens, cached_prompt_tokens) ---
+Completion = Tuple[str, int, int, int]
+
+
+async def _openai_completion(client: Any, model: str, messages: List[Dict[str, str]], params: Dict) -> Completion:
+    response = await client.chat.completions.create(model=model, messages=messages, **params)
+    usage = getattr(response, "usage", None)
+    return (response.choices[0].message.content or "", getattr(usage, "prompt_tokens", 0) or 0,
+            getattr(usage, "completion_tokens", 0) or 0, cached_prompt_tokens(usage))
+
+
+async def _anthropic_completion(client: Any, model: str, messages: List[Dict[str, str]], params: Dict) -> Completion:
+    system = "\n\n".join(m["content"] for m in messages if m["role"] == "system")
+    response = await client.messages.create(model=model, system=system,
+                                            messages=[m for m in messages if m["role"] != "system"], **params)
+    usage = response.usage
+    cached = getattr(usage, "cache_read_input_tokens", 0) or 0
+    content = "".join(getattr(block, "text", "") for block in response.content)
+    # input_tokens excludes cache reads; count them in the prompt like OpenAI does
+    return content, usage.input_tokens + cached, usage.output_tokens, cached
+
+
+_COMPLETIONS = {"openai": _openai_completion, "anthropic": _anthropic_completion}
+
+
+def _client(provider: str) -> Any:
+    # The schedulers own 429 handling, so the SDKs' own retries are turned off
+    if provider == "anthropic":
+        from anthropic import AsyncAnthropic
+
+        return AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"), max_retries=0)
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+
+
+class EvalHarness:
+    """Runs prompt x model x wallet cells concurrently, one scheduler and client per provider."""
+
+    def __init__(self, models: List[ModelSpec], cache: Optional[LLMCache] = None, params: Optional[Dict] = None):
+        self.models = models
+        self.cache = cache
+        self.params = dict(EVAL_PARAMS if params is None else params)
+        self.schedulers: Dict[str, LLMScheduler] = {}
+        self._clients: Dict[str, Any] = {}
+        self._in_flight: Dict[str, "asyncio.Task[Tuple[Completion, float, bool]]"] = {}
+
+    def scheduler(self, provider: str) -> LLMScheduler:
+        if provider not in self.schedulers:
+            rpm, tpm, concurrency = PROVIDER_LIMITS[provider]
+            self.schedulers[provider] = LLMScheduler(rpm=rpm, tpm=tpm, max_concurrency=concurrency)
+        return self.schedulers[provider]
+
+    async def _complete(self, spec: ModelSpec, messages: List[Dict[str, str]], key: str) -> Tuple[Completion, float, bool]:
+        if self.cache is not None:
+            hit = self.cache.get(key)
+            if hit is not None:
+                return (hit["content"], hit["prompt_tokens"], hit["completion_tokens"], 0), hit["latency"], True
+        if spec.provider not in self._clients:
+            self._clients[spec.provider] = _client(spec.provider)
+        client = self._clients[spec.provider]
+
+        async def call():
+            started = time.perf_counter()
+            completion = await _COMPLETIONS[spec.provider](client, spec.model, messages, self.params)
+            return completion, time.perf_counter() - started
+
+        completion, latency = await self.scheduler(spec.provider).submit(
+            call, estimate_request_tokens(messages, self.params.get("max_tokens", 0)))
+        content, prompt_tokens, completion_tokens, cached_tokens = completion
+        record_completion(self.cache, key, spec.model, content, prompt_tokens, completion_tokens, latency, cached_tokens)
+        return completion, latency, False
+
+    async def evaluate(self, prompt_name: str, prompt_text: str, spec: ModelSpec, agent_input: Dict) -> EvalCell:
+        cell = EvalCell(prompt_name, spec.name, agent_input.get("wallet_address", ""))
+        messages = build_eval_messages(prompt_text, agent_input)
+        key = request_key(spec.model, messages, self.params)
+        # Identical cells in the same run wait on one request instead of racing the cache
+        task = self._in_flight.get(key)
+        if task is None:
+            task = self._in_flight[key] = asyncio.ensure_future(self._complete(spec, messages, key))
+        try:
+            completion, cell.latency, cell.cached = await task
+        except Exception as e:
+            cell.error = str(e)
+            registry.inc("eval_cells_total", prompt=prompt_name, model=spec.name, outcome="error")
+            return cell
+        cell.content, cell.prompt_tokens, cell.completion_tokens, cell.cached_prompt_tokens = completion
+        # List price, so cells compare the same whether served fresh or from the completion cache
+        cell.cost_usd = estimate_cost(spec.model, cell.prompt_tokens, cell.completion_tokens)
+        registry.inc("eval_cells_total", prompt=prompt_name, model=spec.name, outcome="cached" if cell.cached else "ok")
+        return cell
+
+    async def run(self, prompts: Dict[str, str], wallets: List[Dict]) -> List[EvalCell]:
+        """Every prompt x model x wallet cell, submitted at once and returned in that order."""
+        return list(await asyncio.gather(*(self.evaluate(name, text, spec, agent_input)
+                                           for name, text in prompts.items()
+                                           for spec in self.models
+                                           for agent_input in wallets)))
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def results_matrix(cells: List[EvalCell]) -> List[Dict[str, Any]]:
+    """One row per (prompt, model): counts, latency percentiles, mean tokens and cost."""
+    groups: Dict[Tuple[str, str], List[EvalCell]] = {}
+    for cell in cells:
+        groups.setdefault((cell.prompt, cell.model), []).append(cell)
+    rows = []
+    for (prompt, model), group in groups.items():
+        ok = [cell for cell in group if cell.error is None]
+        latencies = [cell.latency for cell in ok]
+        rows.append({
+            "prompt": prompt,
+            "model": model,
+            "wallets": len(group),
+            "errors": len(group) - len(ok),
+            "cached": sum(cell.cached for cell in ok),
+            "p50_s": percentile(latencies, 50),
+            "p95_s": percentile(latencies, 95),
+            "prompt_tokens": sum(cell.prompt_tokens for cell in ok) / len(ok) if ok else 0.0,
+            "completion_tokens": sum(cell.completion_tokens for cell in ok) / len(ok) if ok else 0.0,
+            "cost_usd": sum(cell.cost_usd for cell in ok),
+            "cost_per_wallet_usd": sum(cell.cost_usd for cell in ok) / len(ok) if ok else 0.0,
+        })
+    return rows
+
+
+def format_matrix(rows: List[Dict[str, Any]]) -> str:
+    lines = [f"{'prompt':<32} {'model':<12} {'ok':>5} {'err':>4} {'cache':>5} {'p50 s':>7} {'p95 s':>7} "
+             f"{'in tok':>7} {'out tok':>7} {'$ total':>9} {'$/wallet':>9}"]
+    for row in rows:
+        lines.append(f"{row['prompt'][:32]:<32} {row['model'][:12]:<12} {row['wallets'] - row['errors']:>5} "
+                     f"{row['errors']:>4} {row['cached']:>5} {row['p50_s']:>7.2f} {row['p95_s']:>7.2f} "
+                     f"{row['prompt_tokens']:>7.0f} {row['completion_tokens']:>7.0f} "
+                     f"{row['cost_usd']:>9.4f} {row['cost_per_wallet_usd']:>9.4f}")
+    return "\n".join(lines)
+
+
+def write_cells(cells: List[EvalCell], path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for cell in cells:
+            f.write(json.dumps(asdict(cell)) + "\n")
+
+
+async def run_evaluation(prompts: Dict[str, str], models: List[ModelSpec], wallets: List[Dict],
+                         cache: Optional[LLMCache] = None, params: Optional[Dict] = None) -> List[EvalCell]:
+    """Evaluate every cell concurrently and print per-provider scheduler stats."""
+    harness = EvalHarness(models, cache, params)
+    cells = await harness.run(prompts, wallets)
+    for provider, scheduler in harness.schedulers.items():
+        print(f"📈 {provider}: {scheduler.stats.report('LLM calls')}")
+    return cells
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Evaluate prompt templates x models over a sample of wallets")
+    parser.add_argument("inputs", nargs="+", help="agent_input .json files or .ndjson batch outputs")
+    parser.add_argument("--prompts", default=EVAL_PROMPTS, help="Comma-separated prompt template files")
+    parser.add_argument("--models", default=EVAL_MODELS,
+                        help="Comma-separated [label=]provider:model, provider being openai or anthropic")
+    parser.add_argument("--sample", type=int, default=EVAL_SAMPLE, help="Wallets to sample from the inputs")
+    parser.add_argument("--seed", type=int, help="Sampling seed, to rerun the same wallets")
+    parser.add_argument("--output", default=EVAL_OUTPUT, help="JSONL file with one record per cell")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the completion cache")
+    parser.add_argument("--metrics", metavar="FILE", default=METRICS_FILE,
+                        help="Write request/LLM metrics at exit: Prometheus text for .prom/.txt, JSON otherwise")
+    args = parser.parse_args(argv)
+    export_at_exit(args.metrics)
+
+    try:
+        models = parse_models(args.models)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    for provider, env in (("openai", "OPENAI_API_KEY"), ("anthropic", "ANTHROPIC_API_KEY")):
+        if any(spec.provider == provider for spec in models) and not os.getenv(env):
+            print(f"❌ Please set your {env} environment variable")
+            return
+
+    from run_smart_analysis import iter_agent_inputs
+
+    prompts = load_prompts(path.strip() for path in args.prompts.split(",") if path.strip())
+    wallets = sample_wallets(iter_agent_inputs(args.inputs), args.sample, args.seed)
+    cache = None if args.no_cache else open_default_llm_cache()
+    print(f"🧪 {len(prompts)} prompts x {len(models)} models x {len(wallets)} wallets = "
+          f"{len(prompts) * len(models) * len(wallets)} cells")
+
+    started = time.perf_counter()
+    cells = asyncio.run(run_evaluation(prompts, models, wallets, cache))
+    elapsed = time.perf_counter() - started
+    write_cells(cells, args.output)
+
+    print(f"\n{format_matrix(results_matrix(cells))}\n")
+    serial = sum(cell.latency for cell in cells if cell.error is None and not cell.cached)
+    print(f"⏱️  {elapsed:.1f}s elapsed for {serial:.1f}s of provider latency")
+    print(f"🧾 {provider_usage.report()}")
+    if cache:
+        print(f"🗄️  {cache.stats.report()}")
+    print(f"💾 Cells written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
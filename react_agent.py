@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+ReAct agent over the wallet API: the model asks for the data it needs, one tool per endpoint.
+
+The analysis scripts fetch and format every section up front. Here each backend
+endpoint is a tool instead: summary, pnl-overview, behavior-analysis, one
+token-performance page, classification and notes. A question only pays for the
+endpoints it asks about. The loop follows react_agent_plan_merged.md:
+
+    Thought: ...
+    Action: get_summary[{}]
+    Action: get_token_performance[{"page": 2, "sortBy": "totalSolSpent"}]
+    -> one Observation per Action
+    ...
+    Final Answer: ...
+
+Every Action line in one reply runs concurrently. Results are memoized per tool,
+wallet and parameters for the life of a ToolSession. Later steps and later
+questions in the same session reuse them instead of refetching. Each step is kept
+in a trace with tool latency and memo hits.
+
+    python react_agent.py <wallet> "Is this wallet a bot?" "What are its best tokens?" --trace trace.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from api_client import AsyncWalletApiClient
+from field_mapping import BEHAVIOR, PNL, SUMMARY, TOKEN
+from metrics import METRICS_FILE, export_at_exit, registry
+from response_cache import open_default_cache
+
+# Load environment variables from .env file
+load_dotenv()
+
+# --- Configuration ---
+API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:3001/api/v1")
+API_KEY = os.getenv("API_KEY")
+REACT_MODEL = os.getenv("REACT_MODEL", "gpt-4o")
+REACT_MAX_STEPS = int(os.getenv("REACT_MAX_STEPS", "8"))
+# Observations longer than this are cut before they go back into the prompt
+REACT_OBSERVATION_CHARS = int(os.getenv("REACT_OBSERVATION_CHARS", "8000"))
+TOKEN_PAGE_SIZE_MAX = 100
+LLM_PARAMS = {"max_tokens": 800, "temperature": 0.0}
+
+
+class StepType(Enum):
+    THOUGHT = "thought"
+    ACTION = "action"
+    OBSERVATION = "observation"
+    FINAL = "final"
+
+
+@dataclass
+class AgentStep:
+    type: StepType
+    content: str
+    step: int
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+# --- Tools ---
+def _token_page(data: Any) -> Dict:
+    if isinstance(data, list):  # unpaginated response shape
+        data = {"data": data, "total": len(data), "page": 1, "totalPages": 1}
+    return {"page": data.get("page"), "total_pages": data.get("totalPages"), "total_tokens": data.get("total"),
+            "rows": TOKEN.many(data.get("data") or [])}
+
+
+def _classification(data: Dict) -> Dict:
+    smart_fetch = data.get("smartFetch") or {}
+    return {"classification": data.get("classification"), "limited_fetch": smart_fetch.get("shouldLimitFetch"),
+            "max_signatures": smart_fetch.get("maxSignatures"), "reason": smart_fetch.get("reason")}
+
+
+def _notes(data: Any) -> List[Dict]:
+    return [{"content": note.get("content"), "created_at": note.get("createdAt")} for note in data or []]
+
+
+@dataclass(frozen=True)
+class Tool:
+    name: str
+    description: str
+    endpoint: str                         # formatted with {wallet}
+    sanitize: Callable[[Any], Any]
+    params: Tuple[str, ...] = ()          # accepted query parameters, besides "wallet"
+    defaults: Tuple[Tuple[str, Any], ...] = ()
+
+    def query(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Query parameters with defaults applied, so equivalent calls share one memo entry."""
+        if "_raw" in args:
+            raise ValueError(f"parameters must be a JSON object, got {args['_raw']!r}")
+        unknown = set(args) - set(self.params) - {"wallet"}
+        if unknown:
+            raise ValueError(f"{self.name} does not take {', '.join(sorted(unknown))}")
+        query = dict(self.defaults)
+        query.update((k, v) for k, v in args.items() if k != "wallet" and v is not None)
+        if "pageSize" in query:
+            query["pageSize"] = min(int(query["pageSize"]), TOKEN_PAGE_SIZE_MAX)
+        return query
+
+
+class ToolRegistry:
+    def __init__(self, tools: Tuple[Tool, ...] = ()):
+        self._tools: Dict[str, Tool] = {}
+        for tool in tools:
+            self.register(tool)
+
+    def register(self, tool: Tool) -> None:
+        self._tools[tool.name] = tool
+
+    def get(self, name: str) -> Optional[Tool]:
+        return self._tools.get(name)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._tools)
+
+    def describe(self) -> str:
+        lines = []
+        for tool in self._tools.values():
+            params = ", ".join(("wallet",) + tool.params)
+            lines.append(f"- {tool.name}: {tool.description} Parameters (all optional): {params}.")
+        return "\n".join(lines)
+
+
+_DATES = ("startDate", "endDate")
+
+WALLET_TOOLS = ToolRegistry((
+    Tool("get_summary", "Headline stats: latest PnL, token win rate, days active, last activity, "
+         "behavior classification and current SOL/USDC balances.",
+         "/wallets/{wallet}/summary", SUMMARY, _DATES),
+    Tool("get_pnl_overview", "Realized PnL, swap win rate, win/loss count, average and median PnL per trade/token, "
+         "volume and SOL spent/received.",
+         "/wallets/{wallet}/pnl-overview", PNL, _DATES),
+    Tool("get_behavior_analysis", "Trading style, flipper score, hold-time distribution, buy/sell symmetry, "
+         "sessions, active hours and risk metrics.",
+         "/wallets/{wallet}/behavior-analysis", BEHAVIOR, _DATES),
+    Tool("get_token_performance", "One page of per-token results (PnL, SOL spent/received, transfers, holdings). "
+         "sortBy is a token-performance field such as netSolProfitLoss or totalSolSpent; sortOrder ASC or DESC.",
+         "/wallets/{wallet}/token-performance", _token_page,
+         ("page", "pageSize", "sortBy", "sortOrder") + _DATES,
+         (("page", 1), ("pageSize", 20), ("sortBy", "netSolProfitLoss"), ("sortOrder", "DESC"))),
+    Tool("get_classification", "Whether the backend flags the wallet as high-frequency and limits its transaction fetch.",
+         "/wallets/{wallet}/classification", _classification),
+    Tool("get_notes", "Analyst notes saved for the wallet, newest first.",
+         "/wallets/{wallet}/notes", _notes),
+))
+
+
+@dataclass
+class ToolCall:
+    step: int
+    tool: str
+    args: Dict[str, Any]
+    seconds: float = 0.0
+    memoized: bool = False
+    error: Optional[str] = None
+    result: Any = None
+
+    def observation(self) -> str:
+        if self.error is not None:
+            return f"Error: {self.error}"
+        text = json.dumps(self.result, default=str)
+        if len(text) > REACT_OBSERVATION_CHARS:
+            text = text[:REACT_OBSERVATION_CHARS] + f"... [truncated, {len(text)} chars]"
+        return text
+
+
+class ToolSession:
+    """Runs tool calls for one wallet, memoizing every (tool, wallet, params) result for the session.
+
+    Only successful results stay memoized: a failed fetch is forgotten, so a later call retries it.
+    """
+
+    def __init__(self, client: AsyncWalletApiClient, wallet_address: str, tools: ToolRegistry = WALLET_TOOLS):
+        self.client = client
+        self.wallet_address = wallet_address
+        self.tools = tools
+        self.calls: List[ToolCall] = []
+        self._memo: Dict[Tuple, "asyncio.Future[Any]"] = {}
+        self._fetched = 0
+
+    async def _fetch(self, tool: Tool, wallet: str, query: Dict[str, Any]) -> Any:
+        data = await self.client.get(tool.endpoint.format(wallet=wallet), query or None)
+        result = tool.sanitize(data)
+        self._fetched += 1
+        return result
+
+    async def call(self, name: str, args: Dict[str, Any], step: int = 0) -> ToolCall:
+        record = ToolCall(step, name, args)
+        self.calls.append(record)
+        started = time.perf_counter()
+        key = None
+        try:
+            tool = self.tools.get(name)
+            if tool is None:
+                raise ValueError(f"unknown tool {name!r}; available: {', '.join(self.tools.names)}")
+            query = tool.query(args)
+            wallet = args.get("wallet") or self.wallet_address
+            key = (name, wallet, tuple(sorted(query.items())))
+            # In-flight calls are shared too, so duplicates in one step make a single request
+            record.memoized = key in self._memo
+            if not record.memoized:
+                self._memo[key] = asyncio.ensure_future(self._fetch(tool, wallet, query))
+            record.result = await self._memo[key]
+        except Exception as e:
+            record.error = str(e) or type(e).__name__
+            if key is not None and not record.memoized:
+                self._memo.pop(key, None)  # callers sharing the in-flight request saw the same error
+        record.seconds = time.perf_counter() - started
+        registry.inc("agent_tool_calls_total", tool=name, memoized=str(record.memoized).lower())
+        registry.observe("agent_tool_seconds", record.seconds, tool=name)
+        return record
+
+    async def call_many(self, actions: List[Tuple[str, Dict[str, Any]]], step: int = 0) -> List[ToolCall]:
+        """Independent calls from one reasoning step, run concurrently; results in action order."""
+        return list(await asyncio.gather(*(self.call(name, args, step) for name, args in actions)))
+
+    @property
+    def requests(self) -> int:
+        """Distinct tool calls fetched successfully through the API client (the rest were memo hits or failed)."""
+        return self._fetched
+
+
+# --- Prompt and parsing ---
+REACT_SYSTEM_PROMPT = """You are a senior Solana wallet analyst answering questions about a wallet.
+You can read the wallet analysis backend through these tools, and should call only what the question needs:
+
+{tools}
+
+Reply in this format:
+Thought: what you need to find out next
+Action: tool_name[{{"param": "value"}}]
+
+Write one Action line per tool call, with a JSON object of parameters ([{{}}] for none). All Actions in one reply
+run in parallel, so request everything you need for a step at once. Results come back as one Observation per
+Action. When you can answer, reply with:
+Thought: why the data answers the question
+Final Answer: the answer, citing the figures it rests on"""
+
+_ACTION = re.compile(r"^\s*Action:\s*([\w-]+)\s*\[(.*)\]\s*$", re.MULTILINE)
+_FINAL = re.compile(r"Final Answer:\s*(.*)", re.DOTALL)
+
+
+def parse_reply(text: str) -> Tuple[str, List[Tuple[str, Dict[str, Any]]], Optional[str]]:
+    """(thought, actions, final answer) from one model reply; unparseable action input becomes {"_raw": ...}."""
+    final = _FINAL.search(text)
+    head = text[:final.start()] if final else text
+    thought = re.sub(r"^\s*Thought:\s*", "", _ACTION.sub("", head)).strip()
+    actions = []
+    for name, raw in _ACTION.findall(head):
+        try:
+            args = json.loads(raw) if raw.strip() else {}
+        except json.JSONDecodeError:
+            args = {"_raw": raw}
+        actions.append((name, args if isinstance(args, dict) else {"_raw": raw}))
+    return thought, actions, final.group(1).strip() if final else None
+
+
+# --- LLM ---
+LLM = Callable[[List[Dict[str, str]]], Awaitable[str]]
+
+
+class OpenAIChat:
+    """Default LLM: OpenAI chat completions through the shared completion cache."""
+
+    def __init__(self, model: str = REACT_MODEL, params: Optional[Dict] = None):
+        from llm_cache import open_default_llm_cache
+
+        self.model = model
+        self.params = dict(LLM_PARAMS if params is None else params, stop=["Observation:"])
+        self.cache = open_default_llm_cache()
+        self._client = None
+
+    async def __call__(self, messages: List[Dict[str, str]]) -> str:
+        from llm_cache import cached_chat_completion_async
+
+        if self._client is None:
+            from openai import AsyncOpenAI
+
+            self._client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        return await cached_chat_completion_async(self._client, self.cache, self.model, messages, **self.params)
+
+
+# --- Agent ---
+@dataclass
+class AgentResult:
+    question: str
+    answer: Optional[str]
+    steps: List[AgentStep]
+    calls: List[ToolCall]
+    seconds: float
+
+    def report(self) -> str:
+        memoized = sum(call.memoized for call in self.calls)
+        tool_seconds = sum(call.seconds for call in self.calls if not call.memoized)
+        lines = [f"{len(self.calls)} tool calls ({memoized} memoized) over "
+                 f"{max((s.step for s in self.steps), default=0)} steps in {self.seconds:.2f}s; "
+                 f"{tool_seconds:.2f}s of tool latency"]
+        for step in self.steps:
+            if step.type is StepType.OBSERVATION:
+                meta = step.metadata
+                source = "memo" if meta["memoized"] else "api"
+                status = f"error: {meta['error']}" if meta["error"] else f"{meta['chars']} chars"
+                lines.append(f"  step {step.step}  {meta['tool']:<22} {json.dumps(meta['args']):<40} "
+                             f"{meta['seconds'] * 1000:7.1f} ms  {source:<4} {status}")
+        return "\n".join(lines)
+
+
+class ReActAgent:
+    """Thought -> parallel Actions -> Observations loop until a Final Answer or max_steps."""
+
+    def __init__(self, tools: ToolRegistry = WALLET_TOOLS, llm: Optional[LLM] = None, max_steps: int = REACT_MAX_STEPS):
+        self.tools = tools
+        self.llm = llm
+        self.max_steps = max_steps
+
+    def system_prompt(self) -> str:
+        return REACT_SYSTEM_PROMPT.format(tools=self.tools.describe())
+
+    async def run(self, question: str, session: ToolSession) -> AgentResult:
+        if self.llm is None:
+            self.llm = OpenAIChat()
+        started = time.perf_counter()
+        first_call = len(session.calls)
+        steps: List[AgentStep] = []
+        messages = [{"role": "system", "content": self.system_prompt()},
+                    {"role": "user", "content": f"Wallet: {session.wallet_address}\nQuestion: {question}"}]
+        answer = None
+        for step in range(1, self.max_steps + 1):
+            reply = await self.llm(messages)
+            thought, actions, answer = parse_reply(reply)
+            messages.append({"role": "assistant", "content": reply})
+            if thought:
+                steps.append(AgentStep(StepType.THOUGHT, thought, step))
+            if answer is not None:
+                steps.append(AgentStep(StepType.FINAL, answer, step))
+                break
+            if not actions:
+                messages.append({"role": "user", "content": "Reply with Action lines or a Final Answer, in the format above."})
+                continue
+            for name, args in actions:
+                steps.append(AgentStep(StepType.ACTION, name, step, {"args": args}))
+            calls = await session.call_many(actions, step)
+            observations = []
+            for call in calls:
+                text = call.observation()
+                steps.append(AgentStep(StepType.OBSERVATION, text, step, {
+                    "tool": call.tool, "args": call.args, "seconds": call.seconds,
+                    "memoized": call.memoized, "error": call.error, "chars": len(text)}))
+                observations.append(f"Observation ({call.tool} {json.dumps(call.args)}): {text}")
+            messages.append({"role": "user", "content": "\n\n".join(observations)})
+        return AgentResult(question, answer, steps, session.calls[first_call:], time.perf_counter() - started)
+
+
+def write_trace(results: List[AgentResult], path: str) -> None:
+    """One JSON line per step, tagged with its question."""
+    with open(path, "w", encoding="utf-8") as f:
+        for result in results:
+            for step in result.steps:
+                record = asdict(step)
+                record["type"] = step.type.value
+                record["question"] = result.question
+                f.write(json.dumps(record, default=str) + "\n")
+
+
+async def run_session(wallet_address: str, questions: List[str], agent: Optional[ReActAgent] = None,
+                      api_key: Optional[str] = API_KEY) -> List[AgentResult]:
+    """Answer questions one after another over a single ToolSession, so later ones reuse earlier fetches."""
+    agent = agent or ReActAgent()
+    results = []
+    async with AsyncWalletApiClient(API_BASE_URL, api_key, cache=open_default_cache()) as client:
+        session = ToolSession(client, wallet_address, agent.tools)
+        for question in questions:
+            result = await agent.run(question, session)
+            results.append(result)
+            print(f"\n❓ {question}")
+            print(f"💡 {result.answer if result.answer is not None else '(no final answer within max steps)'}")
+            print(f"🧭 {result.report()}")
+        print(f"\n{session.requests} API calls for {len(session.calls)} tool calls; {client.stats.report()}")
+    return results
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Answer questions about a wallet with a tool-using ReAct agent")
+    parser.add_argument("wallet", help="Wallet address")
+    parser.add_argument("questions", nargs="+", help="Questions, answered in order within one memoized session")
+    parser.add_argument("--model", default=REACT_MODEL, help="Chat model for the reasoning steps")
+    parser.add_argument("--max-steps", type=int, default=REACT_MAX_STEPS, help="Reasoning steps per question")
+    parser.add_argument("--trace", metavar="FILE", help="Write every thought/action/observation as JSONL")
+    parser.add_argument("--metrics", metavar="FILE", default=METRICS_FILE,
+                        help="Write request/LLM/tool metrics at exit: Prometheus text for .prom/.txt, JSON otherwise")
+    args = parser.parse_args(argv)
+    export_at_exit(args.metrics)
+
+    if not API_KEY or API_KEY == "your-api-key-here":
+        print("ERROR: Please set your API key in the .env file")
+        return
+    if not os.getenv("OPENAI_API_KEY"):
+        print("❌ Please set your OPENAI_API_KEY environment variable")
+        return
+
+    agent = ReActAgent(llm=OpenAIChat(args.model), max_steps=args.max_steps)
+    results = asyncio.run(run_session(args.wallet, args.questions, agent))
+    if args.trace:
+        write_trace(results, args.trace)
+        print(f"💾 Trace written to {args.trace}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Persistent on-disk cache for backend GET responses.
+
+Entries are keyed by API base URL, endpoint path (which includes the wallet address)
+and query params (date range, paging). Each endpoint has its own TTL, because balances
+go stale in minutes while behavior analysis changes slowly. Total size is capped, and
+the least recently used entries are evicted first.
+
+Disable with RESPONSE_CACHE_DISABLED=1 or the scripts' --no-cache flag.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# --- Configuration ---
+CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", ".cache/responses.sqlite")
+CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+CACHE_DISABLED = os.getenv("RESPONSE_CACHE_DISABLED", "").lower() in ("1", "true", "yes")
+
+# TTL (seconds) by endpoint suffix; anything unlisted uses DEFAULT_TTL
+ENDPOINT_TTLS = {
+    "/summary": 10 * 60,                 # carries current SOL/USDC balances
+    "/token-performance": 30 * 60,       # carries current holdings and prices
+    "/pnl-overview": 60 * 60,
+    "/behavior-analysis": 6 * 60 * 60,
+}
+DEFAULT_TTL = 15 * 60
+
+MISS = object()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    stores: int = 0
+    evictions: int = 0
+    bytes_served: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["hit_rate"] = self.hit_rate
+        return data
+
+    def report(self) -> str:
+        return (f"Response cache: {self.hits} hits, {self.misses} misses ({self.hit_rate:.0%} hit rate), "
+                f"{self.expired} expired, {self.evictions} evicted, {self.bytes_served:,} bytes served from disk")
+
+
+def ttl_for(endpoint: str) -> int:
+    path = endpoint.split("?", 1)[0]
+    for suffix, ttl in ENDPOINT_TTLS.items():
+        if path.endswith(suffix):
+            return ttl
+    return DEFAULT_TTL
+
+
+def cache_key(base_url: str, endpoint: str, params: Optional[Dict] = None) -> str:
+    material = json.dumps({"base": base_url.rstrip("/"), "endpoint": endpoint, "params": params or {}},
+                          sort_keys=True, default=str)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed response store with per-endpoint TTL and LRU eviction by total size."""
+
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        # Connected on the first lookup, so importing a fetch script never creates the cache file
+        if self._conn is None:
+            self._conn = self._open()
+        return self._conn
+
+    def _open(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                body TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        db.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+        db.commit()
+        return db
+
+    def get(self, base_url: str, endpoint: str, params: Optional[Dict] = None) -> Any:
+        """Return the cached JSON body, or MISS if absent or older than the endpoint's TTL."""
+        key = cache_key(base_url, endpoint, params)
+        row = self._db.execute("SELECT body, size, stored_at FROM responses WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is None:
+            self.stats.misses += 1
+            return MISS
+        body, size, stored_at = row
+        if now - stored_at > ttl_for(endpoint):
+            self.stats.misses += 1
+            self.stats.expired += 1
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._db.commit()
+            return MISS
+        self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        self._db.commit()
+        self.stats.hits += 1
+        self.stats.bytes_served += size
+        return json.loads(body)
+
+    def put(self, base_url: str, endpoint: str, params: Optional[Dict], value: Any) -> None:
+        body = json.dumps(value)
+        size = len(body.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        self._db.execute(
+            "INSERT OR REPLACE INTO responses (key, endpoint, body, size, stored_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+            (cache_key(base_url, endpoint, params), endpoint, body, size, now, now),
+        )
+        self.stats.stores += 1
+        self._evict()
+        self._db.commit()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the total size fits under max_bytes."""
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY last_access ASC").fetchall():
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.stats.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def invalidate(self, endpoint_prefix: str) -> int:
+        """Drop every entry whose endpoint starts with endpoint_prefix, e.g. after a wallet was re-synced."""
+        pattern = endpoint_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        deleted = self._db.execute("DELETE FROM responses WHERE endpoint LIKE ? ESCAPE '\\'", (pattern,)).rowcount
+        self._db.commit()
+        return deleted
+
+    def clear(self) -> None:
+        self._db.execute("DELETE FROM responses")
+        self._db.commit()
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def open_default_cache(bypass: bool = False) -> Optional[ResponseCache]:
+    """The shared on-disk cache, or None when bypassed by flag or RESPONSE_CACHE_DISABLED."""
+    if bypass or CACHE_DISABLED:
+        return None
+    return ResponseCache()
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Indexed SQLite store for agent inputs and LLM analyses.
+
+Every fetch saves the sanitized sections as JSON columns next to a handful of key
+metrics pulled out into indexed numeric columns, so questions like "all analyses for
+wallet X in the last 30 days" or "all wallets with flipper_score > 0.8" are a single
+query instead of a scan over loose agent_input_*.json / smart_analysis_*.md files.
+Analyses record the model and a hash of the prompt that produced them, and the
+pre-screen's routing decisions (templated report vs LLM) are kept alongside.
+
+    python results_store.py analyses <wallet> --days 30
+    python results_store.py wallets --min flipper_score=0.8 --max total_trade_count=500
+    python results_store.py routing --days 7
+    python results_store.py import agent_inputs.ndjson
+
+Disable writes from the other scripts with RESULTS_STORE_DISABLED=1.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# --- Configuration ---
+RESULTS_DB_PATH = os.getenv("RESULTS_DB_PATH", "results.sqlite")
+RESULTS_STORE_DISABLED = os.getenv("RESULTS_STORE_DISABLED", "").lower() in ("1", "true", "yes")
+
+SECTIONS = ("summary", "pnl_overview", "behavior", "token_performance")
+
+# Indexed column -> (agent_input section, sanitized field)
+METRIC_COLUMNS = {
+    "realized_pnl": ("pnl_overview", "realized_pnl"),
+    "swap_win_rate": ("pnl_overview", "swap_win_rate"),
+    "token_win_rate": ("pnl_overview", "token_win_rate"),
+    "total_volume": ("pnl_overview", "total_volume"),
+    "flipper_score": ("behavior", "flipper_score"),
+    "confidence_score": ("behavior", "confidence_score"),
+    "buy_sell_symmetry": ("behavior", "buy_sell_symmetry"),
+    "unique_tokens_traded": ("behavior", "unique_tokens_traded"),
+    "total_trade_count": ("behavior", "total_trade_count"),
+    "last_active_timestamp": ("summary", "last_active_timestamp"),
+}
+TEXT_COLUMNS = {
+    "trading_style": ("behavior", "trading_style"),
+}
+
+
+def _date_range(agent_input: Dict) -> tuple:
+    date_range = agent_input.get("date_range") or {}
+    return date_range.get("start_date"), date_range.get("end_date")
+
+
+def _number(value: Any) -> Optional[float]:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+class ResultsStore:
+    """agent_inputs and analyses tables keyed by full wallet address."""
+
+    def __init__(self, path: str = RESULTS_DB_PATH):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        # Opened on the first read or write; importing the scripts or --help leaves results.sqlite alone
+        if self._conn is None:
+            self._conn = self._open()
+        return self._conn
+
+    def _open(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        db.row_factory = sqlite3.Row
+        db.execute("PRAGMA journal_mode=WAL")
+        metric_ddl = "".join(f"{column} REAL, " for column in METRIC_COLUMNS)
+        text_ddl = "".join(f"{column} TEXT, " for column in TEXT_COLUMNS)
+        db.execute(f"""
+            CREATE TABLE IF NOT EXISTS agent_inputs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                wallet_address TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                start_date TEXT,
+                end_date TEXT,
+                {metric_ddl}{text_ddl}
+                summary TEXT, pnl_overview TEXT, behavior TEXT, token_performance TEXT
+            )
+        """)
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS analyses (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                wallet_address TEXT NOT NULL,
+                agent_input_id INTEGER REFERENCES agent_inputs(id),
+                created_at REAL NOT NULL,
+                start_date TEXT,
+                end_date TEXT,
+                model TEXT,
+                prompt_version TEXT,
+                analysis TEXT NOT NULL
+            )
+        """)
+        # One row per pre-screen decision (prescreen.py): templated report or LLM, and how long it took
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS routing (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                wallet_address TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                route TEXT NOT NULL,
+                label TEXT,
+                reasons TEXT,
+                rules_version TEXT,
+                seconds REAL
+            )
+        """)
+        db.execute("CREATE INDEX IF NOT EXISTS idx_routing_created ON routing(created_at)")
+        db.execute("CREATE INDEX IF NOT EXISTS idx_agent_inputs_wallet ON agent_inputs(wallet_address, fetched_at)")
+        for column in list(METRIC_COLUMNS) + list(TEXT_COLUMNS):
+            db.execute(f"CREATE INDEX IF NOT EXISTS idx_agent_inputs_{column} ON agent_inputs({column})")
+        db.execute("CREATE INDEX IF NOT EXISTS idx_analyses_wallet ON analyses(wallet_address, created_at)")
+        db.commit()
+        return db
+
+    # --- Writes ---
+    def save_agent_input(self, agent_input: Dict, fetched_at: Optional[float] = None) -> int:
+        """Store one agent_input record; returns its row id."""
+        start_date, end_date = _date_range(agent_input)
+        values = {
+            "wallet_address": agent_input["wallet_address"],
+            "fetched_at": fetched_at or time.time(),
+            "start_date": start_date,
+            "end_date": end_date,
+        }
+        for column, (section, field) in METRIC_COLUMNS.items():
+            values[column] = _number((agent_input.get(section) or {}).get(field))
+        for column, (section, field) in TEXT_COLUMNS.items():
+            values[column] = (agent_input.get(section) or {}).get(field)
+        for section in SECTIONS:
+            values[section] = json.dumps(agent_input.get(section))
+        columns = ", ".join(values)
+        placeholders = ", ".join("?" for _ in values)
+        cursor = self._db.execute(f"INSERT INTO agent_inputs ({columns}) VALUES ({placeholders})", tuple(values.values()))
+        self._db.commit()
+        return cursor.lastrowid
+
+    def save_analysis(self, wallet_data: Dict, analysis: str, model: Optional[str] = None,
+                      prompt_version: Optional[str] = None) -> int:
+        """Store an analysis, linked to the wallet's most recent agent_input if there is one."""
+        address = wallet_data["wallet_address"]
+        start_date, end_date = _date_range(wallet_data)
+        latest = self._db.execute(
+            "SELECT id FROM agent_inputs WHERE wallet_address = ? ORDER BY fetched_at DESC, id DESC LIMIT 1", (address,)
+        ).fetchone()
+        cursor = self._db.execute(
+            "INSERT INTO analyses (wallet_address, agent_input_id, created_at, start_date, end_date, model, prompt_version, analysis) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (address, latest["id"] if latest else None, time.time(), start_date, end_date, model, prompt_version, analysis),
+        )
+        self._db.commit()
+        return cursor.lastrowid
+
+    def save_routing(self, wallet_address: str, route: str, label: Optional[str], reasons: List[str],
+                     rules_version: Optional[str] = None, seconds: Optional[float] = None) -> int:
+        cursor = self._db.execute(
+            "INSERT INTO routing (wallet_address, created_at, route, label, reasons, rules_version, seconds) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (wallet_address, time.time(), route, label, json.dumps(reasons), rules_version, seconds),
+        )
+        self._db.commit()
+        return cursor.lastrowid
+
+    # --- Queries ---
+    def _agent_input(self, row: sqlite3.Row) -> Dict:
+        record = {"wallet_address": row["wallet_address"]}
+        for section in SECTIONS:
+            record[section] = json.loads(row[section]) if row[section] is not None else None
+        if row["start_date"] and row["end_date"]:
+            record["date_range"] = {"start_date": row["start_date"], "end_date": row["end_date"]}
+        record["fetched_at"] = row["fetched_at"]
+        return record
+
+    def latest_agent_input(self, wallet_address: str) -> Optional[Dict]:
+        row = self._db.execute(
+            "SELECT * FROM agent_inputs WHERE wallet_address = ? ORDER BY fetched_at DESC, id DESC LIMIT 1",
+            (wallet_address,),
+        ).fetchone()
+        return self._agent_input(row) if row else None
+
+    def analyses_for(self, wallet_address: str, since: Optional[float] = None, limit: Optional[int] = None) -> List[Dict]:
+        """Analyses for a wallet, newest first; since is a unix timestamp."""
+        sql = "SELECT * FROM analyses WHERE wallet_address = ?"
+        args: List[Any] = [wallet_address]
+        if since is not None:
+            sql += " AND created_at >= ?"
+            args.append(since)
+        sql += " ORDER BY created_at DESC"
+        if limit:
+            sql += " LIMIT ?"
+            args.append(limit)
+        return [dict(row) for row in self._db.execute(sql, args)]
+
+    def find_wallets(self, minimums: Optional[Dict[str, float]] = None, maximums: Optional[Dict[str, float]] = None,
+                     trading_style: Optional[str] = None, since: Optional[float] = None,
+                     limit: Optional[int] = None) -> List[Dict]:
+        """Latest metrics per wallet, filtered on the indexed columns (inclusive bounds)."""
+        conditions, args = [], []
+        for bounds, op in ((minimums or {}, ">="), (maximums or {}, "<=")):
+            for column, value in bounds.items():
+                if column not in METRIC_COLUMNS:
+                    raise ValueError(f"Unknown metric '{column}'; choose from {', '.join(METRIC_COLUMNS)}")
+                conditions.append(f"a.{column} {op} ?")
+                args.append(value)
+        if trading_style is not None:
+            conditions.append("a.trading_style = ?")
+            args.append(trading_style)
+        if since is not None:
+            conditions.append("a.fetched_at >= ?")
+            args.append(since)
+        columns = ", ".join(f"a.{column}" for column in list(METRIC_COLUMNS) + list(TEXT_COLUMNS))
+        # Only each wallet's newest record counts, so old snapshots never match
+        sql = (f"SELECT a.wallet_address, a.fetched_at, {columns} FROM agent_inputs a "
+               "WHERE a.id = (SELECT b.id FROM agent_inputs b WHERE b.wallet_address = a.wallet_address "
+               "ORDER BY b.fetched_at DESC, b.id DESC LIMIT 1)")
+        if conditions:
+            sql += " AND " + " AND ".join(conditions)
+        sql += " ORDER BY a.fetched_at DESC"
+        if limit:
+            sql += " LIMIT ?"
+            args.append(limit)
+        return [dict(row) for row in self._db.execute(sql, args)]
+
+    def routing_summary(self, since: Optional[float] = None) -> List[Dict]:
+        """Decisions per route and label, with call counts and mean seconds; since is a unix timestamp.
+
+        Rows without seconds (LLM routes served from the completion cache) are counted in wallets
+        but not in timed or mean_seconds.
+        """
+        sql = ("SELECT route, label, COUNT(*) AS wallets, COUNT(seconds) AS timed, AVG(seconds) AS mean_seconds "
+               "FROM routing")
+        args: List[Any] = []
+        if since is not None:
+            sql += " WHERE created_at >= ?"
+            args.append(since)
+        sql += " GROUP BY route, label ORDER BY wallets DESC"
+        return [dict(row) for row in self._db.execute(sql, args)]
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def open_default_results_store() -> Optional[ResultsStore]:
+    """The shared results store, or None when RESULTS_STORE_DISABLED is set."""
+    if RESULTS_STORE_DISABLED:
+        return None
+    return ResultsStore()
+
+
+def import_agent_inputs(store: ResultsStore, records: Iterable[Dict]) -> int:
+    count = 0
+    for record in records:
+        store.save_agent_input(record)
+        count += 1
+    return count
+
+
+def _bounds(pairs: Optional[List[str]]) -> Dict[str, float]:
+    bounds = {}
+    for pair in pairs or []:
+        column, _, value = pair.partition("=")
+        bounds[column.strip()] = float(value)
+    return bounds
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Query the agent_input / analysis results store")
+    parser.add_argument("--db", default=RESULTS_DB_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_analyses = sub.add_parser("analyses", help="Analyses for one wallet, newest first")
+    p_analyses.add_argument("wallet")
+    p_analyses.add_argument("--days", type=float, help="Only analyses from the last N days")
+    p_analyses.add_argument("--full", action="store_true", help="Print the analysis text too")
+
+    p_wallets = sub.add_parser("wallets", help="Wallets whose latest metrics match the filters")
+    p_wallets.add_argument("--min", nargs="*", metavar="METRIC=VALUE", help=f"Lower bounds on: {', '.join(METRIC_COLUMNS)}")
+    p_wallets.add_argument("--max", nargs="*", metavar="METRIC=VALUE")
+    p_wallets.add_argument("--style", help="Exact trading_style")
+    p_wallets.add_argument("--limit", type=int, default=100)
+
+    p_routing = sub.add_parser("routing", help="Pre-screen routing: wallets templated vs sent to the LLM")
+    p_routing.add_argument("--days", type=float, help="Only decisions from the last N days")
+
+    p_import = sub.add_parser("import", help="Load agent_input .json / .ndjson files into the store")
+    p_import.add_argument("inputs", nargs="+")
+
+    args = parser.parse_args(argv)
+    store = ResultsStore(args.db)
+
+    if args.command == "analyses":
+        since = time.time() - args.days * 86400 if args.days else None
+        rows = store.analyses_for(args.wallet, since=since)
+        print(f"{len(rows)} analyses for {args.wallet}")
+        for row in rows:
+            created = time.strftime("%Y-%m-%d %H:%M", time.localtime(row["created_at"]))
+            print(f"- {created} | {row['model']} | prompt {row['prompt_version']} | {len(row['analysis'])} chars")
+            if args.full:
+                print(row["analysis"] + "\n")
+    elif args.command == "wallets":
+        try:
+            rows = store.find_wallets(_bounds(args.min), _bounds(args.max), args.style, limit=args.limit)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            return
+        print(f"{len(rows)} wallets")
+        for row in rows:
+            print(f"- {row['wallet_address']} | {row['trading_style']} | flipper {row['flipper_score']} | "
+                  f"PNL {row['realized_pnl']} | win rate {row['swap_win_rate']}")
+    elif args.command == "routing":
+        rows = store.routing_summary(time.time() - args.days * 86400 if args.days else None)
+        total = sum(row["wallets"] for row in rows)
+        llm = [row for row in rows if row["route"] == "llm"]
+        llm_wallets = sum(row["wallets"] for row in llm)
+        llm_timed = sum(row["timed"] for row in llm)
+        llm_seconds = (sum(row["mean_seconds"] * row["timed"] for row in llm if row["mean_seconds"] is not None)
+                       / llm_timed) if llm_timed else 0.0
+        print(f"{total} routing decisions")
+        for row in rows:
+            print(f"- {row['route']:<8} | {row['label'] or '-':<22} | {row['wallets']:>6} wallets "
+                  f"({row['wallets'] / total:.0%}) | mean {row['mean_seconds'] or 0:.2f}s")
+        skipped = total - llm_wallets
+        if skipped and llm_timed:
+            print(f"LLM calls avoided: {skipped} ({skipped / total:.0%}); "
+                  f"~{skipped * llm_seconds:.0f}s of LLM time at {llm_seconds:.1f}s per call")
+    elif args.command == "import":
+        from run_smart_analysis import iter_agent_inputs
+        print(f"Imported {import_agent_inputs(store, iter_agent_inputs(args.inputs))} agent inputs into {args.db}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,13 +4,51 @@ Smart Wallet Analysis Execution Script
 Uses the advanced prompt and complete wallet data for accurate analysis
 """
 
+import argparse
+import asyncio
+import hashlib
 import json
 import os
-from openai import OpenAI
+import sys
+import time
 from pathlib import Path
+from typing import Dict, Iterator, List
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+from llm_cache import (cached_chat_completion_timed, cached_chat_completion_timed_async, open_default_llm_cache,
+                       provider_usage, record_completion, request_key)
+from llm_scheduler import LLM_CONCURRENCY, LLM_RPM, LLM_TPM, LLMScheduler
+from llm_streaming import StreamMetrics, record_stream_metrics, stream_chat_completion
+from metrics import METRICS_FILE, export_at_exit, registry
+from prescreen import (PRESCREEN_DISABLED, PRESCREEN_MODEL, ROUTE_TEMPLATE, prescreen, prescreen_stats,
+                       record_route, rules_version)
+from profiling import StageProfiler
+from results_store import open_default_results_store
+
+# OpenAI client, created on first use so offline helpers (e.g. llm_batch) can import this module without a key;
+# the openai package itself takes most of a second to import, so it is only loaded here
+_client = None
+
+def get_client():
+    global _client
+    if _client is None:
+        from openai import OpenAI
+
+        _client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    return _client
+
+# Identical prompt + data + model settings are answered from the local completion cache
+llm_cache = open_default_llm_cache()
+
+# Analyses are also indexed by wallet, model and prompt version (RESULTS_STORE_DISABLED=1 to skip)
+results_store = open_default_results_store()
+
+MODEL = "gpt-4o"  # GPT-4 Omni for best analysis
+SYSTEM_PROMPT = "You are a senior cryptocurrency portfolio analyst with deep expertise in Solana DeFi, meme coin trading strategies, and institutional-grade financial analysis. Provide professional, data-driven insights with institutional credibility."
+LLM_PARAMS = {
+    "max_tokens": 2000,
+    "temperature": 0.2,  # Low temperature for consistent analysis
+    "top_p": 0.9,
+}
 
 def load_smart_prompt():
     """Load the advanced analysis prompt"""
@@ -18,6 +56,12 @@ def load_smart_prompt():
     with open(prompt_path, 'r', encoding='utf-8') as f:
         return f.read()
 
+def prompt_version():
+    """Short hash of the system + analysis prompt, stored with each analysis"""
+    material = SYSTEM_PROMPT + "\n\n" + load_smart_prompt()
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()[:12]
+
+@registry.timed_function
 def format_wallet_data_for_analysis(agent_input):
     """Format the complete wallet data for optimal LLM analysis"""
     
@@ -110,21 +154,110 @@ def format_wallet_data_for_analysis(agent_input):
 
     return formatted_data
 
-def run_smart_analysis():
-    """Execute the complete smart wallet analysis"""
+def build_messages(smart_prompt, wallet_data):
+    """Chat messages for one wallet, laid out for provider prompt caching.
     
-    print("🧠 Loading Smart Analysis System...")
+    The system role and the static analysis instructions form one byte-identical
+    prefix on every call; only the final user message carries per-wallet data.
+    """
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT + "\n\n" + smart_prompt},
+        {"role": "user", "content": format_wallet_data_for_analysis(wallet_data)}
+    ]
+
+def analysis_output_path(wallet_data):
+    return f"smart_analysis_{wallet_data['wallet_address'][:8]}.md"
+
+def is_unchanged(wallet_data):
+    """True when an incremental fetch found no new activity and an analysis already exists"""
+    return wallet_data.get('refreshed_sections') == [] and Path(analysis_output_path(wallet_data)).exists()
+
+def write_analysis_header(f, wallet_data):
+    f.write(f"# Smart Wallet Analysis: {wallet_data['wallet_address']}\n\n")
+    f.write(f"**Analysis Date**: {wallet_data['pnl_overview']['data_from']}\n\n")
+
+def store_analysis(wallet_data, analysis_result, model=MODEL, version=None):
+    if results_store is not None:
+        results_store.save_analysis(wallet_data, analysis_result, model=model,
+                                    prompt_version=version or prompt_version())
+
+def save_analysis(wallet_data, analysis_result, model=MODEL, version=None):
+    output_file = analysis_output_path(wallet_data)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        write_analysis_header(f, wallet_data)
+        f.write(analysis_result)
+    store_analysis(wallet_data, analysis_result, model, version)
+    return output_file
+
+def screen_wallet(wallet_data, enabled=True):
+    """Pre-screen a wallet; clear-cut ones get their templated report saved and recorded here.
+
+    Returns the verdict (None when pre-screening is off) so the caller can record the LLM route
+    with the call's duration.
+    """
+    if not enabled or PRESCREEN_DISABLED:
+        return None
+    started = time.perf_counter()
+    verdict = prescreen(wallet_data)
+    if verdict.route == ROUTE_TEMPLATE:
+        save_analysis(wallet_data, verdict.report, model=PRESCREEN_MODEL, version=rules_version())
+        record_route(verdict, time.perf_counter() - started, results_store)
+    return verdict
+
+def stream_analysis(wallet_data, messages):
+    """Print tokens and append them to the output file as they arrive, recording TTFT and tokens/sec.
+
+    Returns the analysis and its StreamMetrics (metrics.cached when the completion cache answered).
+    """
+    key = request_key(MODEL, messages, LLM_PARAMS)
+    cached = llm_cache.get(key) if llm_cache else None
     
-    # Load prompt and data
-    smart_prompt = load_smart_prompt()
+    with open(analysis_output_path(wallet_data), 'w', encoding='utf-8') as f:
+        write_analysis_header(f, wallet_data)
+        f.flush()
+        
+        def emit(delta):
+            sys.stdout.write(delta)
+            sys.stdout.flush()
+            f.write(delta)
+            f.flush()
+        
+        if cached:
+            started = time.perf_counter()
+            emit(cached['content'])
+            analysis_result = cached['content']
+            metrics = StreamMetrics(model=MODEL, time_to_first_token=0.0, total_latency=time.perf_counter() - started,
+                                    completion_tokens=cached['completion_tokens'], prompt_tokens=cached['prompt_tokens'],
+                                    cached=True)
+        else:
+            analysis_result, metrics = stream_chat_completion(get_client(), MODEL, messages, emit, **LLM_PARAMS)
+            record_completion(llm_cache, key, MODEL, analysis_result, metrics.prompt_tokens,
+                              metrics.completion_tokens, metrics.total_latency, metrics.cached_prompt_tokens)
     
-    with open('agent_input_gake.json', 'r') as f:
-        wallet_data = json.load(f)
+    store_analysis(wallet_data, analysis_result)
+    metrics.wallet_address = wallet_data['wallet_address']
+    record_stream_metrics(metrics)
+    print(f"\n\n⚡ {metrics.report()}")
+    return analysis_result, metrics
+
+def run_smart_analysis(stream=False, profiler=None, screen=True):
+    """Execute the complete smart wallet analysis (token-by-token output with stream=True)"""
+    profiler = profiler or StageProfiler()
+    
+    print("🧠 Loading Smart Analysis System...")
     
-    formatted_data = format_wallet_data_for_analysis(wallet_data)
+    # Load prompt and data
+    with profiler.stage("load"):
+        smart_prompt = load_smart_prompt()
+        
+        with open('agent_input_gake.json', 'r') as f:
+            wallet_data = json.load(f)
     
-    # Combine prompt with data
-    full_prompt = smart_prompt + "\n\n" + formatted_data
+    # Incremental fetches mark wallets with no new activity; reuse the previous analysis for those
+    output_file = analysis_output_path(wallet_data)
+    if is_unchanged(wallet_data):
+        print(f"⏭️  Wallet unchanged since last fetch - reusing {output_file}")
+        return Path(output_file).read_text(encoding='utf-8')
     
     print(f"📊 Analyzing wallet: {wallet_data['wallet_address'][:8]}...")
     print(f"💰 Total PNL: {wallet_data['pnl_overview']['realized_pnl']:.0f} SOL")
@@ -132,25 +265,43 @@ def run_smart_analysis():
     print(f"🔄 Activity: {wallet_data['behavior']['unique_tokens_traded']} tokens, {wallet_data['behavior']['total_trade_count']} trades")
     
     try:
-        # Call OpenAI with optimized parameters
-        response = client.chat.completions.create(
-            model="gpt-4o",  # GPT-4 Omni for best analysis
-            messages=[
-                {
-                    "role": "system", 
-                    "content": "You are a senior cryptocurrency portfolio analyst with deep expertise in Solana DeFi, meme coin trading strategies, and institutional-grade financial analysis. Provide professional, data-driven insights with institutional credibility."
-                },
-                {
-                    "role": "user", 
-                    "content": full_prompt
-                }
-            ],
-            max_tokens=2000,
-            temperature=0.2,  # Low temperature for consistent analysis
-            top_p=0.9
-        )
+        # Clear-cut wallets (bots, near-empty histories, dormant wallets) get a templated report instead
+        with profiler.stage("prescreen"):
+            verdict = screen_wallet(wallet_data, screen)
+        if verdict and verdict.route == ROUTE_TEMPLATE:
+            print("\n" + "="*60)
+            print(f"🚦 PRE-SCREENED: {verdict.label} (no LLM call)")
+            print("="*60)
+            print(verdict.report)
+            print(f"💾 Report saved to: {output_file}")
+            return verdict.report
+
+        with profiler.stage("format"):
+            messages = build_messages(smart_prompt, wallet_data)
+
+        if stream:
+            print("\n" + "="*60)
+            print("🚀 SMART WALLET ANALYSIS (streaming)")
+            print("="*60)
+            # Streaming writes the file as tokens arrive, so llm and save are one stage here
+            with profiler.stage("llm"):
+                analysis_result, metrics = stream_analysis(wallet_data, messages)
+            if verdict:
+                record_route(verdict, None if metrics.cached else metrics.total_latency, results_store)
+            print(f"💾 Analysis saved to: {output_file}")
+            return analysis_result
         
-        analysis_result = response.choices[0].message.content
+        # Call OpenAI with optimized parameters
+        with profiler.stage("llm"):
+            analysis_result, latency = cached_chat_completion_timed(
+                get_client(),
+                llm_cache,
+                model=MODEL,
+                messages=messages,
+                **LLM_PARAMS
+            )
+        if verdict:
+            record_route(verdict, latency, results_store)
         
         # Display results
         print("\n" + "="*60)
@@ -159,13 +310,13 @@ def run_smart_analysis():
         print(analysis_result)
         
         # Save results
-        output_file = f"smart_analysis_{wallet_data['wallet_address'][:8]}.md"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(f"# Smart Wallet Analysis: {wallet_data['wallet_address']}\n\n")
-            f.write(f"**Analysis Date**: {wallet_data['pnl_overview']['data_from']}\n\n")
-            f.write(analysis_result)
+        with profiler.stage("save"):
+            save_analysis(wallet_data, analysis_result)
         
         print(f"\n💾 Analysis saved to: {output_file}")
+        print(f"🧾 {provider_usage.report()}")
+        if llm_cache:
+            print(f"🗄️  {llm_cache.stats.report()}")
         
         return analysis_result
         
@@ -173,10 +324,116 @@ def run_smart_analysis():
         print(f"❌ Analysis failed: {str(e)}")
         return None
 
-if __name__ == "__main__":
+def iter_agent_inputs(paths: List[str]) -> Iterator[Dict]:
+    """Yield agent_input records from .json files and/or .ndjson batch outputs"""
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            if path.endswith('.ndjson') or path.endswith('.jsonl'):
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+            else:
+                yield json.load(f)
+
+async def run_batch_analysis(paths: List[str], rpm: float = LLM_RPM, tpm: float = LLM_TPM,
+                             concurrency: int = LLM_CONCURRENCY, screen: bool = True) -> Dict[str, int]:
+    """Analyze many wallets at once under RPM/TPM limits, writing one markdown file per wallet"""
+    from openai import AsyncOpenAI
+
+    smart_prompt = load_smart_prompt()
+    # The scheduler owns 429 handling, so the SDK's own retries are turned off
+    async_client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'), max_retries=0)
+    scheduler = LLMScheduler(rpm=rpm, tpm=tpm, max_concurrency=concurrency)
+    stats = {"analyzed": 0, "prescreened": 0, "unchanged": 0, "failed": 0}
+    # Bounded set of in-flight wallets so huge NDJSON inputs are never fully loaded
+    in_flight = asyncio.Semaphore(concurrency * 4)
+
+    async def analyze(wallet_data):
+        try:
+            if is_unchanged(wallet_data):
+                stats["unchanged"] += 1
+                return
+            verdict = screen_wallet(wallet_data, screen)
+            if verdict and verdict.route == ROUTE_TEMPLATE:
+                stats["prescreened"] += 1
+                return
+            analysis_result, latency = await cached_chat_completion_timed_async(
+                async_client,
+                llm_cache,
+                model=MODEL,
+                messages=build_messages(smart_prompt, wallet_data),
+                scheduler=scheduler,
+                **LLM_PARAMS
+            )
+            if verdict:
+                record_route(verdict, latency, results_store)
+            save_analysis(wallet_data, analysis_result)
+            stats["analyzed"] += 1
+        except Exception as e:
+            print(f"❌ Analysis failed for {wallet_data.get('wallet_address')}: {str(e)}")
+            stats["failed"] += 1
+        finally:
+            in_flight.release()
+
+    started = time.perf_counter()
+    tasks = set()
+    for wallet_data in iter_agent_inputs(paths):
+        await in_flight.acquire()
+        task = asyncio.create_task(analyze(wallet_data))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    done = stats["analyzed"] + stats["prescreened"] + stats["unchanged"]
+    print(f"\n🚀 Batch complete: {stats['analyzed']} analyzed, {stats['prescreened']} pre-screened, "
+          f"{stats['unchanged']} unchanged, {stats['failed']} failed")
+    print(f"⏱️  {elapsed:.1f}s elapsed, {done / elapsed * 60 if elapsed else 0:.1f} wallets/min sustained")
+    print(f"📈 {scheduler.stats.report('LLM calls')}")
+    if prescreen_stats.screened:
+        print(f"🚦 {prescreen_stats.report()}")
+    print(f"🧾 {provider_usage.report()}")
+    if llm_cache:
+        print(f"🗄️  {llm_cache.stats.report()}")
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Smart wallet analysis with the advanced prompt")
+    parser.add_argument("--batch", nargs="+", metavar="FILE",
+                        help="agent_input .json files or .ndjson batch outputs to analyze concurrently")
+    parser.add_argument("--rpm", type=float, default=LLM_RPM, help="Requests per minute limit")
+    parser.add_argument("--tpm", type=float, default=LLM_TPM, help="Tokens per minute limit")
+    parser.add_argument("--concurrency", type=int, default=LLM_CONCURRENCY, help="Maximum simultaneous LLM calls")
+    parser.add_argument("--metrics", metavar="FILE", default=METRICS_FILE,
+                        help="Write request/LLM/sanitize metrics at exit: Prometheus text for .prom/.txt, JSON otherwise")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream tokens to stdout and the output file as they arrive, with TTFT/tokens-per-second metrics")
+    parser.add_argument("--profile", action="store_true",
+                        help="Run each stage under cProfile and tracemalloc and write a per-stage report under PROFILE_DIR")
+    parser.add_argument("--no-prescreen", action="store_true",
+                        help="Send every wallet to the LLM, skipping the deterministic pre-screen (PRESCREEN_DISABLED=1)")
+    args = parser.parse_args()
+    export_at_exit(args.metrics)
+
     # Check for API key
     if not os.getenv('OPENAI_API_KEY'):
         print("❌ Please set your OPENAI_API_KEY environment variable")
         exit(1)
     
-    run_smart_analysis()
\ No newline at end of file
+    profiler = StageProfiler(args.profile, "analysis")
+    try:
+        if args.batch:
+            # Concurrent wallets interleave every step, so a batch is profiled as one stage
+            with profiler.stage("batch"):
+                asyncio.run(run_batch_analysis(args.batch, rpm=args.rpm, tpm=args.tpm, concurrency=args.concurrency,
+                                               screen=not args.no_prescreen))
+        else:
+            run_smart_analysis(stream=args.stream, profiler=profiler, screen=not args.no_prescreen)
+    finally:
+        report_path = profiler.write_report()
+        if report_path:
+            print(f"📐 Profile report written to {report_path}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
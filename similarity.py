@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Local wallet similarity over token-performance rows, for cohorts far larger than the
+backend's similarity queue handles.
+
+The token-performance rows of N wallets become two sparse wallet x token matrices:
+
+- binary    1 where the wallet traded the token (the backend's binary vectors)
+- capital   the token's share of all SOL the wallet spent (the backend's capital
+            allocation vectors, built from totalSolSpent instead of raw 'in' transfers)
+
+and the scores of the backend's SimilarityPair are computed for every pair in batch:
+
+    binary_score    cosine of the binary vectors = shared / sqrt(count_a * count_b)
+    capital_score   cosine of the capital vectors
+    jaccard_score   shared / (count_a + count_b - shared)
+
+Pairs where either vector is all zeros score 0, as in the backend. Rows are processed
+in blocks so memory stays bounded for 10k+ wallets; only the top-k neighbours of each
+wallet are kept.
+
+    wallet-agent similarity --input agent_inputs.ndjson --top-k 10
+    wallet-agent similarity --fetch wallets.txt --output neighbours.ndjson
+
+agent_input records only carry the TOP_TOKENS largest rows; --fetch walks every
+token-performance page instead (one paginated request chain per wallet, not per pair).
+numpy and scipy are imported on first use.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from profiling import StageProfiler
+
+if TYPE_CHECKING:
+    import numpy as np
+    import scipy.sparse as sp
+
+# Load environment variables from .env file
+load_dotenv()
+
+# --- Configuration ---
+SIMILARITY_TOP_K = int(os.getenv("SIMILARITY_TOP_K", "10"))
+SIMILARITY_RANK_BY = os.getenv("SIMILARITY_RANK_BY", "binary")
+SIMILARITY_MIN_SCORE = float(os.getenv("SIMILARITY_MIN_SCORE", "0"))
+SIMILARITY_SHARED_TOKENS = int(os.getenv("SIMILARITY_SHARED_TOKENS", "3"))
+# Mints that say nothing about a wallet's picks (wrapped SOL, USDC, USDT), comma-separated
+SIMILARITY_EXCLUDED_MINTS = os.getenv(
+    "SIMILARITY_EXCLUDED_MINTS",
+    "So11111111111111111111111111111111111111112,"
+    "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v,"
+    "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY9NCHZPB9UY6bC",
+)
+# Dense wallets x wallets cells per block (float32): 16M cells is 64 MiB per block array
+SIMILARITY_BLOCK_CELLS = 16_000_000
+# Tokens held by at least this share of the cohort are multiplied densely (at most this many)
+SIMILARITY_DENSE_FRACTION = 0.02
+SIMILARITY_DENSE_COLUMNS = 512
+
+SCORES = ("binary", "capital", "jaccard")
+
+
+@dataclass
+class TokenMatrix:
+    wallets: List[str]
+    mints: List[str]
+    binary: "sp.csr_matrix"   # wallets x mints, 1.0 where traded
+    capital: "sp.csr_matrix"  # wallets x mints, share of the wallet's SOL spent; rows sum to 1 or are empty
+
+    @property
+    def token_counts(self) -> "np.ndarray":
+        """Unique tokens per wallet (the backend's uniqueTokensPerWallet)."""
+        import numpy as np
+        return np.diff(self.binary.indptr)
+
+
+@dataclass
+class Neighbours:
+    """Top-k neighbours per wallet: row i holds wallet i's neighbours, best first, -1 padded."""
+    matrix: TokenMatrix
+    index: "np.ndarray"
+    binary: "np.ndarray"
+    capital: "np.ndarray"
+    jaccard: "np.ndarray"
+    shared: "np.ndarray"
+
+    def pairs(self, i: int, shared_tokens: int = SIMILARITY_SHARED_TOKENS) -> List[Dict]:
+        """Wallet i's neighbours as SimilarityPair-shaped dicts."""
+        wallets, indptr = self.matrix.wallets, self.matrix.binary.indptr
+        weights_a = self._weights(i) if shared_tokens else None
+        pairs = []
+        for j, binary, capital, jaccard, shared in zip(self.index[i].tolist(), self.binary[i].tolist(),
+                                                       self.capital[i].tolist(), self.jaccard[i].tolist(),
+                                                       self.shared[i].tolist()):
+            if j < 0:
+                break
+            pairs.append({
+                "wallet_a": wallets[i],
+                "wallet_b": wallets[j],
+                "binary_score": round(binary, 6),
+                "capital_score": round(capital, 6),
+                "jaccard_score": round(jaccard, 6),
+                "shared_token_count": int(shared),
+                "unique_token_count_a": int(indptr[i + 1] - indptr[i]),
+                "unique_token_count_b": int(indptr[j + 1] - indptr[j]),
+                "shared_tokens": self._shared_tokens(weights_a, self._weights(j), shared_tokens) if shared_tokens else [],
+            })
+        return pairs
+
+    def _weights(self, i: int) -> Dict[int, float]:
+        capital = self.matrix.capital
+        row = slice(capital.indptr[i], capital.indptr[i + 1])
+        return dict(zip(capital.indices[row].tolist(), capital.data[row].astype(float).round(6).tolist()))
+
+    def _shared_tokens(self, weights_a: Dict[int, float], weights_b: Dict[int, float], limit: int) -> List[Dict]:
+        """Up to `limit` tokens both wallets traded, by combined capital weight."""
+        shared = sorted(weights_a.keys() & weights_b.keys(), key=lambda c: weights_a[c] + weights_b[c], reverse=True)
+        return [{"mint": self.matrix.mints[c], "weight_a": weights_a[c], "weight_b": weights_b[c]} for c in shared[:limit]]
+
+
+def _row_value(row: Dict, sanitized: str, raw: str):
+    """Token rows come either sanitized (agent_input) or straight from the backend."""
+    value = row.get(sanitized)
+    return row.get(raw) if value is None else value
+
+
+def build_matrix(wallet_rows: Iterable[Tuple[str, List[Dict]]],
+                 excluded_mints: Iterable[str] = ()) -> TokenMatrix:
+    """Binary and capital wallet x token matrices from (wallet, token rows) pairs.
+
+    A wallet listed twice keeps its last rows. Capital uses each row's SOL spent; a wallet
+    that spent nothing keeps an empty capital row (capital_score 0 against everyone).
+    """
+    import numpy as np
+    import scipy.sparse as sp
+
+    excluded = set(excluded_mints)
+    by_wallet: Dict[str, Dict[int, float]] = {}
+    columns: Dict[str, int] = {}
+    for wallet, rows in wallet_rows:
+        spent: Dict[int, float] = {}
+        for row in rows or []:
+            mint = _row_value(row, "token_address", "tokenAddress")
+            if not mint or mint in excluded:
+                continue
+            column = columns.setdefault(mint, len(columns))
+            spent[column] = spent.get(column, 0.0) + max(float(_row_value(row, "total_sol_spent", "totalSolSpent") or 0), 0.0)
+        by_wallet[wallet] = spent
+
+    wallets = list(by_wallet)
+    indptr = np.zeros(len(wallets) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(spent) for spent in by_wallet.values()])
+    indices = np.fromiter((c for spent in by_wallet.values() for c in spent), dtype=np.int32, count=indptr[-1])
+    sol = np.fromiter((v for spent in by_wallet.values() for v in spent.values()), dtype=np.float64, count=indptr[-1])
+    shape = (len(wallets), len(columns))
+
+    binary = sp.csr_matrix((np.ones(len(indices), dtype=np.float32), indices, indptr), shape=shape)
+    row_ids = np.repeat(np.arange(len(wallets)), np.diff(indptr))
+    row_totals = np.bincount(row_ids, weights=sol, minlength=len(wallets))[row_ids]
+    shares = np.divide(sol, row_totals, out=np.zeros_like(sol), where=row_totals > 0)
+    capital = sp.csr_matrix((shares.astype(np.float32), indices.copy(), indptr.copy()), shape=shape)
+    capital.eliminate_zeros()
+    binary.sort_indices()
+    capital.sort_indices()
+    return TokenMatrix(wallets, list(columns), binary, capital)
+
+
+def _unit_rows(matrix: "sp.csr_matrix") -> "sp.csr_matrix":
+    import numpy as np
+    import scipy.sparse as sp
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    inverse = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+    return (sp.diags(inverse.astype(np.float32)) @ matrix).tocsr()
+
+
+class _GramBlocks:
+    """Row blocks of M @ M.T for a sparse wallets x tokens matrix M, as dense arrays.
+
+    Popular tokens (held by at least SIMILARITY_DENSE_FRACTION of wallets) make the sparse
+    product nearly dense and slow, so their columns are multiplied as a dense BLAS product
+    and only the long tail of rare tokens goes through the sparse one.
+    """
+
+    def __init__(self, matrix: "sp.csr_matrix"):
+        import numpy as np
+        by_column = matrix.tocsc()
+        holders = np.diff(by_column.indptr)
+        hot = np.flatnonzero(holders >= max(SIMILARITY_DENSE_FRACTION * matrix.shape[0], 2))
+        hot = hot[np.argsort(-holders[hot], kind="stable")[:SIMILARITY_DENSE_COLUMNS]]
+        cold = np.setdiff1d(np.arange(matrix.shape[1]), hot)
+        self.hot = np.ascontiguousarray(by_column[:, hot].toarray(), dtype=np.float32)
+        self.cold = by_column[:, cold].tocsr()
+        self.cold_t = self.cold.T.tocsr()
+
+    def rows(self, start: int, stop: int) -> "np.ndarray":
+        block = (self.cold[start:stop] @ self.cold_t).toarray()
+        if self.hot.shape[1]:
+            block += self.hot[start:stop] @ self.hot.T
+        return block
+
+
+def _scores(by: str, shared: "np.ndarray", counts_a: "np.ndarray", counts_b: "np.ndarray") -> "np.ndarray":
+    """binary or jaccard scores from shared-token counts; 0 where either wallet has no tokens."""
+    import numpy as np
+    if by == "binary":
+        denominator = np.sqrt(counts_a * counts_b)
+    else:
+        denominator = counts_a + counts_b - shared
+    return np.divide(shared, denominator, out=np.zeros_like(shared), where=denominator > 0)
+
+
+def similarity_matrices(matrix: TokenMatrix) -> Dict[str, "np.ndarray"]:
+    """Full N x N binary, capital and jaccard matrices (diagonal 1), for cohorts small enough to hold densely."""
+    import numpy as np
+    shared = (matrix.binary @ matrix.binary.T).toarray()
+    counts = matrix.token_counts.astype(np.float32)
+    unit = _unit_rows(matrix.capital)
+    result = {
+        "binary": _scores("binary", shared, counts[:, None], counts[None, :]),
+        "capital": (unit @ unit.T).toarray(),
+        "jaccard": _scores("jaccard", shared, counts[:, None], counts[None, :]),
+    }
+    for scores in result.values():
+        np.fill_diagonal(scores, 1.0)
+    return result
+
+
+def top_k_neighbours(matrix: TokenMatrix, k: int = SIMILARITY_TOP_K, by: str = SIMILARITY_RANK_BY,
+                     min_score: float = SIMILARITY_MIN_SCORE, block_cells: int = SIMILARITY_BLOCK_CELLS) -> Neighbours:
+    """Each wallet's k most similar wallets by `by` (binary, capital or jaccard), all three scores kept.
+
+    Only pairs scoring above min_score are kept (never pairs scoring 0). Wallet rows are
+    scored in blocks of block_cells / N rows against the whole cohort.
+    """
+    import numpy as np
+
+    if by not in SCORES:
+        raise ValueError(f"Unknown similarity score {by!r}; expected one of {', '.join(SCORES)}")
+    n = len(matrix.wallets)
+    k = max(min(k, n - 1), 0)
+    counts = matrix.token_counts.astype(np.float32)
+    shared_blocks = _GramBlocks(matrix.binary)
+    unit = _unit_rows(matrix.capital)
+    capital_blocks = _GramBlocks(unit) if by == "capital" else None
+
+    index = np.full((n, k), -1, dtype=np.int64)
+    ranked = np.zeros((n, k), dtype=np.float32)
+    shared = np.zeros((n, k), dtype=np.float32)
+    block_rows = max(1, block_cells // max(n, 1))
+    for start in range(0, n, block_rows):
+        stop = min(start + block_rows, n)
+        rows = np.arange(stop - start)
+        block_shared = shared_blocks.rows(start, stop)
+        if by == "capital":
+            block_scores = capital_blocks.rows(start, stop)
+        else:
+            block_scores = _scores(by, block_shared, counts[start:stop, None], counts[None, :])
+        block_scores[rows, rows + start] = -np.inf  # never your own neighbour
+        top = np.argpartition(-block_scores, k - 1, axis=1)[:, :k] if k else np.empty((stop - start, 0), np.int64)
+        top_scores = np.take_along_axis(block_scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        keep = top_scores > max(min_score, 0.0)
+        index[start:stop] = np.where(keep, top, -1)
+        ranked[start:stop] = np.where(keep, top_scores, 0.0)
+        shared[start:stop] = np.where(keep, np.take_along_axis(block_shared, top, axis=1), 0.0)
+
+    # The other two scores, for the kept pairs only
+    kept = index >= 0
+    rows = np.broadcast_to(np.arange(n)[:, None], index.shape)[kept]
+    cols = index[kept]
+    scores = {by: ranked}
+    for name in SCORES:
+        if name == by:
+            continue
+        values = np.zeros((n, k), dtype=np.float32)
+        if name == "capital":
+            values[kept] = np.asarray(unit[rows].multiply(unit[cols]).sum(axis=1)).ravel()
+        else:
+            values[kept] = _scores(name, shared[kept], counts[rows], counts[cols])
+        scores[name] = values
+    return Neighbours(matrix, index, scores["binary"], scores["capital"], scores["jaccard"], shared)
+
+
+# --- Input ---
+def read_agent_inputs(paths: Iterable[str]) -> Iterator[Tuple[str, List[Dict]]]:
+    """(wallet, token_performance) from agent_input JSON or NDJSON files."""
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            if path.endswith(".json"):
+                records = [json.load(f)]
+            else:
+                records = (json.loads(line) for line in f if line.strip())
+            for record in records:
+                rows = record.get("token_performance")
+                if isinstance(rows, dict):  # unsanitized paginated envelope
+                    rows = rows.get("data")
+                yield record["wallet_address"], rows or []
+
+
+def write_neighbours(neighbours: Neighbours, path: str, shared_tokens: int = SIMILARITY_SHARED_TOKENS) -> None:
+    """One NDJSON line per wallet: its unique token count and ranked neighbours."""
+    counts = neighbours.matrix.token_counts
+    with open(path, "w", encoding="utf-8") as out:
+        for i, wallet in enumerate(neighbours.matrix.wallets):
+            out.write(json.dumps({"wallet_address": wallet, "unique_token_count": int(counts[i]),
+                                  "neighbours": neighbours.pairs(i, shared_tokens)}) + "\n")
+
+
+def most_similar_pairs(neighbours: Neighbours, by: str, limit: int = 5) -> List[Tuple[float, int, int]]:
+    """The highest-scoring distinct pairs across all neighbour lists, as (score, i, j)."""
+    import numpy as np
+    scores = getattr(neighbours, by)
+    best: Dict[Tuple[int, int], float] = {}
+    rows, slots = np.nonzero(neighbours.index >= 0)
+    for i, slot in zip(rows.tolist(), slots.tolist()):
+        j = int(neighbours.index[i, slot])
+        best[(min(i, j), max(i, j))] = float(scores[i, slot])
+    return sorted(((score, i, j) for (i, j), score in best.items()), reverse=True)[:limit]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Top-k similar wallets from token-performance rows, computed locally")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", metavar="FILE", nargs="+",
+                        help="agent_input JSON / NDJSON files (only their top TOP_TOKENS rows are used)")
+    source.add_argument("--fetch", metavar="FILE",
+                        help="File with one wallet address per line ('-' for stdin); fetches every token row per wallet")
+    parser.add_argument("--output", default="similarity.ndjson", help="NDJSON of neighbours per wallet")
+    parser.add_argument("--top-k", type=int, default=SIMILARITY_TOP_K, help="Neighbours kept per wallet")
+    parser.add_argument("--by", choices=SCORES, default=SIMILARITY_RANK_BY, help="Score used to rank neighbours")
+    parser.add_argument("--min-score", type=float, default=SIMILARITY_MIN_SCORE,
+                        help="Drop neighbours scoring at or below this")
+    parser.add_argument("--shared-tokens", type=int, default=SIMILARITY_SHARED_TOKENS,
+                        help="Shared tokens listed per pair, by combined capital weight")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("BATCH_CONCURRENCY", "8")), help="Wallets fetched at once with --fetch")
+    parser.add_argument("--profile", action="store_true",
+                        help="Run each stage under cProfile and tracemalloc and write a per-stage report under PROFILE_DIR")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    profiler = StageProfiler(args.profile, "similarity")
+    try:
+        run(args, profiler)
+    finally:
+        report_path = profiler.write_report()
+        if report_path:
+            print(f"Profile report written to {report_path}")
+
+
+def run(args: argparse.Namespace, profiler: StageProfiler):
+    started = time.perf_counter()
+    with profiler.stage("load"):
+        if args.fetch:
+            from fetch_wallet_data_complete import fetch_all_token_rows, read_wallet_list
+            wallet_rows = asyncio.run(fetch_all_token_rows(read_wallet_list(args.fetch), args.concurrency))
+        else:
+            wallet_rows = list(read_agent_inputs(args.input))
+    excluded = [mint.strip() for mint in SIMILARITY_EXCLUDED_MINTS.split(",") if mint.strip()]
+    with profiler.stage("matrix"):
+        matrix = build_matrix(wallet_rows, excluded)
+    print(f"{len(matrix.wallets)} wallets x {len(matrix.mints)} tokens, {matrix.binary.nnz} wallet-token entries")
+    if len(matrix.wallets) < 2:
+        print("ERROR: Need at least two wallets with token data to compare")
+        return
+    with profiler.stage("neighbours"):
+        neighbours = top_k_neighbours(matrix, args.top_k, args.by, args.min_score)
+    with profiler.stage("save"):
+        write_neighbours(neighbours, args.output, args.shared_tokens)
+
+    print(f"\nMost similar pairs by {args.by} score:")
+    for score, i, j in most_similar_pairs(neighbours, args.by):
+        print(f"  {score:.3f}  {matrix.wallets[i]}  {matrix.wallets[j]}")
+    print(f"\nTop {args.top_k} neighbours per wallet written to {args.output} "
+          f"in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
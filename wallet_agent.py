@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Single entry point for the wallet agent scripts (installed as `wallet-agent`).
+
+    wallet-agent fetch --batch wallets.txt
+    wallet-agent analyze --stream
+    wallet-agent results wallets --min win_rate=60
+
+Each command runs the main() of the script it names, with the remaining arguments.
+Nothing is imported until a command is chosen, and the scripts themselves load openai,
+anthropic, httpx, pydantic, numpy and their SQLite stores only when they are first used, so `--help`
+and cache-only runs start fast (see benchmarks/bench_startup.py for the budget).
+"""
+
+import argparse
+import importlib
+import sys
+from typing import List, Optional
+
+# command -> (module, one-line help)
+COMMANDS = {
+    "fetch": ("fetch_wallet_data_complete", "Fetch complete wallet data into agent_input JSON / NDJSON"),
+    "fetch-basic": ("fetch_wallet_data", "Fetch the basic agent_input for WALLET_ADDRESS"),
+    "analyze": ("run_smart_analysis", "Run the smart LLM analysis on agent_input files"),
+    "pipeline": ("wallet_pipeline", "Fetch, sanitize, analyze and save wallets in one streaming pipeline"),
+    "orchestrate": ("job_orchestrator", "Sync cold wallets through backend jobs, then fetch them"),
+    "llm-batch": ("llm_batch", "Build, submit and ingest offline LLM batch jobs"),
+    "plan": ("fetch_plan", "Show the endpoints and fields a prompt template needs; check formatters against them"),
+    "agent": ("react_agent", "Answer questions about a wallet with a tool-using ReAct agent"),
+    "eval": ("prompt_eval", "Compare prompt templates x models over a sample of wallets, concurrently"),
+    "results": ("results_store", "Query stored agent_inputs and analyses"),
+    "similarity": ("similarity", "Top-k similar wallets from token-performance rows, computed locally"),
+    "windows": ("window_metrics", "PnL metrics for 7d/30d/90d/... windows from one token-performance fetch"),
+}
+
+
+def main(argv: Optional[List[str]] = None):
+    commands = "\n".join(f"  {name:<13} {help_text}" for name, (_, help_text) in COMMANDS.items())
+    parser = argparse.ArgumentParser(prog="wallet-agent", description="Solana wallet analysis agent",
+                                     epilog=f"commands:\n{commands}\n\nRun 'wallet-agent <command> --help' for its options.",
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=COMMANDS, metavar="command")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    module = importlib.import_module(COMMANDS[args.command][0])
+    # The scripts parse sys.argv themselves; prog shows up in their usage lines
+    sys.argv = [f"wallet-agent {args.command}"] + args.args
+    return module.main()
+
+
+if __name__ == "__main__":
+    main()
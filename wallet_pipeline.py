@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+In-process streaming pipeline: fetch -> sanitize -> format -> LLM -> persist.
+
+Replaces the fetch_wallet_data_complete.py -> JSON file -> run_smart_analysis.py hand-off.
+Stages are joined by bounded asyncio queues and each runs its own number of workers, so
+when the LLM stage is the slowest its input queue fills up and fetching pauses instead of
+buffering every fetched wallet in memory. Queue depth and throughput are printed per stage
+while the run is going and summarised at the end; the stage with full input queues and
+busy workers is the one limiting the run. Wallets the deterministic pre-screen
+(prescreen.py) can classify on its own pass through the LLM stage without a call. With
+--minimal-fetch, only the endpoints and fields the smart prompt and the pre-screen read
+are fetched (fetch_plan.py) and the NDJSON records carry just those fields.
+
+    python wallet_pipeline.py wallets.txt --output agent_inputs.ndjson
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+
+from dotenv import load_dotenv
+
+from api_client import AsyncWalletApiClient
+import fetch_wallet_data_complete as complete
+from fetch_wallet_data_complete import (API_BASE_URL, API_KEY, END_DATE, START_DATE, STATUS_CHUNK_SIZE,
+                                        build_agent_input, chunked, fetch_wallet_sections, filter_wallets_by_status,
+                                        missing_section, read_wallet_list)
+from llm_cache import cached_chat_completion_timed_async, provider_usage
+from llm_scheduler import LLM_CONCURRENCY, LLM_RPM, LLM_TPM, LLMScheduler
+from metrics import METRICS_FILE, export_at_exit
+from prescreen import (PRESCREEN_DISABLED, PRESCREEN_MODEL, ROUTE_TEMPLATE, prescreen, prescreen_stats,
+                       record_route, rules_version)
+from run_smart_analysis import LLM_PARAMS, MODEL, build_messages, llm_cache, load_smart_prompt, save_analysis
+
+if TYPE_CHECKING:
+    from fetch_plan import FetchPlan  # imported by --minimal-fetch
+
+# Load environment variables from .env file
+load_dotenv()
+
+# --- Configuration ---
+FETCH_CONCURRENCY = int(os.getenv("PIPELINE_FETCH_CONCURRENCY", "8"))
+PERSIST_CONCURRENCY = 1  # one writer keeps NDJSON lines whole
+PIPELINE_REPORT_INTERVAL = float(os.getenv("PIPELINE_REPORT_INTERVAL", "5"))
+
+_DONE = object()
+
+Handler = Callable[[Any], Union[Any, Awaitable[Any]]]
+
+
+@dataclass
+class StageStats:
+    name: str
+    concurrency: int
+    processed: int = 0
+    dropped: int = 0           # handler returned None (item failed or was filtered out)
+    errors: int = 0            # handler raised
+    busy_seconds: float = 0.0  # summed over workers
+    max_queue_depth: int = 0
+    queue_depth_total: int = 0
+    samples: int = 0
+
+    @property
+    def mean_queue_depth(self) -> float:
+        return self.queue_depth_total / self.samples if self.samples else 0.0
+
+    def utilization(self, elapsed: float) -> float:
+        """Fraction of worker time spent inside the handler."""
+        return self.busy_seconds / (elapsed * self.concurrency) if elapsed > 0 else 0.0
+
+    def report(self, elapsed: float) -> str:
+        rate = self.processed / elapsed if elapsed > 0 else 0.0
+        return (f"{self.name:<9} x{self.concurrency:<3} {self.processed:>6} done {self.dropped + self.errors:>4} dropped "
+                f"{rate:8.2f}/s  busy {self.utilization(elapsed):4.0%}  "
+                f"queue avg {self.mean_queue_depth:5.1f} max {self.max_queue_depth}")
+
+
+class Stage:
+    """A named step with its own worker count and bounded input queue.
+
+    The handler may be a plain function or a coroutine function. Whatever it returns is
+    passed to the next stage; returning None drops the item.
+    """
+
+    def __init__(self, name: str, handler: Handler, concurrency: int = 1, queue_size: Optional[int] = None):
+        self.name = name
+        self.handler = handler
+        self.concurrency = concurrency
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size or concurrency * 2)
+        self.stats = StageStats(name, concurrency)
+
+    async def _call(self, item: Any) -> Any:
+        result = self.handler(item)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    async def worker(self, downstream: Optional["Stage"]) -> None:
+        while True:
+            item = await self.queue.get()
+            if item is _DONE:
+                return
+            started = time.perf_counter()
+            try:
+                result = await self._call(item)
+            except Exception as e:
+                print(f"❌ {self.name} stage failed: {e}")
+                self.stats.errors += 1
+                continue
+            finally:
+                self.stats.busy_seconds += time.perf_counter() - started
+            if result is None:
+                self.stats.dropped += 1
+                continue
+            self.stats.processed += 1
+            if downstream is not None:
+                await downstream.queue.put(result)  # blocks while the next stage is behind
+
+    def sample(self) -> None:
+        depth = self.queue.qsize()
+        self.stats.samples += 1
+        self.stats.queue_depth_total += depth
+        self.stats.max_queue_depth = max(self.stats.max_queue_depth, depth)
+
+
+class Pipeline:
+    """Chain of stages fed from an (async) iterable of items."""
+
+    def __init__(self, stages: List[Stage], report_interval: float = PIPELINE_REPORT_INTERVAL):
+        self.stages = stages
+        self.report_interval = report_interval
+        self.elapsed = 0.0
+
+    async def _run_stage(self, index: int) -> None:
+        stage = self.stages[index]
+        downstream = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        await asyncio.gather(*(stage.worker(downstream) for _ in range(stage.concurrency)))
+        if downstream is not None:
+            for _ in range(downstream.concurrency):
+                await downstream.queue.put(_DONE)
+
+    async def _feed(self, source: Any) -> None:
+        first = self.stages[0]
+        if hasattr(source, "__aiter__"):
+            async for item in source:
+                await first.queue.put(item)
+        else:
+            for item in source:
+                await first.queue.put(item)
+        for _ in range(first.concurrency):
+            await first.queue.put(_DONE)
+
+    async def _monitor(self, started: float) -> None:
+        ticks = 0
+        while True:
+            await asyncio.sleep(0.1)
+            for stage in self.stages:
+                stage.sample()
+            ticks += 1
+            if self.report_interval and ticks % max(int(self.report_interval / 0.1), 1) == 0:
+                print(f"⏳ {time.perf_counter() - started:6.1f}s | " + " | ".join(
+                    f"{s.name} q={s.queue.qsize()} done={s.stats.processed}" for s in self.stages))
+
+    async def run(self, source: Union[Iterable[Any], Any]) -> List[StageStats]:
+        started = time.perf_counter()
+        monitor = asyncio.create_task(self._monitor(started))
+        try:
+            await asyncio.gather(self._feed(source), *(self._run_stage(i) for i in range(len(self.stages))))
+        finally:
+            monitor.cancel()
+            self.elapsed = time.perf_counter() - started
+        return [stage.stats for stage in self.stages]
+
+    def bottleneck(self) -> Optional[StageStats]:
+        """The stage whose workers were busiest relative to their count."""
+        if not self.stages:
+            return None
+        return max((s.stats for s in self.stages), key=lambda s: s.utilization(self.elapsed))
+
+    def report(self) -> str:
+        lines = [stage.stats.report(self.elapsed) for stage in self.stages]
+        slowest = self.bottleneck()
+        if slowest is not None:
+            lines.append(f"Bottleneck: {slowest.name} ({slowest.utilization(self.elapsed):.0%} busy)")
+        return "\n".join(lines)
+
+
+async def run_wallet_pipeline(wallets: Iterable[str], output_path: str, api_key: Optional[str] = None,
+                              params: Optional[Dict] = None, fetch_concurrency: int = FETCH_CONCURRENCY,
+                              llm_concurrency: int = LLM_CONCURRENCY, rpm: float = LLM_RPM, tpm: float = LLM_TPM,
+                              check_status: bool = True, screen: bool = True,
+                              plan: Optional["FetchPlan"] = None) -> Pipeline:
+    """Fetch, sanitize, analyze and save every wallet in one process; returns the finished pipeline for its stats.
+
+    With a plan (minimal_fetch_plan()), only its endpoints and fields are fetched.
+    """
+    from openai import AsyncOpenAI
+
+    smart_prompt = load_smart_prompt()
+    # The scheduler owns 429 handling, so the SDK's own retries are turned off
+    async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+    scheduler = LLMScheduler(rpm=rpm, tpm=tpm, max_concurrency=llm_concurrency)
+    screen = screen and not PRESCREEN_DISABLED
+
+    async with AsyncWalletApiClient(API_BASE_URL, api_key, pool_size=fetch_concurrency * 4,
+                                    cache=complete.response_cache) as client:
+
+        async def source():
+            for chunk in chunked(wallets, STATUS_CHUNK_SIZE):
+                for address in (await filter_wallets_by_status(client, chunk) if check_status else chunk):
+                    yield address
+
+        async def fetch(address: str):
+            sections = await fetch_wallet_sections(address, api_key, params, client, plan=plan)
+            failed = missing_section(*sections, plan.sections if plan else complete.ALL_SECTIONS)
+            if failed:
+                print(f"ERROR: Failed to fetch {failed} for {address}")
+                return None
+            return address, sections
+
+        def sanitize(fetched):
+            address, (summary, pnl, behavior, tokens) = fetched
+            return build_agent_input(address, summary, pnl, behavior, tokens, params, plan=plan)
+
+        def format_prompt(agent_input: Dict):
+            if screen:
+                started = time.perf_counter()
+                verdict = prescreen(agent_input)
+                if verdict.route == ROUTE_TEMPLATE:
+                    # No messages: the llm stage passes the templated report straight through
+                    record_route(verdict, time.perf_counter() - started, complete.results_store)
+                    return agent_input, None, verdict
+            else:
+                verdict = None
+            return agent_input, build_messages(smart_prompt, agent_input), verdict
+
+        async def analyze(formatted):
+            agent_input, messages, verdict = formatted
+            if messages is None:
+                return agent_input, verdict.report, verdict
+            analysis, latency = await cached_chat_completion_timed_async(async_client, llm_cache, model=MODEL,
+                                                                         messages=messages, scheduler=scheduler,
+                                                                         **LLM_PARAMS)
+            if verdict:
+                record_route(verdict, latency, complete.results_store)
+            return agent_input, analysis, verdict
+
+        with open(output_path, "w", encoding="utf-8") as out:
+
+            def persist(analyzed):
+                agent_input, analysis, verdict = analyzed
+                out.write(json.dumps(agent_input) + "\n")
+                out.flush()
+                if complete.results_store is not None:
+                    complete.results_store.save_agent_input(agent_input)
+                if verdict and verdict.route == ROUTE_TEMPLATE:
+                    save_analysis(agent_input, analysis, model=PRESCREEN_MODEL, version=rules_version())
+                else:
+                    save_analysis(agent_input, analysis)
+                return agent_input["wallet_address"]
+
+            pipeline = Pipeline([
+                Stage("fetch", fetch, fetch_concurrency),
+                Stage("sanitize", sanitize),
+                Stage("format", format_prompt),
+                Stage("llm", analyze, llm_concurrency),
+                Stage("persist", persist, PERSIST_CONCURRENCY),
+            ])
+            await pipeline.run(source())
+        print(client.stats.report())
+    print(f"📈 {scheduler.stats.report('LLM calls')}")
+    if prescreen_stats.screened:
+        print(f"🚦 {prescreen_stats.report()}")
+    return pipeline
+
+
+def minimal_fetch_plan(screen: bool = True) -> "FetchPlan":
+    """What the smart prompt reads, plus the pre-screen's fields when it runs."""
+    from fetch_plan import get_template, plan_fetch
+
+    templates = [get_template("smart")]
+    if screen and not PRESCREEN_DISABLED:
+        templates.append(get_template("prescreen"))
+    return plan_fetch(*templates)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Fetch, sanitize, analyze and save wallets in one streaming pipeline")
+    parser.add_argument("wallets", help="File with one wallet address per line ('-' for stdin)")
+    parser.add_argument("--output", default="agent_inputs.ndjson", help="NDJSON file for the agent_input records")
+    parser.add_argument("--fetch-concurrency", type=int, default=FETCH_CONCURRENCY)
+    parser.add_argument("--llm-concurrency", type=int, default=LLM_CONCURRENCY)
+    parser.add_argument("--rpm", type=float, default=LLM_RPM, help="Requests per minute limit")
+    parser.add_argument("--tpm", type=float, default=LLM_TPM, help="Tokens per minute limit")
+    parser.add_argument("--no-status-check", action="store_true",
+                        help="Do not filter wallets through POST /analyses/wallets/status first")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the on-disk response cache")
+    parser.add_argument("--no-prescreen", action="store_true",
+                        help="Send every wallet to the LLM, skipping the deterministic pre-screen (PRESCREEN_DISABLED=1)")
+    parser.add_argument("--minimal-fetch", action="store_true",
+                        help="Fetch only the endpoints and fields the prompt and pre-screen read (see fetch_plan.py)")
+    parser.add_argument("--metrics", metavar="FILE", default=METRICS_FILE,
+                        help="Write request/LLM/sanitize metrics at exit: Prometheus text for .prom/.txt, JSON otherwise")
+    args = parser.parse_args(argv)
+    export_at_exit(args.metrics)
+
+    if not API_KEY or API_KEY == "your-api-key-here":
+        print("ERROR: Please set your API key in the .env file")
+        return
+    if not os.getenv("OPENAI_API_KEY"):
+        print("❌ Please set your OPENAI_API_KEY environment variable")
+        return
+    if args.no_cache:
+        complete.response_cache = None
+
+    params = {}
+    if START_DATE and END_DATE:
+        params["startDate"] = START_DATE
+        params["endDate"] = END_DATE
+
+    plan = minimal_fetch_plan(not args.no_prescreen) if args.minimal_fetch else None
+    if plan is not None:
+        print(plan.describe())
+
+    pipeline = asyncio.run(run_wallet_pipeline(
+        read_wallet_list(args.wallets), args.output, API_KEY, params,
+        fetch_concurrency=args.fetch_concurrency, llm_concurrency=args.llm_concurrency,
+        rpm=args.rpm, tpm=args.tpm, check_status=not args.no_status_check,
+        screen=not args.no_prescreen, plan=plan))
+    print(f"\n=== PIPELINE COMPLETE in {pipeline.elapsed:.1f}s ===")
+    print(pipeline.report())
+    print(f"🧾 {provider_usage.report()}")
+    if llm_cache:
+        print(f"🗄️  {llm_cache.stats.report()}")
+    if complete.response_cache:
+        print(complete.response_cache.stats.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+PnL overview metrics for several date windows from one fetch of token-performance rows.
+
+The backend's date filters select token rows by lastTransferTimestamp, so a 7d, 30d or
+90d view is a slice of the all-time rows. Instead of re-running the fetch script with
+START_DATE/END_DATE per window, every row is fetched once (through the response cache)
+and all windows of all wallets are computed in one vectorized pass:
+
+    realized_pnl, swap_win_rate, win_loss_count, avg_pl_trade, token_win_rate,
+    median_pl_token (non-zero PnLs only), total_volume, total_sol_spent,
+    total_sol_received, trade_count, tokens_traded, data_from
+
+named and rounded as in the pnl_overview section. Windows are "7d"/"24h" style lookbacks
+from --as-of (default now), "all", or explicit "2024-01-01:2024-12-31" ranges.
+
+    wallet-agent windows --wallet <address> --windows 7d,30d,90d,all
+    wallet-agent windows --batch wallets.txt --save-rows rows.ndjson
+    wallet-agent windows --rows rows.ndjson --windows 14d,60d   # no backend calls
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from field_mapping import camel_case
+
+# Load environment variables from .env file
+load_dotenv()
+
+# --- Configuration ---
+WINDOWS = os.getenv("METRIC_WINDOWS", "7d,30d,90d,all")
+OUTPUT_FILE = os.getenv("WINDOW_METRICS_FILE", "window_metrics.ndjson")
+
+_UNITS = {"h": 3600, "d": 86400, "w": 7 * 86400}
+# Row columns the engine reads, by sanitized name (backend rows use the camelCase form)
+_COLUMNS = ("net_sol_profit_loss", "total_sol_spent", "total_sol_received", "transfer_count_in",
+            "transfer_count_out", "first_transfer_timestamp", "last_transfer_timestamp")
+_BACKEND_COLUMNS = tuple(camel_case(name) for name in _COLUMNS)
+
+
+@dataclass(frozen=True)
+class Window:
+    name: str
+    start: Optional[int]  # unix seconds, inclusive; None = unbounded
+    end: Optional[int]
+
+
+def _timestamp(date: str) -> int:
+    parsed = datetime.fromisoformat(date)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def parse_windows(spec: str, as_of: Optional[int] = None) -> List[Window]:
+    """'7d,30d,all,2024-01-01:2024-03-31' -> Windows; lookbacks end at as_of (default now)."""
+    as_of = int(time.time()) if as_of is None else as_of
+    windows = []
+    for name in (part.strip() for part in spec.split(",")):
+        if not name:
+            continue
+        lookback = re.fullmatch(r"(\d+)([hdw])", name)
+        if name == "all":
+            windows.append(Window(name, None, None))
+        elif lookback:
+            windows.append(Window(name, as_of - int(lookback.group(1)) * _UNITS[lookback.group(2)], as_of))
+        elif ":" in name:
+            start, end = name.split(":", 1)
+            # An end date on its own means the whole day
+            end_ts = _timestamp(end) + (86399 if len(end) == 10 else 0) if end else None
+            windows.append(Window(name, _timestamp(start) if start else None, end_ts))
+        else:
+            raise ValueError(f"Unknown window {name!r}; use e.g. 7d, 24h, 4w, all or 2024-01-01:2024-03-31")
+    return windows
+
+
+def _format_dates(timestamps: "np.ndarray") -> "np.ndarray":
+    """Unix seconds -> 'YYYY-MM-DD HH:MM:SS UTC' strings like the backend's dataFrom; 0 or inf -> 'N/A'."""
+    import numpy as np
+    known = np.isfinite(timestamps) & (timestamps > 0)
+    text = np.datetime_as_string(np.where(known, timestamps, 0).astype("datetime64[s]"), unit="s")
+    return np.where(known, np.char.add(np.char.replace(text, "T", " "), " UTC"), "N/A")
+
+
+def window_metrics(wallet_rows: Iterable[Tuple[str, List[Dict]]], windows: List[Window]) -> Dict[str, Dict[str, Dict]]:
+    """{wallet: {window name: pnl_overview-style metrics}} for every wallet and window at once.
+
+    Rows are token-performance rows, either straight from the backend or sanitized
+    (agent_input token_performance), but one wallet's rows must all be the same kind.
+    A row is in a window when its lastTransferTimestamp is, as with the backend's filter.
+    """
+    import numpy as np
+
+    wallets: List[str] = []
+    values: List[Tuple] = []
+    owner: List[int] = []
+    getters = (itemgetter(*_COLUMNS), itemgetter(*_BACKEND_COLUMNS))
+    for wallet, rows in wallet_rows:
+        wallets.append(wallet)
+        rows = rows or []
+        # One wallet's rows all come from the same place, so check the shape once
+        keys = _COLUMNS if rows and "last_transfer_timestamp" in rows[0] else _BACKEND_COLUMNS
+        try:
+            picked = list(map(getters[keys is _BACKEND_COLUMNS], rows))
+        except KeyError:  # some row lacks a column; missing values count as 0
+            picked = [tuple(row.get(key) for key in keys) for row in rows]
+        values.extend(picked)
+        owner.extend([len(wallets) - 1] * len(rows))
+
+    n_wallets, n_rows = len(wallets), len(owner)
+    # None becomes NaN with dtype=float, then 0
+    table = np.nan_to_num(np.array(values, dtype=np.float64).reshape(n_rows, len(_COLUMNS)))
+    data = dict(zip(_COLUMNS, table.T))
+    owner_ids = np.array(owner, dtype=np.int64)
+    pnl, last_ts, first_ts = data["net_sol_profit_loss"], data["last_transfer_timestamp"], data["first_transfer_timestamp"]
+    trades = data["transfer_count_in"] + data["transfer_count_out"]
+
+    # windows x rows membership; every metric below is a masked reduction over it
+    starts = np.array([-np.inf if w.start is None else w.start for w in windows])[:, None]
+    ends = np.array([np.inf if w.end is None else w.end for w in windows])[:, None]
+    member = (last_ts[None, :] >= starts) & (last_ts[None, :] <= ends)
+    group = (np.arange(len(windows))[:, None] * n_wallets + owner_ids[None, :])  # (window, wallet) cell per row
+    cells = len(windows) * n_wallets
+
+    def per_cell(values: "np.ndarray", mask: "np.ndarray" = member) -> "np.ndarray":
+        weights = np.broadcast_to(values, mask.shape)[mask]
+        return np.bincount(group[mask], weights=weights, minlength=cells).reshape(len(windows), n_wallets)
+
+    ones = np.ones(n_rows)
+    tokens = per_cell(ones)
+    profitable = per_cell(ones, member & (pnl > 0)[None, :])
+    unprofitable = per_cell(ones, member & (pnl < 0)[None, :])
+    realized = per_cell(pnl)
+    spent = per_cell(data["total_sol_spent"])
+    received = per_cell(data["total_sol_received"])
+    trade_count = per_cell(trades)
+    first = np.full(cells, np.inf)
+    last = np.zeros(cells)
+    dated = member & (first_ts > 0)[None, :]
+    np.minimum.at(first, group[dated], np.broadcast_to(first_ts, member.shape)[dated])
+    np.maximum.at(last, group[member], np.broadcast_to(last_ts, member.shape)[member])
+
+    # Median of non-zero PnLs per cell: sort rows once by (wallet, pnl), then per window pick
+    # the middle ranks out of the running count of rows that are in the window
+    order = np.lexsort((pnl, owner_ids))
+    sorted_owner = owner_ids[order]
+    wallet_start = np.searchsorted(sorted_owner, np.arange(n_wallets))
+    sorted_pnl = pnl[order]
+    median = np.zeros((len(windows), n_wallets))
+    for w in range(len(windows)):
+        in_cell = (member[w] & (pnl != 0))[order]
+        running = np.cumsum(in_cell)
+        count = np.bincount(sorted_owner[in_cell], minlength=n_wallets)
+        before = np.where(wallet_start > 0, running[np.maximum(wallet_start - 1, 0)], 0) if n_rows else wallet_start
+        has = count > 0
+        low = np.searchsorted(running, before[has] + (count[has] + 1) // 2)
+        high = np.searchsorted(running, before[has] + count[has] // 2 + 1)
+        median[w, has] = (sorted_pnl[low] + sorted_pnl[high]) / 2
+
+    decided = profitable + unprofitable
+    win_rate = np.round(np.divide(profitable * 100, decided, out=np.zeros_like(decided), where=decided > 0), 1)
+    avg_pl = np.round(np.divide(realized, decided, out=np.zeros_like(decided), where=decided > 0), 2)
+    first = first.reshape(len(windows), n_wallets)
+    last = last.reshape(len(windows), n_wallets)
+    # Plain Python numbers, wallet-major, so the records below are cheap to build and serialize
+    table = {name: values.T.tolist() for name, values in (
+        ("realized_pnl", np.round(realized, 6)), ("win_rate", win_rate), ("profitable", profitable.astype(np.int64)),
+        ("decided", decided.astype(np.int64)), ("avg_pl", avg_pl), ("volume", np.round(spent + received, 2)),
+        ("spent", np.round(spent, 2)), ("received", np.round(received, 2)), ("median", np.round(median, 2)),
+        ("trades", trade_count.astype(np.int64)), ("tokens", tokens.astype(np.int64)),
+        ("first", _format_dates(first)), ("last", _format_dates(last)))}
+    result: Dict[str, Dict[str, Dict]] = {}
+    for i, wallet in enumerate(wallets):
+        row = {name: values[i] for name, values in table.items()}
+        result[wallet] = {
+            window.name: {
+                "realized_pnl": row["realized_pnl"][w],
+                "swap_win_rate": row["win_rate"][w],
+                "win_loss_count": f"{row['profitable'][w]}/{row['decided'][w]} wins",
+                "avg_pl_trade": row["avg_pl"][w],
+                "total_volume": row["volume"][w],
+                "total_sol_spent": row["spent"][w],
+                "total_sol_received": row["received"][w],
+                "median_pl_token": row["median"][w],
+                "token_win_rate": row["win_rate"][w],
+                "trade_count": row["trades"][w],
+                "tokens_traded": row["tokens"][w],
+                "data_from": f"{row['first'][w]} to {row['last'][w]}" if row["tokens"][w] else "N/A",
+            }
+            for w, window in enumerate(windows)
+        }
+    return result
+
+
+# --- Input / output ---
+def read_rows(path: str) -> Iterator[Tuple[str, List[Dict]]]:
+    """(wallet, rows) from a --save-rows NDJSON file."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                yield record["wallet_address"], record["token_rows"]
+
+
+def save_rows(wallet_rows: List[Tuple[str, List[Dict]]], path: str) -> None:
+    with open(path, "w", encoding="utf-8") as out:
+        for wallet, rows in wallet_rows:
+            out.write(json.dumps({"wallet_address": wallet, "token_rows": rows}) + "\n")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="PnL metrics for several date windows from one token-performance fetch")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--wallet", nargs="+", metavar="ADDRESS", help="Wallet addresses to fetch")
+    source.add_argument("--batch", metavar="FILE", help="File with one wallet address per line ('-' for stdin)")
+    source.add_argument("--rows", metavar="FILE", help="Token rows saved earlier with --save-rows; nothing is fetched")
+    parser.add_argument("--windows", default=WINDOWS, help="Comma-separated windows: 7d, 24h, 4w, all, 2024-01-01:2024-03-31")
+    parser.add_argument("--as-of", help="End of the lookback windows (ISO date/time, default now)")
+    parser.add_argument("--save-rows", metavar="FILE", help="Also save the fetched token rows for later --rows runs")
+    parser.add_argument("--output", default=OUTPUT_FILE, help="NDJSON with one line of windows per wallet")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("BATCH_CONCURRENCY", "8")),
+                        help="Wallets fetched at the same time")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    try:
+        windows = parse_windows(args.windows, _timestamp(args.as_of) if args.as_of else None)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return
+
+    started = time.perf_counter()
+    if args.rows:
+        wallet_rows = list(read_rows(args.rows))
+    else:
+        from fetch_wallet_data_complete import fetch_all_token_rows, read_wallet_list
+        wallets = args.wallet or read_wallet_list(args.batch)
+        wallet_rows = asyncio.run(fetch_all_token_rows(wallets, args.concurrency))
+        if args.save_rows:
+            save_rows(wallet_rows, args.save_rows)
+            print(f"Token rows saved to {args.save_rows}")
+    loaded = time.perf_counter()
+    metrics = window_metrics(wallet_rows, windows)
+    computed = time.perf_counter()
+
+    with open(args.output, "w", encoding="utf-8") as out:
+        for wallet, by_window in metrics.items():
+            out.write(json.dumps({"wallet_address": wallet, "windows": by_window}) + "\n")
+
+    if len(metrics) <= 5:
+        for wallet, by_window in metrics.items():
+            print(f"\n{wallet}")
+            print(f"  {'window':<24}{'realized_pnl':>14}{'token_win_rate':>16}{'median_pl_token':>17}{'trades':>8}{'tokens':>8}")
+            for name, m in by_window.items():
+                print(f"  {name:<24}{m['realized_pnl']:>14.2f}{m['token_win_rate']:>16.1f}{m['median_pl_token']:>17.2f}"
+                      f"{m['trade_count']:>8}{m['tokens_traded']:>8}")
+    rows = sum(len(r) for _, r in wallet_rows)
+    print(f"\n{len(metrics)} wallets x {len(windows)} windows from {rows} token rows: "
+          f"loaded in {loaded - started:.2f}s, computed in {computed - loaded:.3f}s")
+    print(f"Window metrics written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()